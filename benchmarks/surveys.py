@@ -0,0 +1,75 @@
+"""Synthetic surveys for benchmarking.
+"""
+from __future__ import annotations
+
+from typing import Callable, List
+
+from hemlock import Page
+from hemlock.questions import Check, Input, Label, Select, Textarea
+
+QUESTION_TYPES = (Input, Check, Select, Textarea, Label)
+CHOICES = ["Yes", "No", "Maybe"]
+
+
+def make_seed(n_pages: int, n_questions: int, depth: int) -> Callable[[], List[Page]]:
+    """Make a seed function for a synthetic survey.
+
+    The survey's main branch has ``n_pages`` pages. The first page of every branch has
+    its own branch of ``n_pages`` pages, down to the given depth, so the survey has
+    ``n_pages * depth`` pages in total.
+
+    Args:
+        n_pages (int): Number of pages on each branch.
+        n_questions (int): Number of questions on each page.
+        depth (int): Number of levels of branches.
+
+    Returns:
+        Callable[[], List[Page]]: Seed function.
+    """
+
+    def seed() -> List[Page]:
+        return make_branch(n_pages, n_questions, depth)
+
+    return seed
+
+
+def make_branch(n_pages: int, n_questions: int, depth: int) -> List[Page]:
+    """Make a branch of a synthetic survey.
+
+    Args:
+        n_pages (int): Number of pages on each branch.
+        n_questions (int): Number of questions on each page.
+        depth (int): Number of levels of branches, including this one.
+
+    Returns:
+        List[Page]: Branch.
+    """
+    branch = [make_page(n_questions) for _ in range(n_pages)]
+    if depth > 1:
+        branch[0].branch = make_branch(n_pages, n_questions, depth - 1)
+
+    return branch
+
+
+def make_page(n_questions: int) -> Page:
+    """Make a page of a synthetic survey.
+
+    The page cycles through the question types in ``QUESTION_TYPES``.
+
+    Args:
+        n_questions (int): Number of questions on the page.
+
+    Returns:
+        Page: Page.
+    """
+    questions = []
+    for i in range(n_questions):
+        question_type = QUESTION_TYPES[i % len(QUESTION_TYPES)]
+        kwargs = {"variable": f"{question_type.__name__.lower()}{i}"}
+        if question_type in (Check, Select):
+            kwargs["choices"] = CHOICES
+        questions.append(
+            question_type(f"**Question {i}.** Please answer this question.", **kwargs)
+        )
+
+    return Page(*questions)
@@ -3,6 +3,8 @@ By Dillon Bowen dsbowen@wharton.upenn.edu
 A software development kit for creating online surveys and experiments."""
 
 import hemlock._admin_routes
+import hemlock._assets
+import hemlock._indexes
 import hemlock._user_routes
 from .app import create_app, create_test_app, socketio
 from .user import User
@@ -4,11 +4,19 @@ from __future__ import annotations
 
 import csv
 import io
+import logging
 from datetime import datetime, timedelta
-from typing import Union
+from typing import Iterator, List, Union
 
-import pandas as pd
-from flask import request, send_file, session, url_for, wrappers
+from flask import (
+    current_app,
+    request,
+    send_file,
+    session,
+    stream_with_context,
+    url_for,
+    wrappers,
+)
 from werkzeug.wrappers import Response
 
 from .admin_route_utils import (
@@ -18,14 +26,20 @@ from .admin_route_utils import (
     navbar,
     password_is_correct,
 )
-from .app import bp, db, static_pages
+from ._metrics import cache_to_prometheus, request_metrics
+from ._pool import pool_metrics
+from ._status_aggregates import get_status_summary
+from .app import SNAPSHOT_DIALECTS, bp, db, get_dialect_name, static_pages
 from .user import User
 from .page import Page
 from .questions import Input, Label
-from .questions.base import HASH_LENGTH
+from .questions.base import HASH_LENGTH, question_html_cache
 from .utils import redirect
+from .utils.format import markdown_cache
 from .utils.statics import pandas_to_html, recompile_at_interval
 
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
 
 @bp.route("/admin-login", methods=["GET", "POST"])
 def admin_login() -> Union[str, Response]:
@@ -101,24 +115,122 @@ def admin_logout() -> Response:
 def admin_download() -> wrappers.Response:
     """Download the users' data.
 
+    The CSV is streamed one user at a time, so the full dataset is never held in
+    memory. The header needs every variable name before the first row is written, so
+    the users' data are read twice: once for the variable names, then again for the
+    rows. The download therefore starts after a pass over the data, and takes about
+    twice as long as reading the data once.
+
+    On databases which support it, both passes read from one snapshot, so variables
+    recorded between the passes don't appear in the rows without appearing in the
+    header. On other databases (e.g., SQLite), such variables are left out of the
+    download and logged as a warning.
+
     Returns:
         wrappers.Response: CSV of the users' data.
     """
-    df = User.get_all_data(to_pandas=False)
+    if get_dialect_name() in SNAPSHOT_DIALECTS and not db.session.in_transaction():
+        db.session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    columns = User.get_all_data_columns()
+    return wrappers.Response(
+        stream_with_context(generate_csv(columns)),
+        mimetype="text/csv",
+        headers={
+            "Content-Disposition": f'attachment; filename="data_{datetime.now()}.csv"'
+        },
+    )
+
+
+def generate_csv(columns: List[str]) -> Iterator[str]:
+    """Generate the users' data as CSV chunks.
+
+    Args:
+        columns (List[str]): Variable names to write in the CSV header. These should
+            include every variable in the users' data. Other variables are left out,
+            and their names are logged as a warning.
+
+    Yields:
+        str: CSV chunk. The first chunk is the header. Each following chunk contains
+            the rows for one user.
+    """
+    known_columns, missing_columns = set(columns), set()
     writer = csv.writer(stringio := io.StringIO())
-    writer.writerow(df.keys())
-    writer.writerows(zip(*df.values()))
 
-    bytesio = io.BytesIO()
-    bytesio.write(stringio.getvalue().encode())
-    bytesio.seek(0)
-    stringio.close()
+    def flush_chunk() -> str:
+        chunk = stringio.getvalue()
+        stringio.seek(0)
+        stringio.truncate()
+        return chunk
+
+    writer.writerow(columns)
+    yield flush_chunk()
+
+    for df in User.iter_all_data():
+        missing_columns.update(df.keys() - known_columns)
+        n_rows = max([len(values) for values in df.values()], default=0)
+        writer.writerows(
+            zip(*[df.get(column) or n_rows * [None] for column in columns])
+        )
+        yield flush_chunk()
+
+    if missing_columns:
+        logging.warning(
+            "Variables recorded after the CSV header was written were left out of"
+            f" the download: {sorted(missing_columns)}."
+        )
+
 
+@bp.route("/admin-download-parquet")
+@login_required
+def admin_download_parquet() -> wrappers.Response:
+    """Download the users' data as a parquet file.
+
+    Unlike the CSV download, the parquet file keeps the variables' types. Variables
+    whose values have incompatible types (e.g., numbers and lists) can't be stored as
+    one typed column, so they're stored as strings. The file is written in row groups
+    of ``PARQUET_ROW_GROUP_SIZE`` rows. Requires ``pyarrow``.
+
+    Returns:
+        wrappers.Response: Parquet file of the users' data.
+    """
+    import pyarrow.parquet as pq
+
+    table = User.get_all_data(data_format="arrow")
+    pq.write_table(
+        table,
+        buffer := io.BytesIO(),
+        row_group_size=current_app.config["PARQUET_ROW_GROUP_SIZE"],
+    )
+    buffer.seek(0)
     return send_file(
-        bytesio,
+        buffer,
+        mimetype="application/vnd.apache.parquet",
         as_attachment=True,
-        download_name=f"data_{datetime.now()}.csv",
-        mimetype="text/csv",
+        download_name=f"data_{datetime.now()}.parquet",
+    )
+
+
+@bp.route("/admin-metrics")
+@login_required
+def admin_metrics() -> wrappers.Response:
+    """Request timing metrics in the Prometheus text format.
+
+    Request timings are only recorded when ``REQUEST_METRICS`` is set in the
+    configuration. Markdown and question HTML cache and database connection pool
+    metrics are always reported.
+
+    Returns:
+        wrappers.Response: Histograms of the time participants' requests spend in
+            each stage, by URL rule and page position, markdown and question HTML
+            cache counters, and connection pool checkout wait times, saturation
+            counters, and usage.
+    """
+    return wrappers.Response(
+        request_metrics.to_prometheus()
+        + cache_to_prometheus("markdown", markdown_cache)
+        + cache_to_prometheus("question_html", question_html_cache)
+        + pool_metrics.to_prometheus(db.engine.pool),
+        mimetype=PROMETHEUS_CONTENT_TYPE,
     )
 
 
@@ -147,6 +259,7 @@ def admin_status() -> str:
             recompile_at_interval(
                 30000,
                 label := Label(init_label, compile=get_user_status),
+                broadcast=True,
             ),
             navbar=navbar,
             forward=False,
@@ -163,27 +276,23 @@ def get_user_status(status_label: Label) -> None:
     """Get the user status label.
 
     Contains information about the number of users, their status, and time spent on
-    the study.
+    the study. These are read from counts which are updated whenever a user's status
+    changes, so this doesn't need to load the users. Users created before the counts
+    were maintained are left out until they're counted with
+    ``flask hemlock count-users``.
 
     Args:
         status_label (Label): User status label.
     """
-    meta_df = pd.DataFrame([user.get_meta_data() for user in User.query.all()])
-    if len(meta_df) == 0:
+    import pandas as pd
+
+    summary = get_status_summary()
+    if summary["all"][0] == 0:
         return
 
-    # count users by status
-    statuses = ["completed", "failed", "errored", "in_progress"]
-    status_df = meta_df[statuses].sum()
-    status_df["all"] = len(meta_df)
-    status_df = status_df.to_frame("Count")
-
-    # get median time by status
-    median_time = [
-        meta_df[meta_df[column]].total_seconds.quantile(0.5) for column in statuses
-    ]
-    median_time.append(meta_df.total_seconds.quantile(0.5))
-    status_df["Median time"] = median_time
+    status_df = pd.DataFrame.from_dict(
+        summary, orient="index", columns=["Count", "Median time"]
+    )
     status_df["Median time"] = status_df["Median time"].apply(
         lambda x: None if pd.isna(x) else str(timedelta(seconds=int(x)))
     )
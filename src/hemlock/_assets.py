@@ -0,0 +1,278 @@
+"""Bundled static assets.
+
+Pages load Bootstrap, jQuery, the Josefin Sans font, and (for questions recompiled at
+an interval) the Socket.IO client from CDNs by default. When ``STATIC_ASSETS`` is
+"local", pages load copies bundled with hemlock instead, so participants' browsers
+only contact the study's server.
+
+Bundled assets are served from URLs containing a hash of their content, so browsers
+can cache them indefinitely. Each asset is stored with gzip and (if the ``brotli``
+package is installed when the assets are bundled) brotli compressed copies, which are
+served to browsers that accept them.
+
+Bundle the assets with::
+
+    $ python -m hemlock._assets
+
+Releases built with ``make dist`` bundle the assets before building, so they're
+included in the distributions.
+"""
+from __future__ import annotations
+
+import base64
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import urllib.request
+from typing import Dict, List, NamedTuple, Optional
+
+from flask import current_app, request, send_file, url_for, wrappers
+from werkzeug.exceptions import NotFound
+
+from .app import bp
+
+ASSET_DIR = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)), "static", "vendor"
+)
+# precompressed variants in order of preference: (Content-Encoding, file extension)
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Google Fonts serves woff2 files to browsers that identify themselves as modern
+FONT_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/96.0.4664.110 Safari/537.36"
+)
+
+
+class Asset(NamedTuple):
+    """Asset loaded from a CDN.
+
+    Attributes:
+        url (str): CDN URL, as it appears in the pages' HTML settings.
+        integrity (Optional[str]): Subresource integrity hash of the asset. Bundled
+            copies are checked against this hash.
+    """
+
+    url: str
+    integrity: Optional[str] = None
+
+
+# maps bundled file names to assets
+ASSETS: Dict[str, Asset] = {
+    "bootstrap.min.css": Asset(
+        "https://cdn.jsdelivr.net/npm/bootstrap@5.1.0/dist/css/bootstrap.min.css",
+        "sha384-KyZXEAg3QhqLMpG8r+8fhAXLRk2vvoC2f3B09zVXn8CA5QIVfZOJ3BCsw2P0p/We",
+    ),
+    "bootstrap.bundle.min.js": Asset(
+        "https://cdn.jsdelivr.net/npm/bootstrap@5.0.2/dist/js/bootstrap.bundle.min.js",
+        "sha384-MrcW6ZMFYlzcLA8Nl+NtUVF0sA7MsXsP1UyJoMp4YLEuNSfAP+JcXn/tWtIaxVXM",
+    ),
+    "jquery.min.js": Asset(
+        "https://code.jquery.com/jquery-3.6.0.min.js",
+        "sha256-/xUj+3OJU5yExlq6GSYGSHk7tPXikynS7ogEvDej/m4=",
+    ),
+    "socket.io.min.js": Asset("https://cdn.socket.io/4.2.0/socket.io.min.js"),
+    "josefin-sans.css": Asset(
+        "https://fonts.googleapis.com/css?family=Josefin+Sans&display=swap"
+    ),
+}
+
+# maps asset file names to their content hashes
+_content_hashes: Dict[str, str] = {}
+
+
+def get_content_hash(filename: str, directory: str = None) -> str:
+    """Get the hash of a bundled file's content.
+
+    Args:
+        filename (str): Name of the file.
+        directory (str, optional): Directory containing the file. Defaults to
+            ``ASSET_DIR``.
+
+    Returns:
+        str: First 12 hex digits of the file's SHA-256 hash.
+    """
+    path = os.path.join(directory or ASSET_DIR, filename)
+    if path not in _content_hashes:
+        with open(path, "rb") as f:
+            _content_hashes[path] = hashlib.sha256(f.read()).hexdigest()[:12]
+    return _content_hashes[path]
+
+
+def get_asset_url(filename: str) -> str:
+    """Get the content-hashed URL of a bundled asset.
+
+    Args:
+        filename (str): Name of the asset, e.g., "bootstrap.min.css".
+
+    Returns:
+        str: URL, e.g., "/hemlock/assets/bootstrap.min.<hash>.css".
+    """
+    stem, extension = os.path.splitext(filename)
+    return url_for(
+        "hemlock.asset", filename=f"{stem}.{get_content_hash(filename)}{extension}"
+    )
+
+
+@bp.app_template_filter("localize_assets")
+def localize_assets(html: str) -> str:
+    """Replace CDN URLs with the URLs of bundled assets if ``STATIC_ASSETS`` is
+    "local".
+
+    Args:
+        html (str): HTML, e.g., a page's CSS or javascript.
+
+    Returns:
+        str: HTML.
+    """
+    if current_app.config["STATIC_ASSETS"] != "local":
+        return html
+
+    for filename, asset in ASSETS.items():
+        if asset.url in html:
+            html = html.replace(asset.url, get_asset_url(filename))
+    return html
+
+
+def check_assets_bundled(directory: str = None) -> None:
+    """Check that the assets have been bundled.
+
+    Args:
+        directory (str, optional): Directory containing the assets. Defaults to
+            ``ASSET_DIR``.
+
+    Raises:
+        FileNotFoundError: If an asset is missing.
+    """
+    directory = directory or ASSET_DIR
+    for filename in ASSETS:
+        if not os.path.exists(os.path.join(directory, filename)):
+            raise FileNotFoundError(
+                f"Bundled asset {filename} not found in {directory}."
+                " Bundle the assets with `python -m hemlock._assets` or set"
+                " STATIC_ASSETS to 'cdn'."
+            )
+
+
+@bp.route("/hemlock/assets/<filename>")
+def asset(filename: str) -> wrappers.Response:
+    """Serve a bundled asset.
+
+    Args:
+        filename (str): Content-hashed name of the asset, or the name of a file the
+            asset references (e.g., a font).
+
+    Returns:
+        wrappers.Response: Asset, compressed with the best encoding the browser
+            accepts. The response may be cached indefinitely.
+    """
+    stem, extension = os.path.splitext(filename)
+    original_stem, _, content_hash = stem.rpartition(".")
+    if f"{original_stem}{extension}" in ASSETS:
+        filename = f"{original_stem}{extension}"
+        if content_hash != get_content_hash(filename):
+            raise NotFound()
+    elif filename.endswith(tuple(extension for _, extension in ENCODINGS)):
+        raise NotFound()
+
+    path = os.path.join(ASSET_DIR, filename)
+    if not os.path.isfile(path):
+        raise NotFound()
+
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    for encoding, encoding_extension in ENCODINGS:
+        if encoding in request.accept_encodings and os.path.exists(
+            path + encoding_extension
+        ):
+            response = send_file(path + encoding_extension, mimetype=mimetype)
+            response.headers["Content-Encoding"] = encoding
+            break
+    else:
+        response = send_file(path, mimetype=mimetype)
+
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def bundle_assets(directory: str = None) -> List[str]:
+    """Download the assets from their CDNs and store them with compressed copies.
+
+    Args:
+        directory (str, optional): Directory in which to store the assets. Defaults
+            to ``ASSET_DIR``.
+
+    Raises:
+        ValueError: If an asset doesn't match its integrity hash.
+
+    Returns:
+        List[str]: Names of the files written.
+    """
+    directory = directory or ASSET_DIR
+    os.makedirs(directory, exist_ok=True)
+    filenames = []
+    for filename, asset in ASSETS.items():
+        headers = {"User-Agent": FONT_USER_AGENT} if filename.endswith(".css") else {}
+        content = _download(asset.url, headers)
+        if asset.integrity is not None:
+            algorithm, expected_digest = asset.integrity.split("-", 1)
+            digest = base64.b64encode(hashlib.new(algorithm, content).digest())
+            if digest.decode() != expected_digest:
+                raise ValueError(f"{asset.url} does not match its integrity hash.")
+
+        if filename == "josefin-sans.css":
+            content, font_filenames = _bundle_fonts(content, directory)
+            filenames += font_filenames
+
+        _write(directory, filename, content)
+        filenames.append(filename)
+
+    return filenames
+
+
+def _bundle_fonts(css: bytes, directory: str) -> tuple:
+    # download the fonts the stylesheet references and point it to the local copies
+    font_filenames = []
+
+    def replace_url(match: re.Match) -> str:
+        content = _download(match.group(1))
+        _, extension = os.path.splitext(match.group(1).rsplit("/", 1)[-1])
+        # fonts are named by their content, so they can be cached indefinitely
+        font_filename = f"font-{hashlib.sha256(content).hexdigest()[:12]}{extension}"
+        _write(directory, font_filename, content)
+        font_filenames.append(font_filename)
+        return f"url({font_filename})"
+
+    css = re.sub(r"url\((https://[^)]+)\)", replace_url, css.decode()).encode()
+    return css, font_filenames
+
+
+def _download(url: str, headers: Dict[str, str] = None) -> bytes:
+    with urllib.request.urlopen(
+        urllib.request.Request(url, headers=headers or {})
+    ) as f:
+        return f.read()
+
+
+def _write(directory: str, filename: str, content: bytes) -> None:
+    path = os.path.join(directory, filename)
+    with open(path, "wb") as f:
+        f.write(content)
+
+    # mtime=0 so the compressed file only changes when the content does
+    with open(path + ".gz", "wb") as f:
+        f.write(gzip.compress(content, compresslevel=9, mtime=0))
+
+    try:
+        import brotli
+    except ImportError:
+        return
+    with open(path + ".br", "wb") as f:
+        f.write(brotli.compress(content))
+
+
+if __name__ == "__main__":
+    for written_filename in bundle_assets():
+        print(f"Bundled {written_filename}")
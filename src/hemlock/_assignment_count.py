@@ -0,0 +1,117 @@
+"""Counts of users assigned to each condition of a random assigner.
+"""
+from __future__ import annotations
+
+import random
+import threading
+from typing import Callable, List, Sequence
+
+from sqlalchemy.exc import IntegrityError
+
+from .app import ROW_LOCK_DIALECTS, db, get_dialect_name
+
+# other databases fall back to a lock in this process
+_process_lock = threading.Lock()
+
+
+class AssignmentCount(db.Model):  # type: ignore
+    """Number of users assigned to one condition of a random assigner.
+
+    Attributes:
+        assigner_key (str): Identifies the assigner.
+        condition_index (int): Index of the condition in the assigner's possible
+            assignments.
+        count (int): Number of users assigned to the condition.
+    """
+
+    id = db.Column(db.Integer, primary_key=True)
+    assigner_key = db.Column(db.String, index=True)
+    condition_index = db.Column(db.Integer)
+    count = db.Column(db.Integer, default=0)
+
+    __table_args__ = (db.UniqueConstraint(assigner_key, condition_index),)
+
+
+def increment_fewest_assigned(
+    assigner_key: str,
+    n_conditions: int,
+    get_initial_counts: Callable[[], Sequence[int]],
+) -> int:
+    """Assign a user to a randomly chosen condition with the fewest users.
+
+    The counts are locked while choosing the condition, so concurrent assignments
+    stay balanced. On databases with row locks, the lock is held until the current
+    transaction commits. Other databases (e.g., SQLite) use a lock in this process,
+    which does not prevent users in separate processes from being assigned to the
+    same condition.
+
+    Args:
+        assigner_key (str): Identifies the assigner.
+        n_conditions (int): Number of conditions.
+        get_initial_counts (Callable[[], Sequence[int]]): Gets the number of users
+            already assigned to each condition. Called the first time the assigner is
+            used, to count users assigned before the counts were stored.
+
+    Returns:
+        int: Index of the condition to which the user was assigned.
+    """
+    if get_dialect_name() in ROW_LOCK_DIALECTS:
+        return _increment_fewest_assigned(
+            assigner_key, n_conditions, get_initial_counts
+        )
+
+    with _process_lock:
+        return _increment_fewest_assigned(
+            assigner_key, n_conditions, get_initial_counts
+        )
+
+
+def _increment_fewest_assigned(
+    assigner_key: str,
+    n_conditions: int,
+    get_initial_counts: Callable[[], Sequence[int]],
+) -> int:
+    counts = _get_locked_counts(assigner_key)
+    if len(counts) < n_conditions:
+        _create_counts(assigner_key, counts, get_initial_counts())
+        counts = _get_locked_counts(assigner_key)
+
+    min_count = min(count.count for count in counts)
+    chosen = random.choice([count for count in counts if count.count == min_count])
+    # increment in the database so concurrent increments aren't lost
+    chosen.count = AssignmentCount.count + 1
+    db.session.flush()
+    return chosen.condition_index
+
+
+def _get_locked_counts(assigner_key: str) -> List[AssignmentCount]:
+    return (
+        AssignmentCount.query.filter_by(assigner_key=assigner_key)
+        .order_by(AssignmentCount.condition_index)
+        .populate_existing()
+        .with_for_update()
+        .all()
+    )
+
+
+def _create_counts(
+    assigner_key: str, counts: List[AssignmentCount], initial_counts: Sequence[int]
+) -> None:
+    existing_indices = {count.condition_index for count in counts}
+    try:
+        # a savepoint, so a concurrent insert only rolls back the counts
+        with db.session.begin_nested():
+            db.session.add_all(
+                [
+                    AssignmentCount(
+                        assigner_key=assigner_key,
+                        condition_index=i,
+                        count=int(initial_count),
+                    )
+                    for i, initial_count in enumerate(initial_counts)
+                    if i not in existing_indices
+                ]
+            )
+    except IntegrityError:
+        # another process created the counts first
+        pass
@@ -0,0 +1,95 @@
+"""Batched inserts of new objects.
+
+SQLAlchemy's unit of work inserts rows one at a time when it needs the database to
+generate each row's primary key. If the primary keys are already set, it batches the
+INSERTs for each table into a single ``executemany``. When a participant starts, their
+trees of pages, questions, and timers are new objects, so reserving their primary keys
+in bulk lets the first flush insert them one table at a time.
+
+Primary keys are reserved from the tables' sequences, so this only applies to
+databases with sequences (i.e., PostgreSQL). On other databases, the objects are
+inserted as usual.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.inspection import inspect
+from sqlalchemy.orm import Mapper, Session
+
+from .app import get_dialect_name
+
+SEQUENCE_DIALECTS = ("postgresql",)
+
+
+def reserve_primary_keys(session: Session, objects: Iterable[Any]) -> int:
+    """Set the primary keys of new objects using ids reserved from the database.
+
+    Args:
+        session (Session): Session in which the objects will be inserted.
+        objects (Iterable[Any]): New objects. Objects whose primary key is already set
+            are ignored.
+
+    Returns:
+        int: Number of objects whose primary key was set.
+    """
+    if get_dialect_name(session) not in SEQUENCE_DIALECTS:
+        return 0
+
+    # group the objects by the table that generates their primary key
+    # (the base table for polymorphic classes)
+    objects_by_mapper: Dict[Mapper, List[Any]] = defaultdict(list)
+    for obj in objects:
+        mapper = inspect(obj).mapper.base_mapper
+        if len(mapper.primary_key) == 1 and inspect(obj).identity is None:
+            key = mapper.get_property_by_column(mapper.primary_key[0]).key
+            if getattr(obj, key) is None:
+                objects_by_mapper[mapper].append(obj)
+
+    n_reserved = 0
+    for mapper, mapper_objects in objects_by_mapper.items():
+        column = mapper.primary_key[0]
+        with session.no_autoflush:
+            ids = _reserve_ids(
+                session, column.table.name, column.name, len(mapper_objects)
+            )
+        if ids is None:
+            continue
+
+        key = mapper.get_property_by_column(column).key
+        for obj, id_ in zip(mapper_objects, ids):
+            setattr(obj, key, id_)
+        n_reserved += len(mapper_objects)
+
+    return n_reserved
+
+
+def _reserve_ids(
+    session: Session, table_name: str, column_name: str, n: int
+) -> Optional[List[int]]:
+    """Reserve ids from the sequence of a table's primary key column.
+
+    Args:
+        session (Session): Session.
+        table_name (str): Name of the table.
+        column_name (str): Name of the primary key column.
+        n (int): Number of ids to reserve.
+
+    Returns:
+        Optional[List[int]]: Reserved ids, or None if the column has no sequence.
+    """
+    sequence = session.execute(
+        text("SELECT pg_get_serial_sequence(:table_name, :column_name)"),
+        {"table_name": table_name, "column_name": column_name},
+    ).scalar()
+    if sequence is None:
+        return None
+
+    return list(
+        session.execute(
+            text("SELECT nextval(:sequence) FROM generate_series(1, :n)"),
+            {"sequence": sequence, "n": n},
+        ).scalars()
+    )
@@ -0,0 +1,118 @@
+"""Incrementally cached data.
+"""
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING
+
+from .app import db
+
+if TYPE_CHECKING:  # pragma: no cover
+    from ._data_frame import DataFrame
+    from .page import Page
+    from .tree import Tree
+
+# number of digits used to encode each index in a page's sort key
+SORT_KEY_WIDTH = 5
+
+
+class CachedPageData(db.Model):  # type: ignore
+    """Data a user recorded on a single page.
+
+    Each time a user submits a page, the data for that page (but not for the pages on
+    its branch) are cached in a row belonging to the user. The user's data can then be
+    assembled from the cached rows without walking the user's trees.
+
+    Args:
+        page (Page): Page whose data should be cached.
+        sort_key (str): Key which orders the cached pages in the same order as
+            :meth:`hemlock._data_frame.DataFrame.add_branch` adds them.
+
+    Attributes:
+        user (User): User to whom the data belong.
+        sort_key (str): Key which orders the cached pages.
+        data (str): JSON-encoded list of ``[data, fill_rows]`` items, in the order
+            they are added to the data frame.
+    """
+
+    id = db.Column(db.Integer, primary_key=True)
+    _user_id = db.Column(db.Integer, db.ForeignKey("user.id"), index=True)
+    _page_id = db.Column(db.Integer, db.ForeignKey("page.id"), index=True)
+    sort_key = db.Column(db.String)
+    data = db.Column(db.Text)
+
+    def __init__(self, page: Page, sort_key: str):
+        self._page_id = page.id
+        self.sort_key = sort_key
+        self.set_data(page)
+
+    def set_data(self, page: Page) -> None:
+        """Cache the data from a given page.
+
+        Args:
+            page (Page): Page.
+        """
+        data_items = [page.timer] + page.data + page.questions
+        self.data = json.dumps(
+            [
+                [item.pack_data(), item.fill_rows]
+                for item in data_items
+                if item.variable
+            ],
+            default=str,
+        )
+
+    def add_to(self, df: DataFrame) -> None:
+        """Add the cached data to a data frame.
+
+        Args:
+            df (DataFrame): Data frame.
+        """
+        for data, fill_rows in json.loads(self.data):
+            df.add_data(data, fill_rows)
+
+
+def make_sort_key(tree: Tree, page: Page) -> str:
+    """Make a key which sorts pages in the order their data are added to a data frame.
+
+    Args:
+        tree (Tree): Tree to which the page belongs.
+        page (Page): Page.
+
+    Returns:
+        str: Sort key. Keys of pages on a page's branch start with that page's key.
+    """
+    indices = [tree.index] + [int(index) for index in page.get_position().split(".")]
+    return ".".join([str(index).zfill(SORT_KEY_WIDTH) for index in indices])
+
+
+def cache_page_data(tree: Tree, page: Page) -> None:
+    """Cache the data from a page a user just submitted.
+
+    If the page creates a new branch when submitted, any cached data from the page's
+    previous branch are removed.
+
+    Args:
+        tree (Tree): Tree to which the page belongs.
+        page (Page): Submitted page.
+    """
+    user = tree.user
+    if user is None or page.id is None:
+        return
+
+    sort_key = make_sort_key(tree, page)
+    query = CachedPageData.query.filter(CachedPageData._user_id == user.id)
+    if page.navigate is not None:
+        query.filter(CachedPageData.sort_key.like(f"{sort_key}.%")).delete(
+            synchronize_session="fetch"
+        )
+        # the user's collection of cached pages may have been loaded before the delete
+        db.session.expire(user, ["_cached_page_data"])
+
+    cached_page = query.filter(CachedPageData._page_id == page.id).first()
+    if cached_page is None:
+        cached_page = CachedPageData(page, sort_key)
+        cached_page.user = user
+    else:
+        cached_page.sort_key = sort_key
+        cached_page.set_data(page)
@@ -1,10 +1,15 @@
 from __future__ import annotations
 
-from typing import Any, Mapping
+import json
+import pickle
+from typing import Any, Mapping, Optional
 
+from sqlalchemy import types
 from sqlalchemy_mutable import Mutable, MutableDict, MutableList as MutableListBase
 from sqlalchemy_mutable.types import MutableJSONType, MutablePickleType
-from sqlalchemy_mutable.utils import is_instance
+from sqlalchemy_mutable.utils import get_object, is_instance, partial
+
+from .functional.base import get_registered_function, get_registered_name
 
 
 class MutableList(MutableListBase):
@@ -30,6 +35,107 @@ class MutableListPickleType(MutablePickleType):
 MutableList.associate_with(MutableListPickleType)
 
 
+class MutableFunctionType(types.TypeDecorator):
+    """Mutable type for functions and lists of functions.
+
+    Functions registered with :meth:`hemlock.functional.Functional.register` whose
+    arguments are JSON serializable are stored as JSON references to the registered
+    function. These are much smaller and faster to load than pickled functions, which
+    store a copy of the function and its arguments in every row. Other values are
+    pickled, and pickled values written by ``MutablePickleType`` can still be read.
+    """
+
+    impl = types.LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: Any, dialect: Any) -> Optional[bytes]:
+        if value is None:
+            return None
+
+        obj = get_object(value)
+        try:
+            if is_instance(obj, list):
+                references = [_make_function_reference(item) for item in obj]
+            else:
+                references = _make_function_reference(obj)
+        except ValueError:
+            return pickle.dumps(value)
+
+        return json.dumps(references, separators=(",", ":")).encode()
+
+    def process_result_value(self, value: Optional[bytes], dialect: Any) -> Any:
+        if value is None:
+            return None
+
+        value = bytes(value)
+        if value.startswith(pickle.PROTO):
+            return pickle.loads(value)
+
+        references = json.loads(value)
+        if is_instance(references, list):
+            return [_resolve_function_reference(item) for item in references]
+        return _resolve_function_reference(references)
+
+
+Mutable.associate_with(MutableFunctionType)
+
+
+class MutableListFunctionType(MutableFunctionType):
+    pass
+
+
+MutableList.associate_with(MutableListFunctionType)
+
+
+def _make_function_reference(obj: Any) -> dict:
+    """Make a JSON reference to a registered function.
+
+    Args:
+        obj (Any): Registered function or partial of a registered function.
+
+    Raises:
+        ValueError: If the object can't be stored as a reference.
+
+    Returns:
+        dict: Reference.
+    """
+    if is_instance(obj, partial):
+        args, kwargs = obj._get_args()
+        args, kwargs = list(get_object(args)), get_object(kwargs)
+        name = get_registered_name(obj.func)
+        try:
+            # the arguments must be unchanged by a JSON round trip (e.g., tuples
+            # would be loaded as lists)
+            if json.loads(json.dumps([args, kwargs])) != [args, kwargs]:
+                name = None
+        except (TypeError, ValueError):
+            name = None
+
+        if name is None:
+            raise ValueError("Only partials of registered functions are references.")
+        return {"func": name, "args": args, "kwargs": kwargs}
+
+    name = get_registered_name(obj) if callable(obj) else None
+    if name is None:
+        raise ValueError("Only registered functions are references.")
+    return {"func": name}
+
+
+def _resolve_function_reference(reference: dict) -> Any:
+    """Get the registered function or partial a reference points to.
+
+    Args:
+        reference (dict): Reference made by :func:`_make_function_reference`.
+
+    Returns:
+        Any: Registered function or partial.
+    """
+    func = get_registered_function(reference["func"])
+    if "args" not in reference:
+        return func
+    return partial(func, *reference["args"], **reference["kwargs"])
+
+
 class MutableChoiceList(MutableList):
     def _convert_item(self, item: Any, root: Mutable = None) -> MutableDict:
         """Convert a choice item to a dictionary.
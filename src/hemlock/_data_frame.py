@@ -2,20 +2,56 @@
 """
 from __future__ import annotations
 
+import numbers
 from collections import defaultdict
+from collections.abc import Mapping as MappingABC
 from datetime import datetime
-from typing import TYPE_CHECKING, Any, List, Mapping
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Mapping, Optional, Sequence
+
+import numpy as np
 
 if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
+
     from .page import Page
 
 from sqlalchemy_mutable.utils import is_instance
 
 
-class DataFrame(defaultdict):
+class PageDataMixin:
+    """Mixin for data frames to which page data can be added.
+
+    Subclasses must implement ``add_data``.
+    """
+
+    def add_branch(self, branch: List["Page"]) -> None:
+        """Add data from a given branch to the data frame.
+
+        Args:
+            branch (List[Page]): Branch.
+        """
+        for page in branch:
+            self.add_page(page)
+
+    def add_page(self, page: "Page") -> None:
+        """Add data from a given page to the data frame.
+
+        Args:
+            page (Page): Page.
+        """
+        data_items = [page.timer] + page.data + page.questions
+        for item in data_items:
+            if item.variable:
+                self.add_data(item.pack_data(), item.fill_rows)
+        if page.branch:
+            self.add_branch(page.branch)
+
+
+class DataFrame(PageDataMixin, defaultdict):
     """Data frame.
 
-    Subclasses :class:`defaultdict`.
+    Subclasses :class:`PageDataMixin` and :class:`defaultdict`.
 
     Args:
         data (Mapping, optional): Data contained in the dataframe. Defaults to None.
@@ -49,28 +85,6 @@ class DataFrame(defaultdict):
     def __setitem__(self, key, value):
         return super().__setitem__(key, Variable(value))
 
-    def add_branch(self, branch: List["Page"]) -> None:
-        """Add data from a given branch to the data frame.
-
-        Args:
-            branch (List[Page]): Branch.
-        """
-        for page in branch:
-            self.add_page(page)
-
-    def add_page(self, page: "Page") -> None:
-        """Add data from a given page to the data frame.
-
-        Args:
-            page (Page): Page.
-        """
-        data_items = [page.timer] + page.data + page.questions
-        for item in data_items:
-            if item.variable:
-                self.add_data(item.pack_data(), item.fill_rows)
-        if page.branch:
-            self.add_branch(page.branch)
-
     def add_data(self, data: Mapping[Any, Any], fill_rows: bool = False) -> None:
         """Add data from a mapping to the data frame.
 
@@ -149,3 +163,448 @@ class Variable(list):
             )
         padding_data = self[-1] if self.fill_rows and len(self) > 0 else None
         self += n_additional_rows * [padding_data]
+
+
+class ColumnDataFrame(PageDataMixin, MappingABC):
+    """Column-oriented data frame.
+
+    Subclasses :class:`PageDataMixin` and :class:`collections.abc.Mapping`.
+
+    Columns are :class:`ArrayVariable` objects backed by typed numpy arrays. The data
+    frame keeps track of its number of rows, so padding it takes constant time. Padding
+    is applied to each column the next time the column is accessed.
+
+    Args:
+        data (Mapping, optional): Data contained in the dataframe. Defaults to None.
+        fill_rows (bool, optional): Indicates that rows should be filled. Defaults to
+            False.
+
+    Notes:
+
+        Use this instead of :class:`DataFrame` to merge many data frames, such as the
+        data for all users.
+
+        .. doctest::
+
+            >>> from hemlock._data_frame import ColumnDataFrame
+            >>> df = ColumnDataFrame({"variable": 0})
+            >>> df.add_data({"other_variable": [1, 2]})
+            >>> df.pad()
+            >>> df.n_rows
+            2
+            >>> df.to_pandas()
+               variable  other_variable
+            0       0.0               1
+            1       NaN               2
+    """
+
+    def __init__(self, data: Mapping = None, fill_rows: bool = False):
+        self._variables: Dict[Any, ArrayVariable] = {}
+        self._n_rows = 0
+        self._pad_to_row = 0
+        self._n_pads = 0
+        if data is not None:
+            self.add_data(data, fill_rows)
+
+    def __getitem__(self, key: Any) -> ArrayVariable:
+        variable = self._variables[key]
+        self._apply_padding(variable)
+        return variable
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._variables)
+
+    def __len__(self) -> int:
+        return len(self._variables)
+
+    @property
+    def n_rows(self) -> int:
+        """Number of rows in the longest column.
+
+        Returns:
+            int: Number of rows.
+        """
+        return self._n_rows
+
+    def add_data(self, data: Mapping[Any, Any], fill_rows: bool = False) -> None:
+        """Add data from a mapping to the data frame.
+
+        Args:
+            data (Mapping[Any, Any]): Data.
+            fill_rows (bool, optional): Indicates that rows should be filled. Defaults
+                to False.
+        """
+        if not is_instance(data, dict):
+            data = dict(data)
+        pad_to_row = max([self._get_length(key) for key in data.keys()], default=0)
+        for key, item in data.items():
+            if key in self._variables:
+                variable = self[key]
+            else:
+                variable = self._variables[key] = ArrayVariable()
+                variable._n_pads = self._n_pads
+            variable.add_data(item, fill_rows, pad_to_row)
+            self._n_rows = max(self._n_rows, len(variable))
+
+    def pad(self, min_rows: int = None) -> None:
+        """Pad the data frame so that all variables have the same number of rows.
+
+        Args:
+            min_rows (int, optional): Minimum number of rows to pad the variables to.
+                Defaults to None.
+        """
+        if self._variables:
+            if min_rows is not None:
+                self._n_rows = max(min_rows, self._n_rows)
+            self._pad_to_row = self._n_rows
+            self._n_pads += 1
+
+    def to_pandas(self) -> pd.DataFrame:
+        """Convert to a pandas dataframe.
+
+        The dataframe's columns are views of the variables' arrays.
+
+        Returns:
+            pd.DataFrame: Dataframe.
+        """
+        import pandas as pd
+
+        self.pad()
+        return pd.DataFrame(
+            {key: variable.to_numpy() for key, variable in self.items()}, copy=False
+        )
+
+    def to_arrow(self, timestamp_columns: Sequence[Any] = ()) -> pa.Table:
+        """Convert to an arrow table.
+
+        Requires ``pyarrow``, which is installed with ``pip install
+        hemlock-survey[arrow]``.
+
+        Args:
+            timestamp_columns (Sequence[Any], optional): Names of variables containing
+                datetimes that were converted to strings. These are converted back to
+                timestamps. Defaults to ().
+
+        Returns:
+            pa.Table: Table with one typed column per variable.
+        """
+        pa = _import_pyarrow()
+        import pyarrow.compute as pc
+
+        self.pad()
+        columns = {str(key): variable.to_arrow() for key, variable in self.items()}
+        for key in timestamp_columns:
+            if str(key) in columns:
+                columns[str(key)] = pc.cast(columns[str(key)], pa.timestamp("us"))
+
+        return pa.table(columns)
+
+    def _get_length(self, key: Any) -> int:
+        """Get the length a variable will have after it is padded.
+
+        Args:
+            key (Any): Variable name.
+
+        Returns:
+            int: Length.
+        """
+        if (variable := self._variables.get(key)) is None:
+            return 0
+
+        if variable._n_pads < self._n_pads:
+            return max(len(variable), self._pad_to_row)
+
+        return len(variable)
+
+    def _apply_padding(self, variable: ArrayVariable) -> None:
+        """Pad a variable if the data frame was padded since the variable was last
+        accessed.
+
+        Args:
+            variable (ArrayVariable): Variable.
+        """
+        if variable._n_pads < self._n_pads:
+            if len(variable) < self._pad_to_row:
+                variable.pad(self._pad_to_row)
+            variable._n_pads = self._n_pads
+
+
+def _import_pyarrow() -> Any:
+    """Import pyarrow, which is an optional dependency.
+
+    Raises:
+        ImportError: If pyarrow is not installed.
+
+    Returns:
+        Any: The ``pyarrow`` module.
+    """
+    try:
+        import pyarrow
+    except ImportError as error:
+        raise ImportError(
+            "Exporting data to arrow requires pyarrow."
+            " Install it with `pip install hemlock-survey[arrow]`."
+        ) from error
+
+    return pyarrow
+
+
+def _get_kind(item: Any) -> Optional[str]:
+    """Get the kind of data of an item.
+
+    Args:
+        item (Any): Item.
+
+    Returns:
+        Optional[str]: "bool", "int", "float", or "object". None if the item is
+        missing.
+    """
+    if item is None:
+        return None
+    if isinstance(item, (bool, np.bool_)):
+        return "bool"
+    if isinstance(item, numbers.Integral):
+        return "int"
+    if isinstance(item, numbers.Real):
+        return "float"
+    return "object"
+
+
+def _combine_kinds(kind: Optional[str], other_kind: Optional[str]) -> Optional[str]:
+    """Get the kind of data of a column containing items of two kinds.
+
+    Args:
+        kind (Optional[str]): Kind.
+        other_kind (Optional[str]): Other kind.
+
+    Returns:
+        Optional[str]: Combined kind.
+    """
+    if kind is None or kind == other_kind:
+        return other_kind
+    if other_kind is None:
+        return kind
+    if {kind, other_kind} == {"int", "float"}:
+        return "float"
+    return "object"
+
+
+def _get_dtype(kind: Optional[str], has_missing: bool) -> np.dtype:
+    """Get the dtype pandas would use for a column.
+
+    Args:
+        kind (Optional[str]): Kind of data in the column.
+        has_missing (bool): Indicates that the column has missing values.
+
+    Returns:
+        np.dtype: Dtype.
+    """
+    if kind == "float" or (kind == "int" and has_missing):
+        return np.dtype(np.float64)
+    if kind == "int":
+        return np.dtype(np.int64)
+    if kind == "bool" and not has_missing:
+        return np.dtype(bool)
+    return np.dtype(object)
+
+
+class ArrayVariable:
+    """Stores the data for one variable (column) of the :class:`ColumnDataFrame`.
+
+    The data are stored in a numpy array which grows geometrically. The array's dtype
+    is the dtype pandas would infer for the data, so missing values are stored as NaN
+    in numeric columns and None otherwise.
+
+    Args:
+        data (Any, optional): Data in the column. Defaults to None.
+
+    Attributes:
+        fill_rows (bool): Indicates that rows should be filled.
+    """
+
+    def __init__(self, data: Any = None):
+        self._values = np.empty(0, dtype=object)
+        self._length = 0
+        self._kind: Optional[str] = None
+        self._has_missing = False
+        self._n_pads = 0
+        self.fill_rows = False
+        if data is not None:
+            self.add_data(data)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.tolist())
+
+    def __getitem__(self, index: Any) -> Any:
+        return self.to_numpy()[index]
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__qualname__} {self.to_numpy()!r}>"
+
+    @property
+    def dtype(self) -> np.dtype:
+        """Dtype of the column.
+
+        Returns:
+            np.dtype: Dtype.
+        """
+        return self._values.dtype
+
+    def to_numpy(self) -> np.ndarray:
+        """Get the column's data without copying them.
+
+        Returns:
+            np.ndarray: View of the column's data.
+        """
+        return self._values[: self._length]
+
+    def to_arrow(self) -> pa.Array:
+        """Convert the column to an arrow array.
+
+        Missing values become nulls. Columns with items of incompatible types are
+        converted to strings.
+
+        Returns:
+            pa.Array: Arrow array.
+        """
+        pa = _import_pyarrow()
+        values = self.to_numpy()
+        try:
+            return pa.array(values, from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            return pa.array(
+                [None if item is None else str(item) for item in values],
+                type=pa.string(),
+            )
+
+    def tolist(self) -> List[Any]:
+        """Get the column's data as a list.
+
+        Returns:
+            List[Any]: Data.
+        """
+        return self.to_numpy().tolist()
+
+    def add_data(
+        self, data: Any, fill_rows: bool = False, pad_to_row: int = None
+    ) -> None:
+        """Add data to this column.
+
+        Args:
+            data (Any): Data to add.
+            fill_rows (bool, optional): Indicates that rows should be filled. Defaults
+                to False.
+            pad_to_row (int, optional): If not None, pad the data to this number of
+                rows before inserting new data. Defaults to None.
+        """
+        if pad_to_row is not None:
+            self.pad(pad_to_row)
+
+        if isinstance(data, ArrayVariable):
+            data = data.tolist()
+        elif not is_instance(data, list):
+            data = [data]
+        self._append(
+            [str(item) if isinstance(item, datetime) else item for item in data]
+        )
+
+        self.fill_rows = fill_rows
+
+    def pad(self, pad_to_row: int) -> None:
+        """Pad the column to a given length.
+
+        Args:
+            pad_to_row (int): Length of the column after padding.
+
+        Raises:
+            ValueError: ``pad_to_row`` must be at least the current column length.
+        """
+        if pad_to_row < self._length:
+            raise ValueError(
+                f"Attempted to pad variable in {pad_to_row} but the variable has {self._length} rows already."
+            )
+        if pad_to_row == self._length:
+            return
+
+        if not (self.fill_rows and self._length > 0):
+            self._set_kind(self._kind, has_missing=True)
+        self._reserve(pad_to_row)
+        if self.fill_rows and self._length > 0:
+            padding_data = self._values[self._length - 1]
+        else:
+            padding_data = np.nan if self.dtype.kind == "f" else None
+        self._values[self._length : pad_to_row].fill(padding_data)
+        self._length = pad_to_row
+
+    def _append(self, items: List[Any]) -> None:
+        """Append items to the column, converting its dtype if needed.
+
+        Args:
+            items (List[Any]): Items.
+        """
+        kind, has_missing = self._kind, self._has_missing
+        for item in items:
+            if (item_kind := _get_kind(item)) is None:
+                has_missing = True
+            else:
+                kind = _combine_kinds(kind, item_kind)
+
+        self._set_kind(kind, has_missing)
+        self._reserve(self._length + len(items))
+        stop = self._length + len(items)
+        if self.dtype.kind == "f":
+            self._values[self._length : stop] = [
+                np.nan if item is None else item for item in items
+            ]
+        elif self.dtype == object:
+            # assign items one at a time so list items are not broadcast
+            for i, item in enumerate(items, start=self._length):
+                self._values[i] = item
+        else:
+            try:
+                self._values[self._length : stop] = items
+            except OverflowError:
+                # integers too large for int64 are stored as objects
+                self._set_kind("object", has_missing)
+                return self._append(items)
+        self._length = stop
+
+    def _set_kind(self, kind: Optional[str], has_missing: bool) -> None:
+        """Set the kind of data in the column and convert the array's dtype.
+
+        Args:
+            kind (Optional[str]): Kind of data.
+            has_missing (bool): Indicates that the column has missing values.
+        """
+        self._kind, self._has_missing = kind, has_missing
+        dtype = _get_dtype(kind, has_missing)
+        if dtype == self.dtype:
+            return
+
+        values = self.to_numpy()
+        if dtype == object:
+            converted_values = values.astype(object)
+            if values.dtype.kind == "f":
+                converted_values[np.isnan(values)] = None
+        elif values.dtype == object:
+            # the column only contains missing values
+            converted_values = np.full(self._length, np.nan, dtype=dtype)
+        else:
+            converted_values = values.astype(dtype)
+        self._values = converted_values
+
+    def _reserve(self, capacity: int) -> None:
+        """Grow the array so it can hold at least a given number of items.
+
+        Args:
+            capacity (int): Minimum capacity.
+        """
+        if capacity <= len(self._values):
+            return
+
+        values = np.empty(max(capacity, 2 * len(self._values), 8), dtype=self.dtype)
+        values[: self._length] = self.to_numpy()
+        self._values = values
@@ -0,0 +1,198 @@
+"""HTML settings shared with class-level defaults.
+
+Pages and questions have default HTML settings (e.g., the page's CSS and javascript)
+which are the same for almost every row. Rather than storing a copy of the defaults in
+every row, rows store only the settings that differ from the defaults. A setting is
+copied from the defaults the first time it's accessed for modification.
+"""
+from __future__ import annotations
+
+import copy
+from typing import Any, Dict, Iterator, List, Mapping
+
+from sqlalchemy_mutable import Mutable
+from sqlalchemy_mutable.html import (
+    HTMLAttrs,
+    HTMLSettingType,
+    HTMLSettings,
+    _MutableHTMLSettings,
+)
+from sqlalchemy_mutable.types import MutableJSONType
+from sqlalchemy_mutable.utils import is_instance
+
+LIST_SETTINGS = ("css", "js")
+
+
+class HTMLSettingsOverrides(HTMLSettings):
+    """HTML settings which differ from the defaults.
+
+    Unlike :class:`sqlalchemy_mutable.html.HTMLSettings`, missing ``"css"`` and
+    ``"js"`` keys are not filled in, so they fall back to the defaults.
+    """
+
+    def __init__(self, settings: Mapping[str, HTMLSettingType]):
+        settings = dict(settings)
+        for name, value in settings.items():
+            if name in LIST_SETTINGS:
+                if not is_instance(value, list):
+                    settings[name] = [value]
+            else:
+                settings[name] = HTMLAttrs(value)
+
+        dict.__init__(self, settings)
+
+
+@Mutable.register_class(HTMLSettingsOverrides)
+class _MutableHTMLSettingsOverrides(_MutableHTMLSettings):
+    def convert_object(self, obj: Mapping, root: Mutable) -> HTMLSettingsOverrides:
+        obj = HTMLSettingsOverrides({} if obj is None else obj)
+        for key, item in obj.items():
+            obj[key] = self._convert_item(item, root)
+        return obj
+
+
+class HTMLSettingsOverridesType(MutableJSONType):
+    pass
+
+
+_MutableHTMLSettingsOverrides.associate_with(HTMLSettingsOverridesType)
+
+
+class SharedHTMLSettings:
+    """HTML settings of a page or question, backed by its class-level defaults.
+
+    This behaves like :class:`sqlalchemy_mutable.html.HTMLSettings`. Getting a setting
+    with ``settings[key]`` copies it from the defaults into the object's overrides, so
+    it can be modified. Use :meth:`get`, :meth:`get_attrs`, :meth:`get_css`, and
+    :meth:`get_js` to read settings without copying them.
+
+    Args:
+        obj (Any): Page or question. Its overrides are stored in ``_html_settings``.
+    """
+
+    def __init__(self, obj: Any):
+        self._obj = obj
+
+    @property
+    def defaults(self) -> Dict[str, HTMLSettingType]:
+        return self._obj.defaults["html_settings"]
+
+    @property
+    def overrides(self) -> _MutableHTMLSettingsOverrides:
+        if self._obj._html_settings is None:
+            self._obj._html_settings = {}
+        return self._obj._html_settings
+
+    @property
+    def _default_keys(self) -> List[str]:
+        # like sqlalchemy_mutable's HTMLSettings, "css" and "js" are always present
+        defaults = self.defaults
+        return list(defaults) + [key for key in LIST_SETTINGS if key not in defaults]
+
+    def _get_default(self, key: str) -> HTMLSettingType:
+        if key in LIST_SETTINGS:
+            return self.defaults.get(key, [])
+        return self.defaults[key]
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, SharedHTMLSettings):
+            other = other.to_dict()
+        return self.to_dict() == other
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._default_keys or key in self.overrides
+
+    def __iter__(self) -> Iterator[str]:
+        default_keys = self._default_keys
+        yield from default_keys
+        yield from (key for key in self.overrides if key not in default_keys)
+
+    def __len__(self) -> int:
+        return len(list(iter(self)))
+
+    def keys(self) -> Iterator[str]:
+        return iter(self)
+
+    def items(self) -> Iterator:
+        return ((key, self.get(key)) for key in self)
+
+    def __getitem__(self, key: str) -> Any:
+        overrides = self.overrides
+        if key not in overrides:
+            overrides[key] = copy.deepcopy(self._get_default(key))
+        return overrides[key]
+
+    def __setitem__(self, key: str, value: HTMLSettingType) -> None:
+        if key in LIST_SETTINGS and not is_instance(value, list):
+            value = [value]
+        self.overrides[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        # reverts the setting to its default
+        del self.overrides[key]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a setting without copying it from the defaults.
+
+        The returned value may be shared with other objects and should not be
+        modified.
+
+        Args:
+            key (str): Setting key.
+            default (Any, optional): Returned if the setting doesn't exist. Defaults
+                to None.
+
+        Returns:
+            Any: Setting value.
+        """
+        overrides = self._obj._html_settings
+        if overrides is not None and key in overrides:
+            return overrides[key]
+
+        if key not in self._default_keys:
+            return default
+
+        value = self._get_default(key)
+        if key in LIST_SETTINGS:
+            return value if is_instance(value, list) else [value]
+        return HTMLAttrs(value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the settings, merged with the defaults.
+
+        Returns:
+            Dict[str, Any]: Settings.
+        """
+        return dict(self.items())
+
+    def update_settings(self, settings: Mapping[str, HTMLSettingType]) -> None:
+        """See :meth:`sqlalchemy_mutable.html.HTMLSettings.update_settings`."""
+        for name, value in dict(settings).items():
+            if name in LIST_SETTINGS:
+                self[name] += value if is_instance(value, list) else [value]
+            elif name not in self:
+                self[name] = value
+            else:
+                self[name].update_attrs(value)
+
+    def get_attrs(self, key: str) -> str:
+        """Get a tag's attributes as an HTML string.
+
+        Args:
+            key (str): Tag name, e.g., "input".
+
+        Returns:
+            str: Tag attributes as HTML.
+        """
+        return self.get(key, HTMLAttrs()).get_attrs()
+
+    def get_css(self) -> str:
+        """See :meth:`sqlalchemy_mutable.html.HTMLSettings.get_css`."""
+        return HTMLSettings({"css": self.get("css", [])}).get_css()
+
+    def get_js(self) -> str:
+        """See :meth:`sqlalchemy_mutable.html.HTMLSettings.get_js`."""
+        return HTMLSettings({"js": self.get("js", [])}).get_js()
@@ -0,0 +1,234 @@
+"""Columns and indexes for existing databases.
+
+``db.create_all`` creates the columns and indexes declared on the models when it
+creates their tables, but it skips tables which already exist. Databases created by
+earlier versions of hemlock therefore lack columns and indexes declared since, and the
+app can't query them until they're added. This module adds them.
+
+Building an index on a large table takes a while, so run this once per deployment
+rather than when each worker starts::
+
+    $ flask hemlock create-missing-indexes
+"""
+from __future__ import annotations
+
+from typing import List, Set
+
+import click
+from sqlalchemy import Column, Index, inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateColumn
+
+from .app import bp, db
+
+
+def get_missing_columns(engine: Engine) -> List[Column]:
+    """Get the columns declared on the models which don't exist in the database.
+
+    Args:
+        engine (Engine): Database engine.
+
+    Returns:
+        List[Column]: Missing columns of existing tables.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    missing_columns = []
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+
+        existing_columns = {
+            column["name"] for column in inspector.get_columns(table.name)
+        }
+        missing_columns += [
+            column for column in table.columns if column.name not in existing_columns
+        ]
+
+    return missing_columns
+
+
+def add_missing_columns(engine: Engine = None) -> List[str]:
+    """Add the columns declared on the models which don't exist in the database.
+
+    Rows which already exist get null values for the new columns.
+
+    Args:
+        engine (Engine, optional): Database engine. Defaults to ``db.engine``.
+
+    Raises:
+        ValueError: If a missing column can't be null and has no default, so it can't
+            be added to a table with rows.
+
+    Returns:
+        List[str]: Names of the columns added, in the form "table.column".
+
+    Examples:
+
+        .. code-block::
+
+            >>> from hemlock import create_test_app
+            >>> from hemlock._indexes import add_missing_columns
+            >>> app = create_test_app()
+            >>> add_missing_columns()
+            []
+    """
+    engine = engine or db.engine
+    missing_columns = get_missing_columns(engine)
+    preparer = engine.dialect.identifier_preparer
+    with engine.begin() as connection:
+        for column in missing_columns:
+            if not column.nullable and column.server_default is None:
+                raise ValueError(
+                    f"Can't add column {column.table.name}.{column.name} because it"
+                    " can't be null and has no server default."
+                )
+
+            specification = str(CreateColumn(column).compile(dialect=engine.dialect))
+            for foreign_key in column.foreign_keys:
+                specification += (
+                    f" REFERENCES {preparer.format_table(foreign_key.column.table)}"
+                    f" ({preparer.format_column(foreign_key.column)})"
+                )
+            connection.execute(
+                text(
+                    f"ALTER TABLE {preparer.format_table(column.table)}"
+                    f" ADD COLUMN {specification}"
+                )
+            )
+
+    return [f"{column.table.name}.{column.name}" for column in missing_columns]
+
+
+def get_missing_indexes(engine: Engine) -> List[Index]:
+    """Get the indexes declared on the models which don't exist in the database.
+
+    Args:
+        engine (Engine): Database engine.
+
+    Returns:
+        List[Index]: Missing indexes of existing tables.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    with engine.connect() as connection:
+        invalid_indexes = get_invalid_index_names(connection)
+    missing_indexes = []
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+
+        existing_indexes = {
+            index["name"] for index in inspector.get_indexes(table.name)
+        } - invalid_indexes
+        missing_indexes += [
+            index for index in table.indexes if index.name not in existing_indexes
+        ]
+
+    return sorted(missing_indexes, key=lambda index: index.name)
+
+
+def get_invalid_index_names(connection: Connection) -> Set[str]:
+    """Get the names of invalid indexes.
+
+    A PostgreSQL index is left invalid when building it concurrently fails. The
+    index exists but isn't used, so it needs to be dropped and rebuilt.
+
+    Args:
+        connection (Connection): Database connection.
+
+    Returns:
+        Set[str]: Names of the invalid indexes. Empty on databases other than
+            PostgreSQL.
+    """
+    if connection.dialect.name != "postgresql":
+        return set()
+
+    return set(
+        connection.execute(
+            text(
+                "SELECT index_class.relname FROM pg_index"
+                " JOIN pg_class index_class ON index_class.oid = pg_index.indexrelid"
+                " WHERE NOT pg_index.indisvalid"
+            )
+        ).scalars()
+    )
+
+
+def create_missing_indexes(
+    engine: Engine = None, concurrently: bool = True
+) -> List[str]:
+    """Create the indexes declared on the models which don't exist in the database.
+
+    The indexes may cover columns declared since the database was created, so missing
+    columns are added first (see :func:`add_missing_columns`).
+
+    Creating an index on a large table takes a while. On PostgreSQL, the indexes are
+    built concurrently by default, so participants can keep writing to the tables
+    while they're built, and invalid indexes left by failed concurrent builds are
+    rebuilt. Other databases lock each table while its index is built.
+
+    Args:
+        engine (Engine, optional): Database engine. Defaults to ``db.engine``.
+        concurrently (bool, optional): Build the indexes without locking the tables
+            against writes (PostgreSQL only). Defaults to True.
+
+    Returns:
+        List[str]: Names of the indexes created.
+
+    Examples:
+
+        .. code-block::
+
+            >>> from hemlock import create_test_app
+            >>> from hemlock._indexes import create_missing_indexes
+            >>> app = create_test_app()
+            >>> create_missing_indexes()
+            []
+    """
+    engine = engine or db.engine
+    add_missing_columns(engine)
+    missing_indexes = get_missing_indexes(engine)
+    if not missing_indexes:
+        return []
+
+    if not (concurrently and engine.dialect.name == "postgresql"):
+        with engine.begin() as connection:
+            invalid_indexes = get_invalid_index_names(connection)
+            for index in missing_indexes:
+                if index.name in invalid_indexes:
+                    connection.execute(text(f'DROP INDEX IF EXISTS "{index.name}"'))
+                index.create(connection, checkfirst=True)
+        return [index.name for index in missing_indexes]
+
+    # PostgreSQL can't build indexes concurrently inside a transaction
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        invalid_indexes = get_invalid_index_names(connection)
+        for index in missing_indexes:
+            if index.name in invalid_indexes:
+                connection.execute(
+                    text(f'DROP INDEX CONCURRENTLY IF EXISTS "{index.name}"')
+                )
+            index.dialect_kwargs["postgresql_concurrently"] = True
+            try:
+                index.create(connection, checkfirst=True)
+            finally:
+                del index.dialect_kwargs["postgresql_concurrently"]
+
+    return [index.name for index in missing_indexes]
+
+
+@bp.cli.command("create-missing-indexes")
+@click.option(
+    "--concurrently/--no-concurrently",
+    default=True,
+    help="Build the indexes without locking the tables against writes (PostgreSQL).",
+)
+def create_missing_indexes_command(concurrently: bool) -> None:
+    """Add the columns and create the indexes declared on the models which don't exist
+    in the database."""
+    db.create_all()
+    for name in add_missing_columns():
+        click.echo(f"Added column {name}")
+    for name in create_missing_indexes(concurrently=concurrently):
+        click.echo(f"Created index {name}")
@@ -0,0 +1,229 @@
+"""Load testing.
+
+Runs simulated participants through a study concurrently, each in a worker process
+with its own copy of the application, and measures how long the application takes to
+respond to their requests.
+"""
+
+from __future__ import annotations
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from flask import Flask
+
+from .app import create_app, db
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from .user import User
+
+# (page position, seconds, error)
+RecordType = Tuple[str, float, bool]
+
+FIRST_REQUEST_POSITION = "start"
+PERCENTILES = (50, 95, 99)
+
+# application used by the participants in this worker process
+_worker_app: Optional[Flask] = None
+
+
+class LoadTestResults:
+    """Results of a load test.
+
+    Args:
+        records (List[RecordType]): One record per request of the form
+            ``(page position, seconds, error)``. The position is the position of the
+            page the participant submitted, or ``"start"`` for the request that created
+            the participant.
+        duration (float): Wall-clock duration of the load test in seconds.
+        n_users (int): Number of simulated participants.
+
+    Attributes:
+        records (List[RecordType]): Request records.
+        duration (float): Wall-clock duration of the load test in seconds.
+        n_users (int): Number of simulated participants.
+    """
+
+    def __init__(self, records: List[RecordType], duration: float, n_users: int):
+        self.records = records
+        self.duration = duration
+        self.n_users = n_users
+
+    def __repr__(self):
+        return (
+            f"<{self.__class__.__qualname__} users: {self.n_users},"
+            f" requests: {self.n_requests}, errors: {self.n_errors},"
+            f" throughput: {self.throughput:.1f} requests/s>"
+        )
+
+    @property
+    def n_requests(self) -> int:
+        """Number of requests.
+
+        Returns:
+            int: Number of requests.
+        """
+        return len(self.records)
+
+    @property
+    def n_errors(self) -> int:
+        """Number of requests that raised an error or returned an error status code.
+
+        Returns:
+            int: Number of errors.
+        """
+        return sum(error for _, _, error in self.records)
+
+    @property
+    def throughput(self) -> float:
+        """Requests per second.
+
+        Returns:
+            float: Throughput.
+        """
+        return self.n_requests / self.duration if self.duration else 0.0
+
+    def summarize(self) -> pd.DataFrame:
+        """Summarize request latencies by page position.
+
+        Returns:
+            pd.DataFrame: Number of requests, number of errors, and the 50th, 95th,
+                and 99th percentile latencies (in seconds) for each page position.
+        """
+        import pandas as pd
+
+        columns = ["requests", "errors"] + [f"p{q}" for q in PERCENTILES]
+        records = pd.DataFrame(self.records, columns=["position", "seconds", "error"])
+        rows = {}
+        for position, group in records.groupby("position", sort=False):
+            rows[position] = [len(group), int(group.error.sum())] + list(
+                np.percentile(group.seconds, PERCENTILES)
+            )
+
+        return pd.DataFrame.from_dict(rows, orient="index", columns=columns)
+
+
+def run_load_test(
+    n_users: int,
+    n_workers: int = None,
+    app_factory: Callable[[], Flask] = create_app,
+    url_rule: str = None,
+    max_page_visits: int = 10,
+) -> LoadTestResults:
+    """Run simulated participants through a study concurrently.
+
+    Each worker process creates its own application with ``app_factory`` and sends
+    requests to it through the application's WSGI interface. Responses are generated
+    from the questions' test responses and the pages' test directions.
+
+    Args:
+        n_users (int): Number of simulated participants.
+        n_workers (int, optional): Number of worker processes. Defaults to None,
+            meaning the number of CPUs.
+        app_factory (Callable[[], Flask], optional): Creates the application in each
+            worker process. Must be picklable, e.g., a module-level function, and
+            must not push an application context (so, not
+            :func:`hemlock.app.create_test_app`). Defaults to
+            :func:`hemlock.app.create_app`.
+        url_rule (str, optional): URL rule to test. Defaults to None.
+        max_page_visits (int, optional): Maximum number of times a participant can
+            visit the same page before they stop making requests. Defaults to 10.
+
+    Returns:
+        LoadTestResults: Results.
+    """
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=n_workers, initializer=_init_worker, initargs=(app_factory,)
+    ) as executor:
+        records = [
+            record
+            for participant_records in executor.map(
+                _run_participant,
+                [url_rule] * n_users,
+                [max_page_visits] * n_users,
+            )
+            for record in participant_records
+        ]
+
+    return LoadTestResults(records, time.perf_counter() - start, n_users)
+
+
+def _init_worker(app_factory: Callable[[], Flask]) -> None:
+    global _worker_app
+    # forked workers inherit the parent process's database session
+    db.session.remove()
+    _worker_app = app_factory()
+
+
+def _run_participant(url_rule: Optional[str], max_page_visits: int) -> List[RecordType]:
+    """Run one simulated participant through the study.
+
+    Args:
+        url_rule (Optional[str]): URL rule to test.
+        max_page_visits (int): Maximum number of times the participant can visit the
+            same page.
+
+    Returns:
+        List[RecordType]: Request records.
+    """
+    from .user import User
+
+    app = _worker_app
+    client = app.test_client()  # type: ignore
+    url_rule = url_rule or User.default_url_rule
+
+    records: List[RecordType] = []
+    error = _send_request(records, FIRST_REQUEST_POSITION, client.get, "/")
+    with client.session_transaction() as session:
+        user_id = session.get("_user_id")
+    if error or user_id is None:
+        return records
+
+    page_visits: Dict[str, int] = {}
+    while True:
+        with app.app_context():  # type: ignore
+            user: User = db.session.get(User, int(user_id))
+            page = user.get_tree(url_rule).page
+            if page.is_last_page:
+                return records
+
+            position = page.get_position()
+            data = user.make_test_post_data(url_rule=url_rule)
+
+        page_visits[position] = page_visits.get(position, 0) + 1
+        if page_visits[position] > max_page_visits:
+            return records
+
+        if _send_request(records, position, client.post, url_rule, data=data):
+            return records
+
+
+def _send_request(
+    records: List[RecordType], position: str, method: Callable, *args, **kwargs
+) -> bool:
+    """Send a request, following redirects, and record its latency.
+
+    Args:
+        records (List[RecordType]): Request records to which this request is added.
+        position (str): Position of the page from which the request is sent.
+        method (Callable): Test client method, e.g., ``client.post``.
+        *args (Any): Passed to ``method``.
+        **kwargs (Any): Passed to ``method``.
+
+    Returns:
+        bool: Indicates that the request failed.
+    """
+    start = time.perf_counter()
+    try:
+        response = method(*args, follow_redirects=True, **kwargs)
+        error = response.status_code >= 400
+    except Exception:
+        error = True
+
+    records.append((position, time.perf_counter() - start, error))
+    return error
@@ -0,0 +1,214 @@
+"""Request timing metrics.
+
+When ``REQUEST_METRICS`` is set in the application's configuration, participant
+requests record how long they spend in each stage (compile functions, rendering,
+validate functions, submit functions, navigate functions, and database commits). The
+timings are aggregated into histograms labeled by URL rule and page position, which
+the admin metrics route exposes in the Prometheus text format.
+
+Metrics are kept in memory, so each process (e.g., each gunicorn worker) reports its
+own requests.
+"""
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from threading import Lock
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+from flask import current_app, g, has_request_context, request
+
+from .utils.cache import LRUCache
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .page import Page
+
+METRIC_NAME = "hemlock_request_stage_seconds"
+METRIC_HELP = "Time spent in each stage of participants' requests."
+# histogram bucket upper bounds in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# (stage, URL rule, page position)
+LabelsType = Tuple[str, str, str]
+
+
+class Histogram:
+    """Histogram of observed durations.
+
+    Args:
+        buckets (Tuple[float, ...], optional): Bucket upper bounds in seconds. Defaults
+            to ``BUCKETS``.
+
+    Attributes:
+        buckets (Tuple[float, ...]): Bucket upper bounds in seconds.
+        counts (List[int]): Number of observations in each bucket (not cumulative).
+            The last entry counts observations greater than the largest bound.
+        sum (float): Sum of the observations.
+        count (int): Number of observations.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        """Record an observation.
+
+        Args:
+            seconds (float): Duration.
+        """
+        i = 0
+        while i < len(self.buckets) and seconds > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def get_cumulative_counts(self) -> List[int]:
+        """Get the number of observations less than or equal to each bound.
+
+        Returns:
+            List[int]: Cumulative counts, ending with the total count.
+        """
+        cumulative_counts, total = [], 0
+        for count in self.counts:
+            total += count
+            cumulative_counts.append(total)
+        return cumulative_counts
+
+
+class RequestMetrics:
+    """Histograms of request stage durations, labeled by stage, URL rule, and page.
+
+    Attributes:
+        histograms (Dict[LabelsType, Histogram]): Maps labels to histograms.
+    """
+
+    def __init__(self):
+        self.histograms: Dict[LabelsType, Histogram] = {}
+        self._lock = Lock()
+
+    def observe(self, stage: str, url_rule: str, position: str, seconds: float) -> None:
+        """Record how long a request spent in a stage.
+
+        Args:
+            stage (str): Stage of the request, e.g., "compile".
+            url_rule (str): URL rule of the request.
+            position (str): Position of the page that handled the request.
+            seconds (float): Duration.
+        """
+        labels = stage, url_rule, position
+        with self._lock:
+            if labels not in self.histograms:
+                self.histograms[labels] = Histogram()
+            self.histograms[labels].observe(seconds)
+
+    def clear(self) -> None:
+        """Remove all recorded metrics."""
+        with self._lock:
+            self.histograms.clear()
+
+    def to_prometheus(self) -> str:
+        """Export the histograms in the Prometheus text format.
+
+        Returns:
+            str: Metrics.
+        """
+        lines = [
+            f"# HELP {METRIC_NAME} {METRIC_HELP}",
+            f"# TYPE {METRIC_NAME} histogram",
+        ]
+        with self._lock:
+            for (stage, url_rule, position), histogram in sorted(
+                self.histograms.items()
+            ):
+                labels = (
+                    f'stage="{_escape(stage)}",url_rule="{_escape(url_rule)}",'
+                    f'page="{_escape(position)}"'
+                )
+                bounds = [str(bound) for bound in histogram.buckets] + ["+Inf"]
+                for bound, count in zip(bounds, histogram.get_cumulative_counts()):
+                    lines.append(
+                        f'{METRIC_NAME}_bucket{{{labels},le="{bound}"}} {count}'
+                    )
+                lines.append(f"{METRIC_NAME}_sum{{{labels}}} {histogram.sum}")
+                lines.append(f"{METRIC_NAME}_count{{{labels}}} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+
+request_metrics = RequestMetrics()
+
+
+def set_url_rule(url_rule: str) -> None:
+    """Set the URL rule with which this request's timings are labeled.
+
+    Args:
+        url_rule (str): URL rule.
+    """
+    g.metrics_url_rule = url_rule
+
+
+@contextmanager
+def record_time(stage: str, page: Page) -> Iterator[None]:
+    """Record how long the request spends in a block of code.
+
+    Nothing is recorded outside of a request or if ``REQUEST_METRICS`` is not set.
+
+    Args:
+        stage (str): Stage of the request, e.g., "compile".
+        page (Page): Page handling the request.
+
+    Examples:
+
+        .. code-block::
+
+            >>> with record_time("compile", page):
+            ...     [func(page) for func in page.compile]
+    """
+    if not (has_request_context() and current_app.config["REQUEST_METRICS"]):
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        request_metrics.observe(stage, _get_url_rule(), page.get_position(), seconds)
+
+
+def cache_to_prometheus(name: str, cache: LRUCache) -> str:
+    """Export a cache's hit and miss counters and size in the Prometheus text format.
+
+    Args:
+        name (str): Name of the cache, e.g., "markdown".
+        cache (LRUCache): Cache.
+
+    Returns:
+        str: Metrics.
+    """
+    lines = []
+    for metric, metric_type, value in (
+        ("hits_total", "counter", cache.hits),
+        ("misses_total", "counter", cache.misses),
+        ("size", "gauge", len(cache)),
+    ):
+        metric_name = f"hemlock_{name}_cache_{metric}"
+        lines += [f"# TYPE {metric_name} {metric_type}", f"{metric_name} {value}"]
+
+    return "\n".join(lines) + "\n"
+
+
+def _get_url_rule() -> str:
+    url_rule: Optional[str] = g.get("metrics_url_rule")
+    if url_rule is not None:
+        return url_rule
+
+    return request.url_rule.rule if request.url_rule is not None else request.path
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,137 @@
+"""Navigation index.
+
+A tree's pages, flattened in the order users navigate through them.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .page import Page
+
+
+def walk_branch(branch: List[Page], depth: int = 0) -> Iterator[Tuple[Page, int]]:
+    """Walk through the pages on a branch and their branches in navigation order.
+
+    Args:
+        branch (List[Page]): Branch.
+        depth (int, optional): Depth of the branch. Defaults to 0.
+
+    Yields:
+        Tuple[Page, int]: Page and its depth.
+    """
+    for page in branch:
+        yield page, depth
+        yield from walk_branch(page.branch, depth + 1)
+
+
+class NavigationIndex:
+    """Pre-order index of the pages in a tree.
+
+    Going forward from a page takes the user to the next page in the index, and going
+    back takes the user to the previous page (unless the page's ``next_page`` or
+    ``prev_page`` says otherwise). The last page in the index is the tree's last page.
+
+    Args:
+        ids (List[int]): Page ids in navigation order.
+        depths (List[int]): Depth of each page. Pages on the tree's branch have depth 0.
+        stale (List[int], optional): Ids of pages whose branches changed since they
+            were indexed. Defaults to None.
+
+    Attributes:
+        ids (List[int]): Page ids in navigation order.
+        depths (List[int]): Depth of each page.
+        stale (List[int]): Ids of pages whose branches need to be re-indexed.
+        positions (Dict[int, int]): Maps page ids to their positions in the index.
+    """
+
+    def __init__(self, ids: List[int], depths: List[int], stale: List[int] = None):
+        self.ids = ids
+        self.depths = depths
+        self.stale = stale or []
+        self.positions = {page_id: i for i, page_id in enumerate(ids)}
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> NavigationIndex:
+        """Load an index from its JSON representation.
+
+        Args:
+            data (Dict[str, Any]): JSON representation.
+
+        Returns:
+            NavigationIndex: Index.
+        """
+        return cls(list(data["ids"]), list(data["depths"]), data.get("stale"))
+
+    def to_json(self) -> Dict[str, Any]:
+        """Get the JSON representation of this index.
+
+        Returns:
+            Dict[str, Any]: JSON representation.
+        """
+        return {
+            "ids": list(self.ids),
+            "depths": list(self.depths),
+            "stale": list(self.stale),
+        }
+
+    def get_next_id(self, page_id: int) -> Optional[int]:
+        """Get the id of the page after a given page.
+
+        Args:
+            page_id (int): Page id.
+
+        Returns:
+            Optional[int]: Id of the next page. None if the page is the last page.
+        """
+        position = self.positions[page_id] + 1
+        return self.ids[position] if position < len(self.ids) else None
+
+    def get_prev_id(self, page_id: int) -> Optional[int]:
+        """Get the id of the page before a given page.
+
+        Args:
+            page_id (int): Page id.
+
+        Returns:
+            Optional[int]: Id of the previous page. None if the page is the first page.
+        """
+        position = self.positions[page_id] - 1
+        return self.ids[position] if position >= 0 else None
+
+    def is_last(self, page_id: int) -> bool:
+        """Indicates that a page is the last page in the index.
+
+        Args:
+            page_id (int): Page id.
+
+        Returns:
+            bool: Indicator.
+        """
+        return self.ids[-1] == page_id
+
+    def splice_branch(self, page: Page) -> Optional[List[Page]]:
+        """Replace the pages indexed under a page with the pages now on its branch.
+
+        Args:
+            page (Page): Page whose branch changed.
+
+        Returns:
+            Optional[List[Page]]: Pages added to the index. None if some pages on the
+                branch have not been flushed to the database, in which case the index
+                is unchanged.
+        """
+        start = self.positions[page.id] + 1
+        depth = self.depths[start - 1]
+        entries = list(walk_branch(page.branch, depth + 1))
+        if any(branch_page.id is None for branch_page, _ in entries):
+            return None
+
+        stop = start
+        while stop < len(self.ids) and self.depths[stop] > depth:
+            stop += 1
+        self.ids[start:stop] = [branch_page.id for branch_page, _ in entries]
+        self.depths[start:stop] = [branch_depth for _, branch_depth in entries]
+        self.positions = {page_id: i for i, page_id in enumerate(self.ids)}
+        return [branch_page for branch_page, _ in entries]
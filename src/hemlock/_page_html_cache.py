@@ -0,0 +1,292 @@
+"""Cache of the HTML of each tree's current page.
+
+A tree replays the HTML from its last GET request when the user refreshes the page or
+double submits. Storing this HTML in the tree's database row rewrites several KB on
+every page view, so the HTML is stored in a cache instead. Each tree has one entry,
+tagged with the hash of the page it shows, so HTML for a page the user has left is
+never replayed.
+
+If the cache doesn't have a tree's HTML (e.g., a worker restarted or another worker
+served the GET request), the tree re-renders its current page without rerunning its
+compile functions. Set ``PAGE_HTML_CACHE_DATABASE_FALLBACK`` to also keep the HTML in
+the database, as before, and replay it on a cache miss.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Any, Mapping, Optional, Tuple, Union
+
+from .utils.cache import LRUCache
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .tree import Tree
+
+
+class PageHTMLCache(ABC):
+    """Base class for page HTML caches.
+
+    Subclasses implement :meth:`get_entry` and :meth:`set_entry`.
+    """
+
+    def get(self, tree_id: int, page_hash: str) -> Optional[str]:
+        """Get the cached HTML of a tree's page.
+
+        Args:
+            tree_id (int): Tree id.
+            page_hash (str): Hash of the tree's current page.
+
+        Returns:
+            Optional[str]: HTML, or None if the tree's cached HTML is missing or is
+                for another page.
+        """
+        entry = self.get_entry(tree_id)
+        if entry is None or entry[0] != page_hash:
+            return None
+        return entry[1]
+
+    def set(self, tree_id: int, page_hash: str, html: str) -> None:
+        """Cache the HTML of a tree's page, replacing the tree's previous entry.
+
+        Args:
+            tree_id (int): Tree id.
+            page_hash (str): Hash of the page.
+            html (str): HTML.
+        """
+        self.set_entry(tree_id, (page_hash, html))
+
+    @abstractmethod
+    def get_entry(self, tree_id: int) -> Optional[Tuple[str, str]]:
+        """Get a tree's entry.
+
+        Args:
+            tree_id (int): Tree id.
+
+        Returns:
+            Optional[Tuple[str, str]]: (page hash, HTML), or None if the tree has no
+                entry.
+        """
+
+    @abstractmethod
+    def set_entry(self, tree_id: int, entry: Tuple[str, str]) -> None:
+        """Set a tree's entry.
+
+        Args:
+            tree_id (int): Tree id.
+            entry (Tuple[str, str]): (page hash, HTML).
+        """
+
+
+class MemoryPageHTMLCache(PageHTMLCache):
+    """Least recently used cache in this process's memory.
+
+    Each worker process has its own cache, so when a refresh is served by a different
+    worker than the original GET request, the page is re-rendered.
+
+    Args:
+        maxsize (int, optional): Maximum number of trees. Defaults to 1024.
+
+    Attributes:
+        cache (LRUCache): Maps tree ids to entries.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.cache = LRUCache(maxsize)
+
+    def get_entry(self, tree_id: int) -> Optional[Tuple[str, str]]:
+        return self.cache.get(tree_id)
+
+    def set_entry(self, tree_id: int, entry: Tuple[str, str]) -> None:
+        self.cache.set(tree_id, entry)
+
+
+class FilesystemPageHTMLCache(PageHTMLCache):
+    """Cache with one file per tree, shared by the worker processes on a machine.
+
+    Files older than ``ttl`` are treated as missing and are removed when the cache is
+    created.
+
+    Args:
+        directory (str, optional): Directory in which to store the files. Defaults to
+            a ``hemlock-page-html`` directory in the system's temporary directory,
+            namespaced by ``database_uri``.
+        ttl (int, optional): Seconds for which entries are kept. Defaults to 86400.
+        database_uri (str, optional): URI of the database whose trees are cached.
+            Apps using different databases on the same machine don't share the
+            default directory. Defaults to "sqlite://".
+
+    Attributes:
+        directory (str): Directory in which the files are stored.
+        ttl (int): Seconds for which entries are kept.
+    """
+
+    def __init__(
+        self, directory: str = None, ttl: int = 86400, database_uri: str = "sqlite://"
+    ):
+        if directory is None:
+            namespace = hashlib.sha256(database_uri.encode()).hexdigest()[:16]
+            directory = os.path.join(
+                tempfile.gettempdir(), "hemlock-page-html", namespace
+            )
+        self.directory = directory
+        self.ttl = ttl
+        os.makedirs(self.directory, exist_ok=True)
+        self.remove_expired_entries()
+
+    def get_entry(self, tree_id: int) -> Optional[Tuple[str, str]]:
+        try:
+            with open(self._get_path(tree_id), encoding="utf-8") as f:
+                if self._is_expired(os.fstat(f.fileno()).st_mtime):
+                    return None
+                page_hash, html = f.read().split("\n", 1)
+        except (FileNotFoundError, ValueError):
+            return None
+        return page_hash, html
+
+    def set_entry(self, tree_id: int, entry: Tuple[str, str]) -> None:
+        # write to a temporary file and rename it so readers never see partial HTML
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write("\n".join(entry))
+        os.replace(temp_path, self._get_path(tree_id))
+
+    def remove_expired_entries(self) -> None:
+        """Remove the files of entries older than ``ttl``."""
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                try:
+                    if self._is_expired(entry.stat().st_mtime):
+                        os.remove(entry.path)
+                except FileNotFoundError:
+                    # removed by another worker
+                    pass
+
+    def _is_expired(self, mtime: float) -> bool:
+        return time.time() - mtime > self.ttl
+
+    def _get_path(self, tree_id: int) -> str:
+        return os.path.join(self.directory, f"{tree_id}.html")
+
+
+class RedisPageHTMLCache(PageHTMLCache):
+    """Cache in Redis or a Redis-compatible store, shared by all worker processes.
+
+    Args:
+        client (Any, optional): Client with Redis ``get`` and ``set`` methods, e.g.,
+            ``redis.Redis`` or ``fakeredis.FakeRedis``. Defaults to a ``redis.Redis``
+            client connected to ``url``.
+        url (str, optional): Redis URL. Defaults to "redis://localhost:6379/0".
+        ttl (int, optional): Seconds for which entries are kept. Defaults to 86400.
+        prefix (str, optional): Prefix of the keys. Defaults to
+            "hemlock:page-html:".
+
+    Attributes:
+        client (Any): Redis client.
+        ttl (int): Seconds for which entries are kept.
+        prefix (str): Prefix of the keys.
+    """
+
+    def __init__(
+        self,
+        client: Any = None,
+        url: str = "redis://localhost:6379/0",
+        ttl: int = 86400,
+        prefix: str = "hemlock:page-html:",
+    ):
+        if client is None:
+            import redis
+
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get_entry(self, tree_id: int) -> Optional[Tuple[str, str]]:
+        value = self.client.get(f"{self.prefix}{tree_id}")
+        if value is None:
+            return None
+
+        if isinstance(value, bytes):
+            value = value.decode("utf-8")
+        page_hash, html = value.split("\n", 1)
+        return page_hash, html
+
+    def set_entry(self, tree_id: int, entry: Tuple[str, str]) -> None:
+        self.client.set(f"{self.prefix}{tree_id}", "\n".join(entry), ex=self.ttl)
+
+
+# None stores the HTML in the database
+page_html_cache: Optional[PageHTMLCache] = MemoryPageHTMLCache()
+
+
+def make_page_html_cache(config: Mapping[str, Any]) -> Optional[PageHTMLCache]:
+    """Make the page HTML cache specified by the configuration.
+
+    Args:
+        config (Mapping[str, Any]): Application configuration. ``PAGE_HTML_CACHE`` is
+            "memory", "filesystem", "redis", "database", or a :class:`PageHTMLCache`.
+
+    Returns:
+        Optional[PageHTMLCache]: Cache, or None to store the HTML in the database.
+    """
+    backend: Union[str, PageHTMLCache] = config["PAGE_HTML_CACHE"]
+    if isinstance(backend, PageHTMLCache):
+        return backend
+    if backend == "memory":
+        return MemoryPageHTMLCache(config["PAGE_HTML_CACHE_SIZE"])
+    if backend == "filesystem":
+        return FilesystemPageHTMLCache(
+            config["PAGE_HTML_CACHE_DIR"],
+            ttl=config["PAGE_HTML_CACHE_TTL"],
+            database_uri=config.get("SQLALCHEMY_DATABASE_URI", "sqlite://"),
+        )
+    if backend == "redis":
+        return RedisPageHTMLCache(
+            url=config["PAGE_HTML_CACHE_URL"], ttl=config["PAGE_HTML_CACHE_TTL"]
+        )
+    if backend == "database":
+        return None
+
+    raise ValueError(
+        "PAGE_HTML_CACHE must be 'memory', 'filesystem', 'redis', 'database', or a"
+        f" PageHTMLCache, got {backend!r}."
+    )
+
+
+def get_cached_page_html(tree: Tree, database_fallback: bool) -> Optional[str]:
+    """Get the HTML of a tree's current page from its last GET request.
+
+    Args:
+        tree (Tree): Tree.
+        database_fallback (bool): Use the HTML stored in the database on a cache miss.
+
+    Returns:
+        Optional[str]: HTML, or None if it isn't cached.
+    """
+    if page_html_cache is None or tree.id is None:
+        return tree._cached_page_html
+
+    html = page_html_cache.get(tree.id, tree.page.hash)
+    if html is None and database_fallback:
+        return tree._cached_page_html
+    return html
+
+
+def set_cached_page_html(tree: Tree, html: str, database_fallback: bool) -> None:
+    """Cache the HTML of a tree's current page.
+
+    Args:
+        tree (Tree): Tree.
+        html (str): HTML.
+        database_fallback (bool): Also store the HTML in the database.
+    """
+    if page_html_cache is None or tree.id is None:
+        tree._cached_page_html = html
+        return
+
+    page_html_cache.set(tree.id, tree.page.hash, html)
+    if database_fallback:
+        tree._cached_page_html = html
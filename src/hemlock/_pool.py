@@ -0,0 +1,224 @@
+"""Database connection pool sizing and metrics.
+
+Each worker process has its own connection pool. The pool should have about one
+connection per request the worker handles at once, which depends on how the worker
+runs requests: one thread per request, or one greenlet per request when Socket.IO runs
+on eventlet or gevent, or when either has monkey patched the standard library.
+
+The engine options are derived from the application's final configuration when the
+application is created, so values from every configuration object passed to
+:func:`hemlock.app.create_app` apply.
+
+The pool records how long requests wait to check out a connection and how often the
+pool is saturated (every connection is checked out), which the admin metrics route
+exposes in the Prometheus text format.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import time
+from threading import Lock
+from typing import Any, Dict, Mapping, Optional
+
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import Pool, QueuePool
+
+from ._metrics import Histogram
+
+# concurrent requests per worker when greenlets handle requests. the database, not
+# the worker, limits how many of these can run at once
+GREENLET_CONCURRENCY = 20
+# Socket.IO async modes in which greenlets handle requests
+GREENLET_ASYNC_MODES = ("eventlet", "gevent", "gevent_uwsgi")
+
+CHECKOUT_METRIC_NAME = "hemlock_db_pool_checkout_wait_seconds"
+CHECKOUT_METRIC_HELP = "Time spent waiting to check out a database connection."
+CHECKOUT_BUCKETS = (0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+
+def uses_greenlets(async_mode: str = None) -> bool:
+    """Indicates that greenlets handle requests.
+
+    Args:
+        async_mode (str, optional): Socket.IO async mode, e.g., "threading" or
+            "eventlet". Defaults to None.
+
+    Returns:
+        bool: Whether Socket.IO runs on eventlet or gevent, or eventlet or gevent has
+            monkey patched the standard library.
+    """
+    if async_mode in GREENLET_ASYNC_MODES:
+        return True
+
+    if "eventlet" in sys.modules:
+        from eventlet import patcher
+
+        if patcher.is_monkey_patched("socket"):
+            return True
+
+    if "gevent" in sys.modules:
+        from gevent import monkey
+
+        if monkey.is_module_patched("socket"):
+            return True
+
+    return False
+
+
+def get_worker_concurrency(config: Mapping[str, Any], async_mode: str = None) -> int:
+    """Get the number of requests a worker handles at once.
+
+    Uses ``WORKER_CONCURRENCY`` from the configuration or the ``WORKER_CONCURRENCY``
+    environment variable if set. Otherwise, this is ``GREENLET_CONCURRENCY`` for
+    greenlet workers, or the number of threads Python uses by default for thread
+    pools.
+
+    Args:
+        config (Mapping[str, Any]): Application configuration.
+        async_mode (str, optional): Socket.IO async mode. Defaults to None.
+
+    Returns:
+        int: Number of concurrent requests.
+    """
+    concurrency: Optional[Any] = config.get("WORKER_CONCURRENCY") or os.getenv(
+        "WORKER_CONCURRENCY"
+    )
+    if concurrency:
+        return int(concurrency)
+
+    if uses_greenlets(async_mode):
+        return GREENLET_CONCURRENCY
+
+    # the default for concurrent.futures.ThreadPoolExecutor
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+def get_engine_options(
+    config: Mapping[str, Any], async_mode: str = None
+) -> Dict[str, Any]:
+    """Get the engine options for the application's database.
+
+    Args:
+        config (Mapping[str, Any]): Application configuration. The
+            ``DATABASE_POOL_*`` values override the pool size derived from the
+            worker's concurrency.
+        async_mode (str, optional): Socket.IO async mode. Defaults to None.
+
+    Returns:
+        Dict[str, Any]: Keyword arguments for ``sqlalchemy.create_engine``. Empty for
+            SQLite, which doesn't use a connection pool.
+    """
+    # Flask-SQLAlchemy defaults to an in-memory SQLite database
+    if config.get("SQLALCHEMY_DATABASE_URI", "sqlite://").startswith("sqlite"):
+        return {}
+
+    pool_size = config["DATABASE_POOL_SIZE"] or get_worker_concurrency(
+        config, async_mode
+    )
+    return {
+        "poolclass": MeteredQueuePool,
+        "pool_size": pool_size,
+        "max_overflow": config["DATABASE_MAX_OVERFLOW"],
+        "pool_timeout": config["DATABASE_POOL_TIMEOUT"],
+        "pool_recycle": config["DATABASE_POOL_RECYCLE"],
+        "pool_pre_ping": config["DATABASE_POOL_PRE_PING"],
+    }
+
+
+class PoolMetrics:
+    """Connection checkout counters.
+
+    Attributes:
+        checkout_wait (Histogram): Time spent waiting to check out a connection.
+        saturated_checkouts (int): Number of checkouts requested when every
+            connection (including overflow) was checked out.
+        timeouts (int): Number of checkouts which timed out.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self.clear()
+
+    def observe_checkout(self, seconds: float, saturated: bool) -> None:
+        """Record a checkout.
+
+        Args:
+            seconds (float): Time spent waiting for the connection.
+            saturated (bool): Indicates that the pool was saturated when the checkout
+                was requested.
+        """
+        with self._lock:
+            self.checkout_wait.observe(seconds)
+            self.saturated_checkouts += int(saturated)
+
+    def observe_timeout(self) -> None:
+        """Record a checkout which timed out."""
+        with self._lock:
+            self.timeouts += 1
+
+    def clear(self) -> None:
+        """Remove all recorded metrics."""
+        with self._lock:
+            self.checkout_wait = Histogram(CHECKOUT_BUCKETS)
+            self.saturated_checkouts = 0
+            self.timeouts = 0
+
+    def to_prometheus(self, pool: Pool = None) -> str:
+        """Export the metrics in the Prometheus text format.
+
+        Args:
+            pool (Pool, optional): If this is a queue pool, its size and the number of
+                connections checked out are also exported. Defaults to None.
+
+        Returns:
+            str: Metrics.
+        """
+        lines = [
+            f"# HELP {CHECKOUT_METRIC_NAME} {CHECKOUT_METRIC_HELP}",
+            f"# TYPE {CHECKOUT_METRIC_NAME} histogram",
+        ]
+        with self._lock:
+            histogram = self.checkout_wait
+            bounds = [str(bound) for bound in histogram.buckets] + ["+Inf"]
+            for bound, count in zip(bounds, histogram.get_cumulative_counts()):
+                lines.append(f'{CHECKOUT_METRIC_NAME}_bucket{{le="{bound}"}} {count}')
+            lines.append(f"{CHECKOUT_METRIC_NAME}_sum {histogram.sum}")
+            lines.append(f"{CHECKOUT_METRIC_NAME}_count {histogram.count}")
+            counters = [
+                ("saturated_checkouts_total", "counter", self.saturated_checkouts),
+                ("checkout_timeouts_total", "counter", self.timeouts),
+            ]
+
+        if isinstance(pool, QueuePool):
+            counters += [
+                ("size", "gauge", pool.size()),
+                ("checked_out", "gauge", pool.checkedout()),
+                ("overflow", "gauge", max(pool.overflow(), 0)),
+            ]
+        for metric, metric_type, value in counters:
+            metric_name = f"hemlock_db_pool_{metric}"
+            lines += [f"# TYPE {metric_name} {metric_type}", f"{metric_name} {value}"]
+
+        return "\n".join(lines) + "\n"
+
+
+pool_metrics = PoolMetrics()
+
+
+class MeteredQueuePool(QueuePool):
+    """Queue pool which records connection checkouts in ``pool_metrics``."""
+
+    def _do_get(self) -> Any:
+        saturated = (
+            self._max_overflow > -1
+            and self.checkedout() >= self.size() + self._max_overflow
+        )
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except TimeoutError:
+            pool_metrics.observe_timeout()
+            raise
+        finally:
+            pool_metrics.observe_checkout(time.perf_counter() - start, saturated)
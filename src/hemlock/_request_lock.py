@@ -0,0 +1,64 @@
+"""Per-user request locks.
+
+When ``SINGLE_TRANSACTION_REQUESTS`` is set in the application's configuration, each
+participant request locks the user before reading any of the user's state and holds
+the lock until the request's transaction ends. Concurrent requests from the same user
+(e.g., double submits) are processed one after the other, so a request doesn't need
+to commit a "request in progress" flag before doing its work.
+"""
+from __future__ import annotations
+
+import threading
+
+from flask import current_app, g, has_request_context
+
+from .app import ROW_LOCK_DIALECTS, bp, db, get_dialect_name
+
+# other databases fall back to locks in this process, striped by user id
+N_PROCESS_LOCKS = 64
+_process_locks = [threading.Lock() for _ in range(N_PROCESS_LOCKS)]
+
+
+def single_transaction_requests() -> bool:
+    """Indicates that requests are processed in a single transaction.
+
+    Returns:
+        bool: Whether ``SINGLE_TRANSACTION_REQUESTS`` is set.
+    """
+    return current_app.config["SINGLE_TRANSACTION_REQUESTS"]
+
+
+def lock_user(user_id: int) -> None:
+    """Lock a user until the end of the current request.
+
+    On databases with row locks, this locks the user's row until the current
+    transaction ends. Other databases (e.g., SQLite) use a lock in this process, which
+    does not serialize requests handled by separate processes.
+
+    Only one user is locked per request. Later calls do nothing.
+
+    Args:
+        user_id (int): Id of the user to lock.
+    """
+    if not has_request_context() or "_locked_user_id" in g:
+        return
+
+    from .user import User
+
+    if get_dialect_name() in ROW_LOCK_DIALECTS:
+        db.session.query(User.id).filter(User.id == user_id).with_for_update().scalar()
+    else:
+        lock = _process_locks[user_id % N_PROCESS_LOCKS]
+        lock.acquire()
+        g._user_process_lock = lock
+
+    g._locked_user_id = user_id
+
+
+@bp.teardown_app_request
+def _release_user_lock(exception: BaseException = None) -> None:
+    # row locks are released when the session ends the transaction
+    lock = g.pop("_user_process_lock", None)
+    if lock is not None:
+        lock.release()
+    g.pop("_locked_user_id", None)
@@ -0,0 +1,240 @@
+"""Incrementally maintained user status aggregates.
+
+The admin status page shows the number of users with each status and the median time
+they spent on the study. Rather than computing these from every user's metadata, each
+user adds one to a count for each of their statuses, binned by the time they spent on
+the study. When a user's status or end time changes, their old counts are decremented
+and the new ones incremented. The status page then reads a small, fixed number of
+counts no matter how many users there are.
+
+Every new user increments the "all" and "in_progress" counts for the first time bin.
+Updating a count locks its row until the user's transaction commits, so each count is
+split into ``STATUS_COUNT_SHARDS`` rows, and each update goes to a random shard. This
+way, concurrent signups rarely wait for each other.
+
+Users created before the counts were maintained aren't counted until you run::
+
+    $ flask hemlock count-users
+
+This also adds the status count table and the column which stores each user's
+status key to databases created before they existed.
+
+Times are binned on a log scale, so medians are estimated to within about 5%.
+"""
+from __future__ import annotations
+
+import math
+import random
+from collections import defaultdict
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import click
+from flask import current_app
+from sqlalchemy import func
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.attributes import flag_modified
+
+from .app import bp, db
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .user import User
+
+STATUSES = ("completed", "failed", "errored", "in_progress")
+ALL_STATUS = "all"
+# time bins grow by this factor
+BIN_BASE = 1.1
+
+
+class StatusCount(db.Model):  # type: ignore
+    """Number of users with a given status whose time on the study is in a given bin.
+
+    The number of users is the sum of the counts over all shards. A shard's count may
+    be negative, because a user's contribution may be removed from a different shard
+    than the one to which it was added.
+
+    Attributes:
+        status (str): Status, e.g., "completed", or "all" for all users.
+        time_bin (int): Time bin. See :func:`get_time_bin`.
+        shard (int): Shard of the count.
+        count (int): Number of users.
+    """
+
+    id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String)
+    time_bin = db.Column(db.Integer)
+    shard = db.Column(db.Integer, default=0)
+    count = db.Column(db.Integer, default=0)
+
+    __table_args__ = (db.UniqueConstraint(status, time_bin, shard),)
+
+
+def get_time_bin(seconds: float) -> int:
+    """Get the bin of the time a user spent on the study.
+
+    Bin 0 is less than 1 second. Bin ``i > 0`` is from ``BIN_BASE ** (i - 1)`` to
+    ``BIN_BASE ** i`` seconds.
+
+    Args:
+        seconds (float): Time.
+
+    Returns:
+        int: Bin.
+    """
+    if seconds < 1:
+        return 0
+    return int(math.log(seconds, BIN_BASE)) + 1
+
+
+def get_bin_seconds(time_bin: int) -> float:
+    """Get a representative time for a bin (its geometric midpoint).
+
+    Args:
+        time_bin (int): Bin.
+
+    Returns:
+        float: Time in seconds.
+    """
+    if time_bin == 0:
+        return 0.0
+    return BIN_BASE ** (time_bin - 0.5)
+
+
+def get_status_key(user: User) -> str:
+    """Get a key describing the counts to which a user contributes.
+
+    Args:
+        user (User): User.
+
+    Returns:
+        str: Key of the form ``"status0,status1|time_bin"``.
+    """
+    statuses = [status for status in STATUSES if getattr(user, status)]
+    seconds = (user.end_time - user.start_time).total_seconds()
+    return f"{','.join(statuses + [ALL_STATUS])}|{get_time_bin(seconds)}"
+
+
+def update_status_counts(
+    connection: Connection, old_key: Optional[str], new_key: Optional[str]
+) -> None:
+    """Move a user's contribution from their old counts to their new counts.
+
+    Args:
+        connection (Connection): Connection used to update the counts.
+        old_key (Optional[str]): Key returned by :func:`get_status_key` for the user's
+            old status, or None if the user wasn't counted.
+        new_key (Optional[str]): Key for the user's new status, or None if the user
+            shouldn't be counted (e.g., because the user was deleted).
+    """
+    shard = random.randrange(current_app.config["STATUS_COUNT_SHARDS"])
+    changes: Dict[Tuple[str, int], int] = defaultdict(int)
+    for key, change in ((old_key, -1), (new_key, 1)):
+        if key is not None:
+            statuses, time_bin = key.split("|")
+            for status in statuses.split(","):
+                changes[status, int(time_bin)] += change
+
+    # update the rows in a consistent order to avoid deadlocks
+    for (status, time_bin), change in sorted(changes.items()):
+        if change != 0:
+            _add_to_count(connection, status, time_bin, shard, change)
+
+
+def _add_to_count(
+    connection: Connection, status: str, time_bin: int, shard: int, change: int
+) -> None:
+    table = StatusCount.__table__
+    update = (
+        table.update()
+        .where(
+            table.c.status == status,
+            table.c.time_bin == time_bin,
+            table.c.shard == shard,
+        )
+        .values(count=table.c.count + change)
+    )
+    if connection.execute(update).rowcount:
+        return
+
+    try:
+        with connection.begin_nested():
+            connection.execute(
+                table.insert().values(
+                    status=status, time_bin=time_bin, shard=shard, count=change
+                )
+            )
+    except IntegrityError:
+        # another process inserted the count first
+        connection.execute(update)
+
+
+def get_status_summary() -> Dict[str, Tuple[int, Optional[float]]]:
+    """Get the number of users with each status and their median time on the study.
+
+    Returns:
+        Dict[str, Tuple[int, Optional[float]]]: Maps each status and "all" to the
+            number of users and estimated median time in seconds. The median is None
+            if there are no users with that status.
+    """
+    bins: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+    for status, time_bin, count in (
+        db.session.query(
+            StatusCount.status, StatusCount.time_bin, func.sum(StatusCount.count)
+        )
+        .group_by(StatusCount.status, StatusCount.time_bin)
+        .order_by(StatusCount.time_bin)
+    ):
+        if count > 0:
+            bins[status].append((time_bin, count))
+
+    summary = {}
+    for status in STATUSES + (ALL_STATUS,):
+        n_users = sum(count for _, count in bins[status])
+        median = None
+        cumulative_count = 0
+        for time_bin, count in bins[status]:
+            cumulative_count += count
+            if 2 * cumulative_count >= n_users:
+                median = get_bin_seconds(time_bin)
+                break
+        summary[status] = n_users, median
+
+    return summary
+
+
+def count_uncounted_users() -> int:
+    """Add users created before status counts were maintained to the counts.
+
+    Users are counted and committed in batches of ``USER_BATCH_SIZE``.
+
+    Returns:
+        int: Number of users counted.
+    """
+    from .user import User
+
+    n_users = 0
+    while True:
+        users = (
+            User.query.filter(User._status_key.is_(None))
+            .limit(current_app.config["USER_BATCH_SIZE"])
+            .all()
+        )
+        if not users:
+            return n_users
+
+        for user in users:
+            # the user's counts are updated when the user is flushed
+            flag_modified(user, "_status_key")
+        db.session.commit()
+        n_users += len(users)
+
+
+@bp.cli.command("count-users")
+def count_uncounted_users_command() -> None:
+    """Add users created before status counts were maintained to the counts."""
+    from ._indexes import add_missing_columns
+
+    db.create_all()
+    for name in add_missing_columns():
+        click.echo(f"Added column {name}")
+    click.echo(f"Counted {count_uncounted_users()} users")
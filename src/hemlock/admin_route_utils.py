@@ -24,6 +24,8 @@ navbar = (
     [
         ("User status", "/admin-status"),
         ("Download", "/admin-download"),
+        ("Download parquet", "/admin-download-parquet"),
+        ("Metrics", "/admin-metrics"),
         ("Logout", "/admin-logout"),
     ],
 )
@@ -4,15 +4,20 @@ from __future__ import annotations
 
 import os
 from collections import defaultdict
-from typing import Any, Dict, List, Mapping, Union
+from typing import Any, Dict, List, Mapping, Optional, Union
 
-from flask import Blueprint, Flask
+from flask import Blueprint, Flask, current_app
 from flask_login import LoginManager
 from flask_socketio import SocketIO
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import Session
 from sqlalchemy_mutable import Mutable
 from werkzeug.security import generate_password_hash
 
+from . import _page_html_cache
+from ._pool import get_engine_options
+from .utils.format import markdown_cache
+
 # create blueprint and extensions
 bp = Blueprint(
     "hemlock",
@@ -36,13 +41,58 @@ static_pages: Dict[str, str] = {}
 
 
 class Config:
-    """Default configuration file."""
+    """Default configuration file.
+
+    Setting ``STATIC_ASSETS`` to "local" serves Bootstrap, jQuery, Josefin Sans, and
+    the Socket.IO client from copies bundled in ``hemlock/static/vendor``. Releases
+    bundle them when they're built with ``make dist``. When hemlock is installed from
+    source, bundle them with ``python -m hemlock._assets`` (or
+    ``make vendor-assets``) before setting ``STATIC_ASSETS`` to "local". Otherwise,
+    the app fails to start.
+
+    ``PAGE_HTML_CACHE`` sets where the HTML of each tree's current page is cached so
+    it can be replayed when a user refreshes the page. The default, "memory", is per
+    worker process. On deployments with several workers, a refresh served by a
+    different worker than the GET request re-renders the page. Use "filesystem" to
+    share the cache between the workers on a machine or "redis" to share it between
+    machines.
+    """
 
     ALLOW_USERS_TO_RESTART: bool = True
     SCREENOUT_RECORDS: Dict[str, List[str]] = {}
     BLOCK_DUPLICATE_KEYS: List[str] = []
+    # add missing columns and indexes when each worker starts. prefer running
+    # `flask hemlock create-missing-indexes` once per deployment
+    CREATE_MISSING_INDEXES: bool = False
+    # None derives the pool size from WORKER_CONCURRENCY
+    DATABASE_POOL_SIZE: Optional[int] = None
+    DATABASE_MAX_OVERFLOW: int = 2
+    DATABASE_POOL_TIMEOUT: float = 30
+    DATABASE_POOL_RECYCLE: int = 1800
+    DATABASE_POOL_PRE_PING: bool = True
+    MARKDOWN_CACHE_SIZE: int = 1024
+    NAVIGATION_INDEX_CACHE_SIZE: int = 1024
+    PAGE_HTML_CACHE: Any = "memory"
+    PAGE_HTML_CACHE_DATABASE_FALLBACK: bool = False
+    PAGE_HTML_CACHE_DIR: Optional[str] = None
+    PAGE_HTML_CACHE_SIZE: int = 1024
+    PAGE_HTML_CACHE_TTL: int = 86400
+    PAGE_HTML_CACHE_URL: str = "redis://localhost:6379/0"
+    PAGE_LOADING_STRATEGY: str = "selectin"
+    PARQUET_ROW_GROUP_SIZE: int = 10000
+    QUESTION_HTML_CACHE_SIZE: int = 1024
+    REQUEST_METRICS: bool = False
+    SINGLE_TRANSACTION_REQUESTS: bool = False
+    # rows over which each admin status count is spread to reduce lock contention
+    STATUS_COUNT_SHARDS: int = 16
+    # "cdn" or "local" (serve the assets bundled in hemlock/static/vendor)
+    STATIC_ASSETS: str = "cdn"
     SQLALCHEMY_TRACK_MODIFICATIONS: bool = False
+    USER_BATCH_SIZE: int = 500
     USER_METADATA: defaultdict[str, List[str]] = defaultdict(list)
+    WARM_MARKDOWN_CACHE: bool = False
+    # None detects the number of requests each worker handles at once
+    WORKER_CONCURRENCY: Optional[int] = None
 
     @property
     def PASSWORD(self) -> str:
@@ -67,18 +117,62 @@ class Config:
 
         return uri
 
-    @property
-    def SQLALCHEMY_ENGINE_OPTIONS(self) -> Dict[str, Any]:
-        if self.SQLALCHEMY_DATABASE_URI.startswith("sqlite"):
-            return {}
 
-        return {"pool_size": 1, "pool_recycle": 10, "max_overflow": 0}
+# dialects which support row locks (SELECT ... FOR UPDATE)
+ROW_LOCK_DIALECTS = ("postgresql", "mysql", "mariadb", "oracle")
+# dialects whose REPEATABLE READ transactions read from a single snapshot
+SNAPSHOT_DIALECTS = ("postgresql", "mysql", "mariadb")
+
+
+def get_dialect_name(session: Session = None) -> str:
+    """Get the name of the database's dialect.
+
+    Flask-SQLAlchemy's ``SignallingSession.get_bind`` doesn't accept the arguments
+    SQLAlchemy 1.4 passes to it, so this uses the session's bind instead.
+
+    Args:
+        session (Session, optional): Session. Defaults to ``db.session``.
+
+    Returns:
+        str: Dialect name, e.g., "postgresql" or "sqlite".
+    """
+    bind = (db.session if session is None else session).bind
+    return (bind or db.engine).dialect.name
 
 
 @bp.before_app_first_request
 def init_app() -> None:
-    """Create database."""
+    """Create database, add missing columns and indexes, check the bundled static
+    assets, and set up the page HTML, question HTML, navigation index, and markdown
+    caches."""
+    from .questions.base import question_html_cache
+    from .tree import navigation_index_cache
+
+    if current_app.config["STATIC_ASSETS"] == "local":
+        from ._assets import check_assets_bundled
+
+        check_assets_bundled()
+    elif current_app.config["STATIC_ASSETS"] != "cdn":
+        raise ValueError(
+            "STATIC_ASSETS must be 'cdn' or 'local', got"
+            f" {current_app.config['STATIC_ASSETS']!r}."
+        )
+
     db.create_all()
+    if current_app.config["CREATE_MISSING_INDEXES"]:
+        from ._indexes import create_missing_indexes
+
+        create_missing_indexes()
+    _page_html_cache.page_html_cache = _page_html_cache.make_page_html_cache(
+        current_app.config
+    )
+    markdown_cache.maxsize = current_app.config["MARKDOWN_CACHE_SIZE"]
+    question_html_cache.maxsize = current_app.config["QUESTION_HTML_CACHE_SIZE"]
+    navigation_index_cache.maxsize = current_app.config["NAVIGATION_INDEX_CACHE_SIZE"]
+    if current_app.config["WARM_MARKDOWN_CACHE"]:
+        from .user import User
+
+        User.warm_markdown_cache()
 
 
 def create_app(
@@ -119,10 +213,14 @@ def create_app(
 
     app.register_blueprint(bp)
 
-    # initialize extensions
+    # initialize extensions. the engine options depend on the Socket.IO async mode
+    # and on the final configuration, so they're set after both are known
+    socketio.init_app(app)
+    app.config.setdefault(
+        "SQLALCHEMY_ENGINE_OPTIONS", get_engine_options(app.config, socketio.async_mode)
+    )
     db.init_app(app)
     login_manager.init_app(app)
-    socketio.init_app(app)
 
     return app
 
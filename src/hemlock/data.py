@@ -51,8 +51,8 @@ class Data(db.Model):  # type: ignore
     data_type = db.Column(db.String)
     __mapper_args__ = {"polymorphic_identity": "data", "polymorphic_on": data_type}
 
-    _user_id = db.Column(db.Integer, db.ForeignKey("user.id"))
-    _page_id = db.Column(db.Integer, db.ForeignKey("page.id"))
+    _user_id = db.Column(db.Integer, db.ForeignKey("user.id"), index=True)
+    _page_id = db.Column(db.Integer, db.ForeignKey("page.id"), index=True)
 
     variable = db.Column(db.String)
     data = db.Column(MutablePickleType)
@@ -1,3 +1,4 @@
 from .base import Functional
 from .compile import compile
+from .navigate import lazy_branch, navigate
 from .validate import validate
@@ -3,10 +3,51 @@
 from __future__ import annotations
 
 import functools
-from typing import Any, Callable, List, Tuple, Union
+import importlib
+from typing import Any, Callable, Dict, List, Tuple, Union
 
 from sqlalchemy_mutable.utils import partial
 
+# maps names (module and qualified name) to functions registered with any Functional
+registered_functions: Dict[str, Callable] = {}
+
+
+def get_registered_name(func: Callable) -> Union[str, None]:
+    """Get the name under which a function was registered.
+
+    Args:
+        func (Callable): Function.
+
+    Returns:
+        Union[str, None]: Name, or None if the function wasn't registered.
+    """
+    name = f"{getattr(func, '__module__', None)}:{getattr(func, '__qualname__', None)}"
+    return name if registered_functions.get(name) is func else None
+
+
+def get_registered_function(name: str) -> Callable:
+    """Get a registered function by name.
+
+    If the function isn't registered yet, this imports the module in which it's
+    defined, which registers it.
+
+    Args:
+        name (str): Name returned by :func:`get_registered_name`.
+
+    Raises:
+        KeyError: If the function isn't registered after importing its module.
+
+    Returns:
+        Callable: Function.
+    """
+    if name not in registered_functions:
+        importlib.import_module(name.split(":")[0])
+
+    try:
+        return registered_functions[name]
+    except KeyError:
+        raise KeyError(f"Function {name} isn't registered.")
+
 
 class Functional(dict):
     """A class for registering functions.
@@ -43,6 +84,9 @@ class Functional(dict):
     def register(self, func: Callable) -> Callable:
         """Decorator to register a new function.
 
+        Registered functions are stored in the database as references to the
+        function rather than pickled.
+
         Args:
             func (Callable): Function to be registered.
 
@@ -55,6 +99,7 @@ class Functional(dict):
             return partial(func, *args, **kwargs)
 
         self[func.__name__] = make_partial
+        registered_functions[f"{func.__module__}:{func.__qualname__}"] = func
         return func
 
     def __getattribute__(self, name: str) -> Any:
@@ -0,0 +1,97 @@
+"""Built-in navigate functions.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Callable, List
+
+from .base import Functional
+
+if TYPE_CHECKING:
+    from ..page import Page
+
+PageFactoryType = Callable[[int], "Page"]
+
+navigate = Functional()
+
+
+def lazy_branch(page_factory: PageFactoryType, n_pages: int) -> List["Page"]:
+    """Make a linear branch whose pages are built when the user first reaches them.
+
+    Long surveys normally create every page when the user starts, even though many
+    users drop out after a few pages. A lazy branch only creates its first page. Each
+    later page is created and added to the branch when the user goes forward to it, so
+    pages the user never reaches aren't stored in the database.
+
+    Args:
+        page_factory (PageFactoryType): Takes the index of a page in the branch and
+            returns the page. This should be a module-level function so it can be
+            stored with the pages. Pages created by the factory can't have navigate
+            functions.
+        n_pages (int): Number of pages in the branch.
+
+    Returns:
+        List[Page]: Branch. This contains only the first page until the user moves
+            through the branch.
+
+    Examples:
+
+        .. doctest::
+
+            >>> from hemlock import User, Page, create_test_app
+            >>> from hemlock.functional import lazy_branch
+            >>> from hemlock.questions import Label
+            >>> def make_page(index):
+            ...     return Page(Label(f"Page {index}"))
+            ...
+            >>> def seed():
+            ...     return lazy_branch(make_page, 100)
+            ...
+            >>> app = create_test_app()
+            >>> user = User.make_test_user(seed)
+            >>> len(user.get_tree().branch)
+            1
+            >>> len(user.test_request(direction="forward").branch)
+            2
+    """
+    if n_pages < 1:
+        raise ValueError(f"A lazy branch needs at least 1 page, got {n_pages}.")
+
+    return [_make_lazy_page(page_factory, 0, n_pages)]
+
+
+@navigate.register
+def build_next_page(
+    page: "Page", page_factory: PageFactoryType, index: int, n_pages: int
+) -> List["Page"]:
+    """Create the next page of a lazy branch and insert it after this page.
+
+    The next page is only created the first time the user goes forward from this
+    page.
+
+    Args:
+        page (Page): Current page of the lazy branch.
+        page_factory (PageFactoryType): Creates the pages of the lazy branch.
+        index (int): Index of the next page in the lazy branch.
+        n_pages (int): Number of pages in the lazy branch.
+
+    Returns:
+        List[Page]: An empty branch for this page. The next page is added to this
+            page's root branch instead of branching off this page.
+    """
+    next_page = _make_lazy_page(page_factory, index, n_pages)
+    page.root_branch.insert(page.index + 1, next_page)
+    # the next page exists now, so going back and forward again doesn't rebuild it
+    page.navigate = None
+    return []
+
+
+def _make_lazy_page(page_factory: PageFactoryType, index: int, n_pages: int) -> Page:
+    page = page_factory(index)
+    if page.navigate is not None:
+        raise ValueError(
+            f"Pages in a lazy branch can't have navigate functions, got {page}."
+        )
+
+    if index + 1 < n_pages:
+        page.navigate = navigate.build_next_page(page_factory, index + 1, n_pages)
+    return page
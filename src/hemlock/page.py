@@ -18,20 +18,20 @@ from typing import (
     Union,
 )
 
-from IPython import display
 from flask import render_template, request
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.ext.orderinglist import ordering_list
 from sqlalchemy.orm import validates
 from sqlalchemy_mutable.html import HTMLSettingType
 from sqlalchemy_mutable.types import (
-    HTMLSettingsType,
     MutablePickleType,
     MutableDictJSONType,
 )
 from sqlalchemy_mutable.utils import is_instance
 
-from ._custom_types import MutableListPickleType
+from ._custom_types import MutableFunctionType, MutableListFunctionType
+from ._html_settings import HTMLSettingsOverridesType, SharedHTMLSettings
+from ._metrics import record_time
 from ._navbar import Navbar, RawBrand, RawNavitem, convert_brand, convert_navitem
 from .app import db
 from .data import Data
@@ -40,6 +40,7 @@ from .timer import Timer
 from .utils.random import make_hash
 
 if TYPE_CHECKING:
+    from ._navigation_index import NavigationIndex
     from .questions.base import Question
 
 HASH_LENGTH = 10
@@ -127,7 +128,8 @@ class Page(db.Model):  # type: ignore
             function that takes a page and returns a direction.
         terminal (bool): Indicates that this is the last page of the survey.
         params (Any): Additional parameters.
-        html_settings (Mapping[str, HTMLSettingType]): HTML settings.
+        html_settings (SharedHTMLSettings): HTML settings. Only settings which differ
+            from the defaults are stored with the page.
         direction_from (Optional[str]): Direction which the user is navigating from
             this page. Either "forward", "back", or "invalid".
         direction_to (Optional[str]): Direction which the user navigated to this page.
@@ -215,10 +217,12 @@ class Page(db.Model):  # type: ignore
         """,
     )
 
-    _tree_id = db.Column(db.Integer, db.ForeignKey("tree.id"))
-    _tree_head_id = db.Column(db.Integer, db.ForeignKey("tree.id"))
+    _tree_id = db.Column(db.Integer, db.ForeignKey("tree.id"), index=True)
+    _tree_head_id = db.Column(db.Integer, db.ForeignKey("tree.id"), index=True)
+    _navigation_tree_id = db.Column(db.Integer, db.ForeignKey("tree.id"), index=True)
+    _navigation_tree = db.relationship("Tree", foreign_keys=_navigation_tree_id)
 
-    _branch_id = db.Column(db.Integer, db.ForeignKey("page.id"))
+    _branch_id = db.Column(db.Integer, db.ForeignKey("page.id"), index=True)
     branch = db.relationship(
         "Page",
         backref=db.backref("root", remote_side=[id]),
@@ -235,10 +239,10 @@ class Page(db.Model):  # type: ignore
         foreign_keys="Question._page_question_id",
     )
 
-    _prev_page_id = db.Column(db.Integer, db.ForeignKey("page.id"))
+    _prev_page_id = db.Column(db.Integer, db.ForeignKey("page.id"), index=True)
     prev_page = db.relationship("Page", foreign_keys=_prev_page_id, remote_side=[id])
 
-    _next_page_id = db.Column(db.Integer, db.ForeignKey("page.id"))
+    _next_page_id = db.Column(db.Integer, db.ForeignKey("page.id"), index=True)
     next_page = db.relationship("Page", foreign_keys=_next_page_id, remote_side=[id])
 
     data = db.relationship(
@@ -259,12 +263,24 @@ class Page(db.Model):  # type: ignore
     timer = db.relationship("Timer", uselist=False, foreign_keys="Timer._page_timer_id")
 
     # HTML attributes
-    hash = db.Column(db.String(HASH_LENGTH))
+    hash = db.Column(db.String(HASH_LENGTH), index=True)
     navbar = db.Column(MutableDictJSONType)
     back = db.Column(db.String)
     forward = db.Column(db.String)
     template = db.Column(db.String)
-    html_settings = db.Column(HTMLSettingsType)
+    _html_settings = db.Column("html_settings", HTMLSettingsOverridesType)
+
+    @property
+    def html_settings(self) -> SharedHTMLSettings:
+        return SharedHTMLSettings(self)
+
+    @html_settings.setter
+    def html_settings(self, settings: Mapping[str, HTMLSettingType]) -> None:
+        # overrides all of the default settings
+        self._html_settings = {
+            **copy.deepcopy(self.defaults["html_settings"]),
+            **dict(settings),
+        }
 
     @validates("navbar")
     def _validate_navbar(
@@ -294,10 +310,10 @@ class Page(db.Model):  # type: ignore
         return value  # type: ignore
 
     # Function attributes
-    compile = db.Column(MutableListPickleType)
-    submit = db.Column(MutableListPickleType)
-    navigate = db.Column(MutablePickleType)
-    test_direction = db.Column(MutablePickleType)
+    compile = db.Column(MutableListFunctionType)
+    submit = db.Column(MutableListFunctionType)
+    navigate = db.Column(MutableFunctionType)
+    test_direction = db.Column(MutableFunctionType)
 
     # Additional attributes
     params = db.Column(MutablePickleType)
@@ -339,6 +355,10 @@ class Page(db.Model):  # type: ignore
         if self.terminal:
             return True
 
+        index = self._get_navigation_index()
+        if index is not None:
+            return self.navigate is None and index.is_last(self.id)
+
         if self.tree is None and self.root is None:
             # this page is not connected to a tree or root page
             # this will most often occur during testing
@@ -357,6 +377,22 @@ class Page(db.Model):  # type: ignore
 
         return False
 
+    def _get_navigation_index(self) -> Optional[NavigationIndex]:
+        """Get the navigation index of the tree to which this page belongs.
+
+        Returns:
+            Optional[NavigationIndex]: Index. None if this page's tree has no
+                up-to-date index or this page is not in it.
+        """
+        if self.id is None or self._navigation_tree is None:
+            return None
+
+        index = self._navigation_tree.get_navigation_index()
+        if index is None or self.id not in index.positions:
+            return None
+
+        return index
+
     @hybrid_property
     def is_valid(self) -> bool:
         """Indicates that the user's responses to all questions on this page are valid.
@@ -421,7 +457,8 @@ class Page(db.Model):  # type: ignore
         self.terminal = terminal
         set_default_attribute("params", params, True)
 
-        self.html_settings = copy.deepcopy(self.defaults["html_settings"])
+        # only settings that differ from the defaults are stored
+        self._html_settings = {}
         if extra_html_settings is not None:
             self.html_settings.update_settings(extra_html_settings)  # type: ignore
 
@@ -500,6 +537,8 @@ class Page(db.Model):  # type: ignore
             div_class = self.html_settings["div"]["class"].copy()
             self.html_settings["div"]["class"].remove("min-vh-100")
 
+        from IPython import display
+
         return_value = display.HTML(self.render(for_notebook_display=True))
 
         if vh_100:
@@ -540,10 +579,12 @@ class Page(db.Model):  # type: ignore
             str: Rendered HTML.
         """
         if self.direction_to in ("forward", None) or self.rerun_compile_functions:
-            [func(self) for func in self.compile]
-            [question.run_compile_functions() for question in self.questions]
+            with record_time("compile", self):
+                [func(self) for func in self.compile]
+                [question.run_compile_functions() for question in self.questions]
 
-        html = self.render(for_notebook_display)
+        with record_time("render_template", self):
+            html = self.render(for_notebook_display)
         self.timer.start()
         return html
 
@@ -564,21 +605,24 @@ class Page(db.Model):  # type: ignore
         if self.direction_from == "forward":
             # validate user responses
             self.clear_feedback()
-            for question in self.questions:
-                question.run_validate_functions()
+            with record_time("validate", self):
+                for question in self.questions:
+                    question.run_validate_functions()
 
             if self.is_valid:
                 # record data and run submit and navigate functions
                 for question in self.questions:
                     question.record_data()
 
-                for func in self.submit:
-                    func(self)
-                for question in self.questions:
-                    question.run_submit_functions()
+                with record_time("submit", self):
+                    for func in self.submit:
+                        func(self)
+                    for question in self.questions:
+                        question.run_submit_functions()
 
                 if self.navigate is not None:
-                    branch = self.navigate(self)
+                    with record_time("navigate", self):
+                        branch = self.navigate(self)
                     if not is_instance(branch, list):
                         branch = [branch]
                     self.branch = branch
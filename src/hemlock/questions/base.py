@@ -7,24 +7,41 @@ import textwrap
 from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, Union
 
 from flask import render_template, request
+from sqlalchemy import event
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import validates
 from sqlalchemy_mutable.html import HTMLSettingType
-from sqlalchemy_mutable.types import (
-    HTMLSettingsType,
-    MutableJSONType,
-    MutablePickleType,
-)
+from sqlalchemy_mutable.types import MutableJSONType, MutablePickleType
 from sqlalchemy_mutable.utils import get_object, is_instance
 
-from .._custom_types import MutableListJSONType, MutableListPickleType
+from .._custom_types import (
+    MutableFunctionType,
+    MutableListFunctionType,
+    MutableListJSONType,
+)
+from .._html_settings import HTMLSettingsOverridesType, SharedHTMLSettings
 from ..app import db
 from ..data import Data
 from ..page import Page
+from ..utils.cache import LRUCache
 from ..utils.format import convert_markdown
 from ..utils.random import make_hash
 
 HASH_LENGTH = 10
+# attributes that don't affect the question's HTML, so changing them doesn't
+# invalidate the cached HTML
+NON_HTML_ATTRIBUTES = {
+    "_broadcast_interval",
+    "_html_version",
+    "compile",
+    "validate",
+    "submit",
+    "test_response",
+    "data",
+}
+
+# rendered HTML shared across requests, keyed by question id and HTML version
+question_html_cache = LRUCache(maxsize=1024)
 
 CompileType = Callable[["Question"], None]
 SubmitType = Callable[["Question"], None]
@@ -89,7 +106,13 @@ class Question(Data):
             different format or data type for validation and other purposes. Read only.
         feedback (str): Feedback on the user's response.
         is_valid (bool): Indicates that the user's response was valid.
-        html_settings (HTMLSettings): HTML settings used by the jinja template.
+        html_settings (SharedHTMLSettings): HTML settings used by the jinja template.
+            Only settings which differ from the defaults are stored with the question.
+
+    Notes:
+
+        The rendered HTML is cached and reused until an attribute that affects it
+        changes (e.g., the label, the user's response, or the HTML settings).
     """
 
     id = db.Column(db.Integer, db.ForeignKey("data.id"), primary_key=True)
@@ -119,10 +142,10 @@ class Question(Data):
         },
     )
 
-    _page_question_id = db.Column(db.Integer, db.ForeignKey("page.id"))
+    _page_question_id = db.Column(db.Integer, db.ForeignKey("page.id"), index=True)
 
     # HTML attributes
-    hash = db.Column(db.String(HASH_LENGTH))
+    hash = db.Column(db.String(HASH_LENGTH), index=True)
     label = db.Column(db.Text)
     floating_label = db.Column(db.String)
     template = db.Column(db.String)
@@ -131,7 +154,24 @@ class Question(Data):
     feedback = db.Column(db.Text)
     _is_valid = db.Column(db.Boolean)
     form_text = db.Column(db.Text)
-    html_settings = db.Column(HTMLSettingsType)
+    _html_settings = db.Column("html_settings", HTMLSettingsOverridesType)
+
+    @property
+    def html_settings(self) -> SharedHTMLSettings:
+        return SharedHTMLSettings(self)
+
+    @html_settings.setter
+    def html_settings(self, settings: Mapping[str, HTMLSettingType]) -> None:
+        # overrides all of the default settings
+        self._html_settings = {
+            **copy.deepcopy(self.defaults["html_settings"]),
+            **dict(settings),
+        }
+
+    # changes whenever an attribute that affects the HTML changes
+    _html_version = db.Column(db.String(HASH_LENGTH))
+    # milliseconds between broadcasts of the HTML (see recompile_at_interval)
+    _broadcast_interval = db.Column(db.Integer)
 
     @validates("label", "form_text", "feedback")
     def _validates_text(self, key: str, value: Optional[str]) -> Optional[str]:
@@ -142,10 +182,10 @@ class Question(Data):
         return self._is_valid
 
     # Function attributes
-    compile = db.Column(MutableListPickleType)
-    validate = db.Column(MutableListPickleType)
-    submit = db.Column(MutableListPickleType)
-    test_response = db.Column(MutablePickleType)
+    compile = db.Column(MutableListFunctionType)
+    validate = db.Column(MutableListFunctionType)
+    submit = db.Column(MutableListFunctionType)
+    test_response = db.Column(MutableFunctionType)
 
     # Additional attributes
     default = db.Column(MutableJSONType)
@@ -175,7 +215,8 @@ class Question(Data):
     ):
         self.hash = make_hash(HASH_LENGTH)
 
-        self.html_settings = copy.deepcopy(self.defaults["html_settings"])
+        # only settings that differ from the defaults are stored
+        self._html_settings = {}
         if extra_html_settings is not None:
             self.html_settings.update_settings(extra_html_settings)  # type: ignore
 
@@ -278,13 +319,16 @@ class Question(Data):
             class_name (str): Class to add.
             add (bool): Indicates that the classes should be added.
         """
+        # check the (possibly default) classes first so that the tag's settings are
+        # only copied from the defaults if they change
+        if (class_name in self.html_settings.get(tag_name)["class"]) is add:
+            return
+
         classes = self.html_settings[tag_name]["class"]
         if add:
-            if class_name not in classes:
-                classes.append(class_name)
+            classes.append(class_name)
         else:
-            if class_name in classes:
-                classes.remove(class_name)
+            classes.remove(class_name)
 
     def run_compile_functions(self) -> None:
         """Run the compile functions."""
@@ -293,9 +337,29 @@ class Question(Data):
     def render(self) -> str:
         """Render the HTML.
 
+        The HTML of questions in the database is cached in ``question_html_cache``
+        until an attribute that affects it changes.
+
         Returns:
             str: HTML.
         """
+        if self.id is None or self._html_version is None:
+            return self._render()
+
+        return question_html_cache.get_or_set(
+            (self.id, self._html_version), self._render
+        )
+
+    def _render(self) -> str:
+        return render_template(self.template, question=self, **self.render_markdown())
+
+    def render_markdown(self) -> Dict[str, Optional[str]]:
+        """Convert the markdown text displayed with this question to HTML.
+
+        Returns:
+            Dict[str, Optional[str]]: Maps the label, feedback, and form text to their
+                HTML. Values are None if the question doesn't have the text.
+        """
 
         def render_markdown(text, strip_last_paragraph=False):
             if text is None:
@@ -303,13 +367,11 @@ class Question(Data):
 
             return convert_markdown(text, strip_last_paragraph=strip_last_paragraph)
 
-        return render_template(
-            self.template,
-            question=self,
-            label=render_markdown(self.label),
-            feedback=render_markdown(self.feedback, True),
-            form_text=render_markdown(self.form_text, True),
-        )
+        return {
+            "label": render_markdown(self.label),
+            "feedback": render_markdown(self.feedback, True),
+            "form_text": render_markdown(self.form_text, True),
+        }
 
     def record_response(self) -> None:
         """Record the user's response."""
@@ -365,3 +427,34 @@ class Question(Data):
             Any: Raw test response.
         """
         return "" if response is None else response
+
+
+@event.listens_for(Question, "mapper_configured", propagate=True)
+def _track_html_changes(mapper: Any, cls: type) -> None:
+    # change the HTML version when an attribute that affects the HTML is set or
+    # mutated (sqlalchemy_mutable flags mutations as modifications of the root
+    # attribute)
+    for prop in mapper.column_attrs:
+        if prop.key not in NON_HTML_ATTRIBUTES:
+            attribute = getattr(cls, prop.key)
+            event.listen(attribute, "set", _set_html_version_on_change)
+            event.listen(attribute, "modified", _set_html_version)
+
+
+def _set_html_version_on_change(
+    question: Question, value: Any, oldvalue: Any, *args: Any
+) -> None:
+    # e.g., Page.post resets every question's feedback, which is usually None already
+    try:
+        unchanged = value is oldvalue or bool(value == oldvalue)
+    except (TypeError, ValueError):  # e.g., arrays, which compare elementwise
+        unchanged = False
+
+    if not unchanged:
+        _set_html_version(question)
+
+
+def _set_html_version(question: Question, *args: Any) -> None:
+    # a random version, rather than a counter, so a version that was rolled back is
+    # never reused for different HTML
+    question._html_version = make_hash(HASH_LENGTH)
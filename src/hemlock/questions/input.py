@@ -74,10 +74,12 @@ class Input(Question):
     def input_tag(self) -> HTMLAttrType:
         """Attributes of the HTML input tag.
 
+        Read-only; modify them with ``html_settings["input"]``.
+
         Returns:
             HTMLAttrType: HTML attributes.
         """
-        return self.html_settings["input"]
+        return self.html_settings.get("input")
 
     @hybrid_property
     def response(self) -> Any:
@@ -85,7 +87,7 @@ class Input(Question):
         if self.raw_response in ("", None):
             return None
 
-        input_type = self.input_tag.get("type", TEXT_INPUT_TYPE)
+        input_type = self.html_settings.get("input").get("type", TEXT_INPUT_TYPE)
 
         if input_type == NUMBER_INPUT_TYPE:
             return float(self.raw_response)
@@ -101,7 +103,7 @@ class Input(Question):
     ):
         super().__init__(*args, **kwargs)
         if input_tag is not None:
-            self.input_tag.update_attrs(input_tag)
+            self.html_settings["input"].update_attrs(input_tag)
 
     def set_is_valid(self, is_valid: bool = None) -> None:
         """See :meth:`hemlock.questions.base.Question.set_is_valid`.
@@ -119,7 +121,7 @@ class Input(Question):
         Additionally, this method validates that the user's response matches the input
         type.
         """
-        input_type = self.input_tag.get("type", TEXT_INPUT_TYPE)
+        input_type = self.html_settings.get("input").get("type", TEXT_INPUT_TYPE)
 
         # tests if the raw response can be converted to the expected type
         try:
@@ -156,7 +158,7 @@ class Input(Question):
         if response is None:
             return ""
 
-        input_type = self.input_tag.get("type", TEXT_INPUT_TYPE)
+        input_type = self.html_settings.get("input").get("type", TEXT_INPUT_TYPE)
 
         # make sure the raw response is in the expected format
         if input_type == NUMBER_INPUT_TYPE:
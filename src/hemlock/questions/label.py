@@ -3,8 +3,9 @@
 from __future__ import annotations
 
 import copy
+from typing import Dict, Optional
 
-from flask import render_template, request
+from flask import request
 
 from ..app import db
 from ..utils.format import convert_markdown
@@ -26,16 +27,16 @@ class Label(Question):
     # question below to respond to
     defaults["html_settings"]["label"]["class"].remove("form-label")  # type: ignore
 
-    def render(self) -> str:  # pylint disable=missing-function-docstring
+    def render_markdown(
+        self,
+    ) -> Dict[str, Optional[str]]:  # pylint disable=missing-function-docstring
         # renders the label, stripping the last <p> tag from the label text for a
         # cleaner look
-        return render_template(
-            self.template,
-            question=self,
-            label=None
+        return {
+            "label": None
             if self.label is None
-            else convert_markdown(self.label, strip_last_paragraph=True),
-        )
+            else convert_markdown(self.label, strip_last_paragraph=True)
+        }
 
     def make_raw_test_response(
         self, response: str = None
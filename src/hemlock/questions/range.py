@@ -41,10 +41,12 @@ class Range(Question):
     def input_tag(self) -> HTMLAttrType:
         """Attributes of the HTML input tag.
 
+        Read-only; modify them with ``html_settings["input"]``.
+
         Returns:
             HTMLAttrType: HTML attributes.
         """
-        return self.html_settings["input"]
+        return self.html_settings.get("input")
 
     @hybrid_property
     def response(self) -> Optional[float]:
@@ -59,7 +61,7 @@ class Range(Question):
             render_template("hemlock/range.js", question=self)
         )
         if input_tag is not None:
-            self.input_tag.update_attrs(input_tag)
+            self.html_settings["input"].update_attrs(input_tag)
 
     def make_raw_test_response(self, response: float) -> str:
         """See :meth:`hemlock.questions.base.Question.make_raw_test_response`."""
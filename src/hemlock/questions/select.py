@@ -18,7 +18,8 @@ class Select(ChoiceQuestion):
     Subclasses :class:`hemlock.questions.choice_base.ChoiceQuestion`.
 
     Attributes:
-        select_tag (HTMLAttrsType): Attributes of the HTML select tag.
+        select_tag (HTMLAttrsType): Attributes of the HTML select tag. Read-only;
+            modify them with ``html_settings["select"]``.
     """
 
     id = db.Column(db.Integer, db.ForeignKey("question.id"), primary_key=True)
@@ -30,7 +31,7 @@ class Select(ChoiceQuestion):
 
     @property
     def select_tag(self) -> HTMLAttrType:
-        return self.html_settings["select"]
+        return self.html_settings.get("select")
 
     def set_is_valid(self, is_valid: bool = None) -> None:
         """See :meth:`hemlock.questions.base.Question.set_is_valid`.
@@ -29,7 +29,8 @@ class Textarea(Question):
         **kwargs (Any): Passed to :class:`hemlock.questions.base.Question` constructor.
 
     Attributes:
-        textarea_tag (HTMLAttrsType): Attributes of the HTML textarea tag.
+        textarea_tag (HTMLAttrsType): Attributes of the HTML textarea tag. Read-only;
+            modify them with ``html_settings["textarea"]``.
 
     Examples:
         In addition to requiring a certain input length, we can require a certain number
@@ -58,7 +59,7 @@ class Textarea(Question):
 
     @property
     def textarea_tag(self):
-        return self.html_settings["textarea"]
+        return self.html_settings.get("textarea")
 
     def __init__(
         self,
@@ -71,7 +72,7 @@ class Textarea(Question):
             render_template("hemlock/textarea.js", question=self)
         )
         if textarea_tag is not None:
-            self.textarea_tag.update_attrs(textarea_tag)
+            self.html_settings["textarea"].update_attrs(textarea_tag)
 
     def set_is_valid(self, is_valid: bool = None) -> None:
         """See :meth:`hemlock.questions.base.Question.set_is_valid`.
@@ -0,0 +1,11 @@
+$(document).ready(function(){
+    var socket = io({transports: ["websocket"]});
+    socket.on("connect", function(){
+        // rejoin the room after reconnecting
+        socket.emit("join-recompile-room-event", {data: "{{ hash }}"});
+    })
+
+    socket.on("recompile-question-response", function(response){
+        $("#{{ hash }}-card").replaceWith(response.data);
+    })
+})
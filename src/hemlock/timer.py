@@ -43,7 +43,7 @@ class Timer(Data):
     id = db.Column(db.Integer, db.ForeignKey("data.id"), primary_key=True)
     __mapper_args__ = {"polymorphic_identity": "timer"}
 
-    _page_timer_id = db.Column(db.Integer, db.ForeignKey("page.id"))
+    _page_timer_id = db.Column(db.Integer, db.ForeignKey("page.id"), index=True)
 
     is_running = db.Column(db.Boolean)
     start_time = db.Column(db.DateTime)
@@ -3,24 +3,38 @@
 from __future__ import annotations
 
 import textwrap
-from typing import TYPE_CHECKING, Any, Callable, List, Union, TypeVar
+from typing import TYPE_CHECKING, Any, Callable, List, Optional, Union, TypeVar
 
-import matplotlib.pyplot as plt
-from IPython import display
-from flask import render_template, request, url_for
+from flask import current_app, render_template, request, url_for
+from sqlalchemy import event
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.ext.orderinglist import ordering_list
+from sqlalchemy.orm import object_session
 from werkzeug.wrappers.response import Response
 
-from ._display_navigation import display_navigation
+from ._cached_data import cache_page_data
+from ._metrics import record_time
+from ._navigation_index import NavigationIndex, walk_branch
+from ._page_html_cache import get_cached_page_html, set_cached_page_html
+from ._request_lock import single_transaction_requests
 from .app import db, static_pages
 from .page import Page
 from .utils import redirect
+from .utils.cache import LRUCache
+from .utils.random import make_hash
 
 if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
+
     from .page import Page
 
 TreeType = TypeVar("TreeType", bound="Tree")
+# length of the version stored with each navigation index
+NAVIGATION_INDEX_VERSION_LENGTH = 10
+
+# maps (tree id, index version) to navigation indexes, so each worker only loads an
+# index from its JSON once
+navigation_index_cache = LRUCache(maxsize=1024)
 
 
 class Tree(db.Model):
@@ -48,7 +62,7 @@ class Tree(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
 
-    _user_id = db.Column(db.Integer, db.ForeignKey("user.id"))
+    _user_id = db.Column(db.Integer, db.ForeignKey("user.id"), index=True)
 
     branch = db.relationship(
         "Page",
@@ -64,8 +78,9 @@ class Tree(db.Model):
     _url_rule = db.Column(db.String)
     request_in_progress = db.Column(db.Boolean, default=False)
     prev_request_method = db.Column(db.String(4))
-    cached_page_html = db.Column(db.Text)
+    _cached_page_html = db.Column("cached_page_html", db.Text)
     index = db.Column(db.Integer)
+    _navigation_index = db.Column(db.JSON)
 
     @hybrid_property
     def url_rule(self) -> str:
@@ -79,6 +94,25 @@ class Tree(db.Model):
 
         return url_for(f"hemlock.{self._seed_func_name}")
 
+    @property
+    def cached_page_html(self) -> str:
+        """HTML of the current page from the user's last GET request.
+
+        The HTML is stored in the page HTML cache (see ``PAGE_HTML_CACHE``). If it's
+        not in the cache, the current page is rendered without rerunning its compile
+        functions.
+        """
+        html = get_cached_page_html(
+            self, current_app.config["PAGE_HTML_CACHE_DATABASE_FALLBACK"]
+        )
+        return self.page.render() if html is None else html
+
+    @cached_page_html.setter
+    def cached_page_html(self, html: str) -> None:
+        set_cached_page_html(
+            self, html, current_app.config["PAGE_HTML_CACHE_DATABASE_FALLBACK"]
+        )
+
     def __init__(
         self,
         seed_func: Callable[[], Union[Page, List[Page]]],
@@ -117,10 +151,115 @@ class Tree(db.Model):
                 to 1200.
             **subplots_kwargs (Any): Keyword arguments for ``plt.subplots``.
         """
+        # notebook dependencies are imported here so they aren't loaded by servers
+        import matplotlib.pyplot as plt
+        from IPython import display
+
+        from ._display_navigation import display_navigation
+
         ax = display_navigation(self, ax, node_size, **subplots_kwargs)
         plt.show()
         display.display(self.page.display())
 
+    def get_navigation_index(self) -> Optional[NavigationIndex]:
+        """Get the index of this tree's pages in navigation order.
+
+        The index is built the first time it's needed and stored with the tree. When a
+        page's branch changes, only the part of the index under that page is rebuilt.
+
+        Loading a stored index takes time proportional to the number of pages in the
+        tree. Each saved index has a version, so loaded indexes are cached in
+        ``navigation_index_cache`` and each worker only loads each version once.
+        Indexes whose pages' branches changed are always loaded from the database.
+
+        Returns:
+            Optional[NavigationIndex]: Index. None if this tree or some of its pages
+                have not been flushed to the database.
+        """
+        if self.id is None:
+            return None
+
+        if self._navigation_index is None:
+            entries = list(walk_branch(self.branch))
+            if any(page.id is None for page, _ in entries):
+                return None
+
+            index = NavigationIndex(
+                [page.id for page, _ in entries], [depth for _, depth in entries]
+            )
+            for page, _ in entries:
+                page._navigation_tree_id = self.id
+            self._save_navigation_index(index)
+            return index
+
+        cached_json, index = getattr(self, "_cached_navigation_index", (None, None))
+        if cached_json is not self._navigation_index:
+            index = self._load_navigation_index()
+            self._cached_navigation_index = self._navigation_index, index
+
+        if not index.stale:
+            return index
+
+        session = object_session(self) or db.session
+        stale = sorted(
+            (page_id for page_id in index.stale if page_id in index.positions),
+            key=index.positions.get,
+        )
+        while stale:
+            page_id = stale.pop(0)
+            if page_id not in index.positions:
+                # the page was removed when re-indexing the branch of a page above it
+                continue
+
+            page = session.get(Page, page_id)
+            added_pages = [] if page is None else index.splice_branch(page)
+            if added_pages is None:
+                index.stale = [page_id] + stale
+                self._save_navigation_index(index)
+                return None
+
+            for page in added_pages:
+                page._navigation_tree_id = self.id
+
+        index.stale = []
+        self._save_navigation_index(index)
+        return index
+
+    def _load_navigation_index(self) -> NavigationIndex:
+        # stale indexes are re-indexed in place, so they aren't shared across sessions
+        version = self._navigation_index.get("version")
+        if version is None or self._navigation_index.get("stale"):
+            return NavigationIndex.from_json(self._navigation_index)
+
+        return navigation_index_cache.get_or_set(
+            (self.id, version),
+            lambda: NavigationIndex.from_json(self._navigation_index),
+        )
+
+    def _save_navigation_index(self, index: NavigationIndex) -> None:
+        # assign a new object so SQLAlchemy detects the change
+        version = make_hash(NAVIGATION_INDEX_VERSION_LENGTH)
+        self._navigation_index = {**index.to_json(), "version": version}
+        self._cached_navigation_index = self._navigation_index, index
+        if not index.stale:
+            navigation_index_cache.set((self.id, version), index)
+
+    def _mark_navigation_index_stale(self, page: Page) -> None:
+        """Mark that the branch of a page in this tree's navigation index changed.
+
+        Args:
+            page (Page): Page whose branch changed.
+        """
+        if self._navigation_index is None:
+            return
+
+        stale = set(self._navigation_index.get("stale", []))
+        if page.id not in stale:
+            self._navigation_index = {
+                **self._navigation_index,
+                "stale": sorted(stale | {page.id}),
+            }
+
     def go_forward(self: TreeType) -> TreeType:
         """Go forward from the current page.
 
@@ -134,6 +273,16 @@ class Tree(db.Model):
             self.page = self.page.next_page
             return self
 
+        index = self.get_navigation_index()
+        if index is not None and self.page.id in index.positions:
+            next_id = index.get_next_id(self.page.id)
+            if next_id is None:
+                raise RuntimeError(
+                    f"Cannot find a page to go forward to from \n{self.page}."
+                )
+            self.page = db.session.get(Page, next_id)
+            return self
+
         if self.page.branch:
             self.page = self.page.branch[0]
             return self
@@ -161,6 +310,16 @@ class Tree(db.Model):
             self.page = self.page.prev_page
             return self
 
+        index = self.get_navigation_index()
+        if index is not None and self.page.id in index.positions:
+            prev_id = index.get_prev_id(self.page.id)
+            if prev_id is None:
+                raise RuntimeError(
+                    f"Cannot find a page to go back to from \n{self.page}"
+                )
+            self.page = db.session.get(Page, prev_id)
+            return self
+
         if self.page is self.page.root_branch[0]:
             if self.page.root is None:
                 raise RuntimeError(
@@ -213,9 +372,12 @@ class Tree(db.Model):
                 )
             return self.cached_page_html
 
-        self.request_in_progress = True
         self.prev_request_method = request.method
-        db.session.commit()
+        if not single_transaction_requests():
+            # otherwise, the user is locked until the request's transaction commits
+            self.request_in_progress = True
+            with record_time("commit", self.page):
+                db.session.commit()
 
         # handle GET request
         if request.method == "GET":
@@ -227,6 +389,7 @@ class Tree(db.Model):
         # handle POST request
         direction_from = self.page.post()
         if direction_from == "forward":
+            cache_page_data(self, self.page)
             self.go_forward()
         elif direction_from == "back":
             self.go_back()
@@ -235,3 +398,24 @@ class Tree(db.Model):
         self.request_in_progress = False
         self.redirecting = True
         return redirect(self.url_rule)
+
+
+@event.listens_for(Page.branch, "append")
+@event.listens_for(Page.branch, "remove")
+def _mark_branch_changed(page: Page, *args: Any) -> None:
+    # only pages that are already in a tree's navigation index need to be re-indexed
+    session = object_session(page)
+    if session is None or page.id is None:
+        return
+
+    with session.no_autoflush:
+        if page._navigation_tree_id is not None:
+            tree = session.get(Tree, page._navigation_tree_id)
+            if tree is not None:
+                tree._mark_navigation_index_stale(page)
+
+
+@event.listens_for(Tree.branch, "append")
+@event.listens_for(Tree.branch, "remove")
+def _reset_navigation_index(tree: Tree, *args: Any) -> None:
+    tree._navigation_index = None
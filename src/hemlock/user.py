@@ -12,35 +12,49 @@ from typing import (
     Any,
     Callable,
     Dict,
+    Iterator,
     List,
     Mapping,
     Optional,
+    Sequence,
     Tuple,
     Type,
     TypeVar,
     Union,
 )
 
-import pandas as pd
-from flask import current_app, request
+from flask import Flask, current_app, request
 from flask_login import UserMixin, current_user, login_required, login_user
+from sqlalchemy import event
+from sqlalchemy.engine import Connection
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.ext.orderinglist import ordering_list
-from sqlalchemy.orm import validates
+from sqlalchemy.inspection import inspect
+from sqlalchemy.orm import joinedload, selectinload, validates, with_polymorphic
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.types import JSON
 from sqlalchemy_mutable.types import MutablePickleType, MutableDictJSONType
 from sqlalchemy_mutable.utils import get_object, is_callable
 from werkzeug.wrappers.response import Response
 
-from ._data_frame import DataFrame
-from .app import bp, db, login_manager
+from ._bulk_insert import reserve_primary_keys
+from ._cached_data import CachedPageData
+from ._data_frame import ColumnDataFrame, DataFrame
+from ._load_testing import LoadTestResults, run_load_test
+from ._metrics import record_time, set_url_rule
+from ._navigation_index import walk_branch
+from ._request_lock import lock_user, single_transaction_requests
+from ._status_aggregates import get_status_key, update_status_counts
+from .app import bp, create_app, db, login_manager
 from .data import Data
+from .page import Page
+from .questions.base import Question
 from .tree import Tree
 from .utils.random import make_hash
 
 if TYPE_CHECKING:  # pragma: no cover
-    from .page import Page
-    from .questions.base import Question
+    import pandas as pd
+    import pyarrow as pa
 
 HASH_LENGTH = 90
 
@@ -62,7 +76,57 @@ def load_user(user_id: int) -> User:
     Returns:
         User: Loaded user.
     """
-    return User.query.get(user_id)
+    if single_transaction_requests():
+        # lock before loading so the user's state can't change during the request
+        lock_user(int(user_id))
+    return User.query.options(*get_request_loader_options()).get(user_id)
+
+
+def get_request_loader_options(strategy: str = None) -> List[Any]:
+    """Get loader options for the objects a request needs.
+
+    Processing a request touches each of the user's trees, their branches, the current
+    page of each tree, and the current page's timer, data, questions, branch, and
+    root. With the "selectin" strategy, collections are loaded with one
+    ``SELECT ... IN`` query each, scalar relationships are joined, and questions are
+    loaded with all of their subclass tables. Joining the collections instead would
+    return one row per combination of a page's branch pages, data, and questions. The
+    "lazy" strategy loads each object when it is first accessed.
+
+    Args:
+        strategy (str, optional): "lazy" or "selectin". If None, this is the
+            ``PAGE_LOADING_STRATEGY`` configuration value. Defaults to None.
+
+    Raises:
+        ValueError: If the strategy is not recognized.
+
+    Returns:
+        List[Any]: Loader options for a query of users.
+    """
+    if strategy is None:
+        strategy = current_app.config["PAGE_LOADING_STRATEGY"]
+
+    if strategy == "lazy":
+        return []
+
+    if strategy != "selectin":
+        raise ValueError(
+            f"Unknown page loading strategy {strategy!r}. Use 'lazy' or 'selectin'."
+        )
+
+    questions = with_polymorphic(Question, "*", flat=True)
+    return [
+        selectinload(User.trees).options(
+            selectinload(Tree.branch),
+            joinedload(Tree.page).options(
+                joinedload(Page.timer),
+                joinedload(Page.root),
+                selectinload(Page.data),
+                selectinload(Page.branch),
+                selectinload(Page.questions.of_type(questions)),
+            ),
+        )
+    ]
 
 
 class User(UserMixin, db.Model):
@@ -126,7 +190,17 @@ class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
 
     trees = db.relationship(
-        "Tree", order_by="Tree.index", collection_class=ordering_list("index")
+        "Tree",
+        backref="user",
+        order_by="Tree.index",
+        collection_class=ordering_list("index"),
+    )
+
+    _cached_page_data = db.relationship(
+        "CachedPageData",
+        backref="user",
+        order_by="CachedPageData.sort_key",
+        cascade="all, delete-orphan",
     )
 
     data = db.relationship(
@@ -210,6 +284,8 @@ class User(UserMixin, db.Model):
     meta_data = db.Column(MutableDictJSONType)
     errored = db.Column(db.Boolean)
     _cached_data = db.Column(JSON)
+    # identifies the status counts to which the user contributes
+    _status_key = db.Column(db.String, index=True)
 
     _completed = db.Column(db.Boolean)
 
@@ -267,9 +343,10 @@ class User(UserMixin, db.Model):
         # will be available in the seed functions
         db.session.add(self)
         db.session.commit()
-        self._cached_data = self.get_data(to_pandas=False)
         login_user(self)
         self.trees = [Tree(func) for _, func in self._seed_funcs.values()]
+        # lets the trees' pages and questions be inserted in batches
+        reserve_primary_keys(db.session, db.session.new)
 
     def __repr__(self):
         return f"<{self.__class__.__qualname__} {self.get_meta_data(True)}>"
@@ -335,8 +412,18 @@ class User(UserMixin, db.Model):
 
         Returns:
             Union[pd.DataFrame, DataFrame]: User's data.
+
+        Notes:
+
+            Users' data are cached when they complete or fail the study. Before then,
+            the cached data are assembled from the data of each page the user
+            submitted. These data are cached when the user submits the page.
         """
-        if use_cached_data and self._cached_data is not None:
+        if (
+            use_cached_data
+            and (self.completed or self.failed)
+            and self._cached_data is not None
+        ):
             df = self._cached_data
         else:
             meta_data = self.get_meta_data(convert_to_string=True)
@@ -345,15 +432,177 @@ class User(UserMixin, db.Model):
             for item in self.data:
                 if item.variable:
                     df.add_data(item.pack_data(), item.fill_rows)
-            [df.add_branch(tree.branch) for tree in self.trees]
+            if use_cached_data:
+                [cached_page.add_to(df) for cached_page in self._cached_page_data]
+            else:
+                [df.add_branch(tree.branch) for tree in self.trees]
             df.pad()
 
-        return pd.DataFrame(df) if to_pandas else df
+        if to_pandas:
+            import pandas as pd
+
+            return pd.DataFrame(df)
+        return df
+
+    @classmethod
+    def iter_batches(
+        cls: Type[UserType], batch_size: int = None, options: Sequence[Any] = ()
+    ) -> Iterator[List[UserType]]:
+        """Iterate over all users in batches.
+
+        Users are paginated by id, so each batch costs a single query no matter how
+        many users came before it. Once a batch is finished, objects loaded while it
+        was processed are expunged from the session to keep memory bounded. Objects
+        that were already in the session or have unflushed changes are kept.
+
+        Args:
+            batch_size (int, optional): Number of users per batch. If None, this is
+                the ``USER_BATCH_SIZE`` configuration value. Defaults to None.
+            options (Sequence[Any], optional): Loader options applied to the query for
+                each batch. Defaults to ().
+
+        Yields:
+            List[UserType]: Batch of users, ordered by id.
+        """
+        if batch_size is None:
+            batch_size = current_app.config["USER_BATCH_SIZE"]
+
+        session = db.session()
+        preloaded_keys = set(session.identity_map.keys())
+        last_id = None
+        while True:
+            query = cls.query.options(*options).order_by(cls.id)
+            if last_id is not None:
+                query = query.filter(cls.id > last_id)
+            batch = query.limit(batch_size).all()
+            if not batch:
+                return
+
+            last_id = batch[-1].id
+            yield batch
+
+            if any(inspect(user).key in preloaded_keys for user in batch):
+                # related objects may have been loaded into collections of objects the
+                # caller is still using, so they must stay in the session
+                continue
+
+            for key in set(session.identity_map.keys()) - preloaded_keys:
+                obj = session.identity_map.get(key)
+                if obj is not None and not inspect(obj).modified:
+                    session.expunge(obj)
+
+    @staticmethod
+    def iter_all_data(refresh_if_in_progress: bool = False) -> Iterator[DataFrame]:
+        """Iterate over the data for all users, one user at a time.
+
+        Args:
+            refresh_if_in_progress (bool, optional): Refresh data for in progress users
+                when getting their data. Setting this to True can greatly increase the
+                runtime. Defaults to False.
+
+        Yields:
+            DataFrame: Data for a single user.
+        """
+        options = [selectinload(User.data), selectinload(User._cached_page_data)]
+        for users in User.iter_batches(options=options):
+            if refresh_if_in_progress:
+                User._load_data_relationships(
+                    [user.id for user in users if user.in_progress]
+                )
+
+            for user in users:
+                if refresh_if_in_progress and user.in_progress:
+                    yield user.get_data(to_pandas=False, use_cached_data=False)
+                else:
+                    yield user.get_data(to_pandas=False)
+
+    @staticmethod
+    def _load_data_relationships(user_ids: List[int]) -> None:
+        """Eagerly load the relationships needed to re-collect the users' data.
+
+        Pages' branches are loaded one level at a time, so the number of queries
+        depends on how deeply branches are nested, not on the number of pages.
+
+        Args:
+            user_ids (List[int]): Ids of the users whose relationships to load.
+        """
+        if not user_ids:
+            return
+
+        branch_loader = selectinload(User.trees).selectinload(Tree.branch)
+        users = (
+            User.query.filter(User.id.in_(user_ids))
+            .options(
+                selectinload(User.data),
+                branch_loader.selectinload(Page.timer),
+                branch_loader.selectinload(Page.data),
+                branch_loader.selectinload(Page.questions),
+            )
+            .all()
+        )
+        pages = [page for user in users for tree in user.trees for page in tree.branch]
+        while pages:
+            pages = User._load_branches(pages)
+
+    @staticmethod
+    def _load_branches(pages: List[Page]) -> List[Page]:
+        """Eagerly load the branches of pages whose branches haven't been loaded.
+
+        Args:
+            pages (List[Page]): Pages.
+
+        Returns:
+            List[Page]: Pages on the loaded branches.
+        """
+        pages = [page for page in pages if "branch" in inspect(page).unloaded]
+        if not pages:
+            return []
+
+        branch_pages = (
+            Page.query.filter(Page._branch_id.in_([page.id for page in pages]))
+            .options(
+                selectinload(Page.timer),
+                selectinload(Page.data),
+                selectinload(Page.questions),
+            )
+            .order_by(Page.index)
+            .all()
+        )
+        branches: Dict[int, List[Page]] = defaultdict(list)
+        for page in branch_pages:
+            branches[page._branch_id].append(page)
+        for page in pages:
+            set_committed_value(page, "branch", branches[page.id])
+
+        return branch_pages
+
+    @staticmethod
+    def get_all_data_columns(refresh_if_in_progress: bool = False) -> List[str]:
+        """Get the variable names for all users' data.
+
+        Variable names are ordered as they would be in :meth:`User.get_all_data`. This
+        reads every user's data, so getting the variable names before streaming the
+        data (as the CSV download does) reads the data twice.
+
+        Args:
+            refresh_if_in_progress (bool, optional): Refresh data for in progress users
+                when getting their data. Defaults to False.
+
+        Returns:
+            List[str]: Variable names.
+        """
+        columns: Dict[str, None] = {}
+        for df in User.iter_all_data(refresh_if_in_progress):
+            columns.update(dict.fromkeys(df.keys()))
+
+        return list(columns)
 
     @staticmethod
     def get_all_data(
-        to_pandas: bool = True, refresh_if_in_progress: bool = False
-    ) -> Union[pd.DataFrame, DataFrame]:
+        to_pandas: bool = True,
+        refresh_if_in_progress: bool = False,
+        data_format: str = None,
+    ) -> Union[pd.DataFrame, ColumnDataFrame, pa.Table]:
         """Get the data for all users.
 
         Args:
@@ -361,19 +610,34 @@ class User(UserMixin, db.Model):
             refresh_if_in_progress (bool, optional): Refresh data for in progress users
                 when getting their data. Setting this to True can greatly increase the
                 runtime. Defaults to False.
+            data_format (str, optional): Set to "arrow" to get the data as a typed
+                ``pyarrow.Table``, in which case ``to_pandas`` is ignored. Variables
+                whose values have incompatible types (e.g., numbers and lists) are
+                converted to strings. This requires ``pyarrow``. Defaults to None.
+
+        Raises:
+            ValueError: If ``data_format`` is not None or "arrow".
 
         Returns:
-            Union[pd.DataFrame, DataFrame]: Data from all users.
+            Union[pd.DataFrame, ColumnDataFrame, pa.Table]: Data from all users. If
+                ``to_pandas`` is False, this is a
+                :class:`hemlock._data_frame.ColumnDataFrame`, whose columns are arrays,
+                rather than a :class:`hemlock._data_frame.DataFrame` of lists.
         """
-        df = DataFrame()
-        for user in User.query.all():
-            if refresh_if_in_progress and user.in_progress:
-                df.add_data(user.get_data(to_pandas=False, use_cached_data=False))
-            else:
-                df.add_data(user.get_data(to_pandas=False))
+        if data_format not in (None, "arrow"):
+            raise ValueError(
+                f"Unknown data format {data_format!r}. Use None or 'arrow'."
+            )
+
+        df = ColumnDataFrame()
+        for user_df in User.iter_all_data(refresh_if_in_progress):
+            df.add_data(user_df)
             df.pad()
 
-        return pd.DataFrame(df) if to_pandas else df
+        if data_format == "arrow":
+            return df.to_arrow(timestamp_columns=("start_time", "end_time"))
+
+        return df.to_pandas() if to_pandas else df
 
     def process_request(self, url_rule: str) -> Union[str, Response]:
         """Process a request.
@@ -384,10 +648,14 @@ class User(UserMixin, db.Model):
         Returns:
             Union[str, Response]: HTML of the next page.
         """
+        set_url_rule(url_rule)
+        if single_transaction_requests():
+            lock_user(self.id)
         if request.method == "POST":
             self.end_time = datetime.utcnow()
 
         current_tree = self.get_tree(url_rule)
+        page = current_tree.page
         return_value = current_tree.process_request()
 
         if (
@@ -397,7 +665,8 @@ class User(UserMixin, db.Model):
         ):
             self.completed = True  # type: ignore
 
-        db.session.commit()
+        with record_time("commit", page):
+            db.session.commit()
         return return_value
 
     @classmethod
@@ -452,9 +721,54 @@ class User(UserMixin, db.Model):
                 # or else you get a collection class issue if you run
                 # >>> db.session.commit()
                 # in the seed function
+                reserve_primary_keys(db.session, db.session.new)
 
         return user
 
+    @classmethod
+    def warm_markdown_cache(cls) -> int:
+        """Convert the markdown on the pages the seed functions create ahead of time.
+
+        The converted HTML is stored in the markdown cache shared across requests, so
+        participants' first requests don't pay for it. Seed functions that raise an
+        exception (e.g., because they need a logged-in user) are skipped.
+
+        Seed functions may have side effects in the database (e.g., assigning a user
+        to a condition increments the assignment counts), so each one runs in a
+        savepoint which is always rolled back. Seed functions shouldn't commit, which
+        would release the savepoint.
+
+        Returns:
+            int: Number of questions whose markdown was converted.
+        """
+        n_questions = 0
+        for _, seed_func in cls._seed_funcs.values():
+            savepoint = db.session.begin_nested()
+            try:
+                with db.session.no_autoflush:
+                    branch = seed_func()
+                    questions = [
+                        question
+                        for page, _ in walk_branch(
+                            branch if isinstance(branch, list) else [branch]
+                        )
+                        for question in page.questions
+                    ]
+                    for question in questions:
+                        question.render_markdown()
+                n_questions += len(questions)
+            except Exception:
+                logging.warning(
+                    f"Skipped {seed_func.__name__} when warming the markdown cache.",
+                    exc_info=True,
+                )
+            finally:
+                # the pages were only needed to get their markdown
+                if savepoint.is_active:
+                    savepoint.rollback()
+
+        return n_questions
+
     @classmethod
     def test_multiple_users(
         cls,
@@ -517,6 +831,60 @@ class User(UserMixin, db.Model):
             user.test(**test_kwargs)
             logging.info(f"FINISHED TESTING USER {user.id}\n")
 
+    @classmethod
+    def load_test(
+        cls,
+        n_users: int,
+        n_workers: int = None,
+        app_factory: Callable[[], Flask] = create_app,
+        url_rule: str = None,
+        max_page_visits: int = 10,
+    ) -> LoadTestResults:
+        """Run multiple test users through a study concurrently.
+
+        Unlike :meth:`User.test_multiple_users`, the users' requests go through the
+        application's WSGI interface in parallel worker processes, and the time the
+        application takes to respond is recorded.
+
+        Args:
+            n_users (int): Number of users to run.
+            n_workers (int, optional): Number of worker processes. Defaults to None,
+                meaning the number of CPUs.
+            app_factory (Callable[[], Flask], optional): Creates the application in
+                each worker process. Must be picklable, e.g., a module-level function.
+                Defaults to :func:`hemlock.app.create_app`.
+            url_rule (str, optional): URL rule to test. Defaults to None.
+            max_page_visits (int, optional): Maximum number of times a user can visit
+                the same page before they stop making requests. Defaults to 10.
+
+        Returns:
+            LoadTestResults: Results, including throughput, error counts, and
+                latency percentiles by page position.
+
+        Examples:
+
+            .. code-block::
+
+                >>> from hemlock import User, Page
+                >>> from hemlock.questions import Input
+                >>> @User.route("/survey")
+                ... def seed():
+                ...     return [Page(Input("What's your name?")), Page()]
+                ...
+                >>> results = User.load_test(100, n_workers=4)
+                >>> results.summarize()
+                       requests  errors       p50       p95       p99
+                start       100       0  0.012421  0.021340  0.026902
+                0           100       0  0.015238  0.024713  0.030551
+        """
+        return run_load_test(
+            n_users,
+            n_workers=n_workers,
+            app_factory=app_factory,
+            url_rule=url_rule,
+            max_page_visits=max_page_visits,
+        )
+
     def test(
         self, url_rule: str = None, verbosity: int = 2, max_page_visits: int = 10
     ) -> None:
@@ -620,28 +988,33 @@ class User(UserMixin, db.Model):
             self.process_request(url_rule)  # type: ignore
         return self.get_tree(url_rule)
 
-    def test_post(
+    def make_test_post_data(
         self,
         responses: ResponsesType = None,
         direction: str = None,
         url_rule: str = None,
-        verbose: bool = True,
-    ) -> Tree:
-        """Test a post request.
+        verbose: bool = False,
+    ) -> Dict[str, Any]:
+        """Make the form data for a test post request from the current page.
+
+        Questions without a manually input response use their test response, and the
+        direction defaults to the page's test direction.
 
         Args:
             responses (ResponsesType, optional): Test responses. Defaults to None.
-            direction (str, optional): Requested direction. Defaults to "forward".
+            direction (str, optional): Requested direction. Defaults to None.
             url_rule (str, optional): URL rule of the request. Defaults to None.
             verbose (bool, optional): When True, logs the current page and responses.
-                Defaults to True.
+                Defaults to False.
+
+        Raises:
+            ValueError: If the responses are not a list, tuple, or mapping, or the
+                number of responses does not match the number of questions.
 
         Returns:
-            Tree: Tree associated with the URL rule.
+            Dict[str, Any]: Form data.
         """
-        url_rule = url_rule or self.default_url_rule
-        tree = self.get_tree(url_rule)
-        page = tree.page
+        page = self.get_tree(url_rule or self.default_url_rule).page
 
         # collect manually input responses
         if responses is None:
@@ -691,7 +1064,49 @@ class User(UserMixin, db.Model):
         if verbose:
             logging.info(page.print(responses, direction))
 
+        return data
+
+    def test_post(
+        self,
+        responses: ResponsesType = None,
+        direction: str = None,
+        url_rule: str = None,
+        verbose: bool = True,
+    ) -> Tree:
+        """Test a post request.
+
+        Args:
+            responses (ResponsesType, optional): Test responses. Defaults to None.
+            direction (str, optional): Requested direction. Defaults to "forward".
+            url_rule (str, optional): URL rule of the request. Defaults to None.
+            verbose (bool, optional): When True, logs the current page and responses.
+                Defaults to True.
+
+        Returns:
+            Tree: Tree associated with the URL rule.
+        """
+        url_rule = url_rule or self.default_url_rule
+        tree = self.get_tree(url_rule)
+        data = self.make_test_post_data(
+            responses=responses, direction=direction, url_rule=url_rule, verbose=verbose
+        )
+
         with current_app.test_request_context(method="POST", data=data):
             login_user(self)
             self.process_request(url_rule)  # type: ignore
         return tree
+
+
+@event.listens_for(User, "before_insert")
+@event.listens_for(User, "before_update")
+def _update_status_counts(mapper: Any, connection: Connection, user: User) -> None:
+    # keep the admin status counts in sync with the user's status and end time
+    status_key = get_status_key(user)
+    if status_key != user._status_key:
+        update_status_counts(connection, user._status_key, status_key)
+        user._status_key = status_key
+
+
+@event.listens_for(User, "before_delete")
+def _remove_status_counts(mapper: Any, connection: Connection, user: User) -> None:
+    update_status_counts(connection, user._status_key, None)
@@ -0,0 +1,114 @@
+"""Caching.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Hashable
+
+
+class LRUCache:
+    """Bounded cache which evicts the least recently used item when it's full.
+
+    The cache is thread-safe, so it can be shared across requests.
+
+    Args:
+        maxsize (int, optional): Maximum number of items. Defaults to 1024.
+
+    Attributes:
+        maxsize (int): Maximum number of items.
+        hits (int): Number of lookups that found their key.
+        misses (int): Number of lookups that didn't find their key.
+
+    Examples:
+
+        .. doctest::
+
+            >>> from hemlock.utils.cache import LRUCache
+            >>> cache = LRUCache(maxsize=2)
+            >>> cache.get_or_set("a", lambda: 1)
+            1
+            >>> cache.get_or_set("a", lambda: 2)
+            1
+            >>> cache.hits, cache.misses
+            (1, 1)
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = self.misses = 0
+        self._items: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = Lock()
+
+    def __repr__(self):
+        return (
+            f"<{self.__class__.__qualname__} size: {len(self)}/{self.maxsize},"
+            f" hits: {self.hits}, misses: {self.misses}>"
+        )
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._items
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get an item.
+
+        Args:
+            key (Hashable): Key.
+            default (Any, optional): Returned if the key isn't in the cache. Defaults
+                to None.
+
+        Returns:
+            Any: Value.
+        """
+        with self._lock:
+            if key in self._items:
+                self.hits += 1
+                self._items.move_to_end(key)
+                return self._items[key]
+            self.misses += 1
+            return default
+
+    def get_or_set(self, key: Hashable, make_value: Callable[[], Any]) -> Any:
+        """Get an item, computing and storing it if it isn't in the cache.
+
+        Args:
+            key (Hashable): Key.
+            make_value (Callable[[], Any]): Computes the value if the key isn't in the
+                cache.
+
+        Returns:
+            Any: Value.
+        """
+        with self._lock:
+            if key in self._items:
+                self.hits += 1
+                self._items.move_to_end(key)
+                return self._items[key]
+            self.misses += 1
+
+        # compute the value outside the lock so slow computations don't block lookups
+        value = make_value()
+        self.set(key, value)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store an item, evicting the least recently used items if necessary.
+
+        Args:
+            key (Hashable): Key.
+            value (Any): Value.
+        """
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > max(self.maxsize, 0):
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all items and reset the hit and miss counters."""
+        with self._lock:
+            self._items.clear()
+            self.hits = self.misses = 0
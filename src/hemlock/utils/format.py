@@ -2,12 +2,22 @@
 """
 from __future__ import annotations
 
+import hashlib
+
 from markdown import markdown  # type: ignore
 
+from .cache import LRUCache
+
+# rendered markdown shared across requests, keyed by a hash of the raw markdown
+markdown_cache = LRUCache(maxsize=1024)
+
 
 def convert_markdown(value: str, strip_last_paragraph: bool = False) -> str:
     """Convert markdown to HTML.
 
+    Conversions are cached in ``markdown_cache``, so text that many users see (e.g.,
+    question labels) is only converted once.
+
     Args:
         value (str): Raw markdown.
         strip_last_paragraph (bool, optional): Strip the ``<p>`` tag from the last
@@ -16,6 +26,13 @@ def convert_markdown(value: str, strip_last_paragraph: bool = False) -> str:
     Returns:
         str: HTML.
     """
+    key = hashlib.blake2b(value.encode(), digest_size=16).digest(), strip_last_paragraph
+    return markdown_cache.get_or_set(
+        key, lambda: _convert_markdown(value, strip_last_paragraph)
+    )
+
+
+def _convert_markdown(value: str, strip_last_paragraph: bool) -> str:
     if not strip_last_paragraph:
         return markdown(value)
 
@@ -2,16 +2,21 @@
 """
 from __future__ import annotations
 
+import hashlib
+import json
 from itertools import product
 from random import choice, choices
 from string import digits, ascii_letters
 from typing import TYPE_CHECKING, Any, Mapping
 
 import numpy as np
-import pandas as pd
 from flask_login import current_user
 
+from .._assignment_count import increment_fewest_assigned
+
 if TYPE_CHECKING:
+    import pandas as pd
+
     from ..user import User
 
 CHARACTERS = digits + ascii_letters
@@ -33,12 +38,22 @@ def make_hash(length: int = 10) -> str:
 class Assigner:
     """Random assigner.
 
+    The number of users assigned to each condition is stored in the database, so
+    assigning a user takes constant time regardless of the number of users. The counts
+    are locked while a user is assigned, so concurrent assignments stay balanced.
+
     Args:
         conditions (Mapping): Maps factor names to possible factor values.
+        key (str, optional): Identifies the assigner's counts in the database. If None,
+            the key is derived from the conditions, so assigners with identical
+            conditions share their counts (this also lets an assigner keep its counts
+            when the app restarts). Pass distinct keys to count assigners with the
+            same conditions separately. Defaults to None.
 
     Attributes:
         factor_names (list): Factor names.
         possible_assignments (list[tuple]): Possible factor values to which users may be assigned.
+        key (str): Identifies the assigner's counts in the database.
 
     Examples:
 
@@ -62,10 +77,17 @@ class Assigner:
             (1, 'high')
     """
 
-    def __init__(self, conditions: Mapping):
+    def __init__(self, conditions: Mapping, key: str = None):
         conditions = dict(conditions)
         self.factor_names: list = list(conditions.keys())
         self.possible_assignments: list[tuple] = list(product(*conditions.values()))
+        if key is None:
+            key = hashlib.sha1(
+                json.dumps(
+                    [self.factor_names, self.possible_assignments], default=repr
+                ).encode()
+            ).hexdigest()
+        self.key = key
 
     def _decode_numpy(self, value: Any) -> Any:
         """Converts numpy values for JSON serialization.
@@ -89,6 +111,8 @@ class Assigner:
             user (User, optional): User to assign. If None, this method assigns the
                 current user. Defaults to None.
             df (pd.DataFrame, optional): Passed to `:meth:Assigner.get_cum_assigned`.
+                If None, the user is assigned using the counts stored in the database.
+                Defaults to None.
 
         Returns:
             dict[Any, Any]: Maps factor names to assignment values.
@@ -97,14 +121,22 @@ class Assigner:
             user = current_user
 
         # randomly select a condition with the fewest users
-        cum_assigned = self.get_cum_assigned(df)
-        values = (
-            cum_assigned[cum_assigned["count"] == cum_assigned["count"].min()]
-            .sample()
-            .index[0]
-        )
-        if len(self.factor_names) == 1:
-            values = [values]
+        if df is None:
+            index = increment_fewest_assigned(
+                self.key,
+                len(self.possible_assignments),
+                lambda: self.get_cum_assigned()["count"].tolist(),
+            )
+            values = self.possible_assignments[index]
+        else:
+            cum_assigned = self.get_cum_assigned(df)
+            values = (
+                cum_assigned[cum_assigned["count"] == cum_assigned["count"].min()]
+                .sample()
+                .index[0]
+            )
+            if len(self.factor_names) == 1:
+                values = [values]
         assignment = {
             key: self._decode_numpy(value)
             for key, value in zip(self.factor_names, values)
@@ -122,6 +154,8 @@ class Assigner:
         Returns:
             pd.DataFrame: Cumulative number of users in each condition.
         """
+        import pandas as pd
+
         if df is None:
             from ..user import User
 
@@ -4,18 +4,28 @@ Static objects include figures, javascript, and HTML.
 """
 from __future__ import annotations
 
+import logging
+import threading
 import warnings
-from typing import TYPE_CHECKING, Any, Dict
+from typing import TYPE_CHECKING, Any, Dict, Optional, Set
 
-import pandas as pd
-from flask import render_template
-from flask_socketio import emit
+from flask import Flask, current_app, render_template, request
+from flask_socketio import emit, join_room
 
+from .._assets import ASSETS
 from ..app import db, socketio
 
 if TYPE_CHECKING:
+    import pandas as pd
+
     from ..questions.base import Question
 
+# maps question hashes to the session ids of clients subscribed to their broadcasts
+_broadcast_subscribers: Dict[str, Set[str]] = {}
+# hashes of questions being broadcast by a background task
+_broadcast_tasks: Set[str] = set()
+_broadcast_lock = threading.Lock()
+
 
 def make_figure(
     src: str,
@@ -84,7 +94,9 @@ def pandas_to_html(dataframe: pd.DataFrame, *args: Any, **kwargs: Any) -> str:
     return dataframe.to_html(*args, **default_kwargs)
 
 
-def recompile_at_interval(interval: int, question: "Question") -> "Question":
+def recompile_at_interval(
+    interval: int, question: "Question", broadcast: bool = False
+) -> "Question":
     """Add javascript to recompile this question at regular intervals.
 
     That is, at regular intervals, the question's compile functions will be rerun and
@@ -93,37 +105,192 @@ def recompile_at_interval(interval: int, question: "Question") -> "Question":
     Args:
         interval (int): Recompile interval (milliseconds).
         question (Question): Question which should be recompiled.
+        broadcast (bool, optional): By default, each client asks the server to
+            recompile the question, so the work is repeated for every client viewing
+            it. In broadcast mode, the server recompiles the question once per interval
+            and sends the HTML to every subscribed client. Use this for questions whose
+            HTML is the same for everyone, such as the admin status page. The interval
+            is stored with the question, so clients can't choose it. Defaults to
+            False.
 
     Returns:
         Question: Question from the arguments.
     """
+    if broadcast:
+        question._broadcast_interval = interval
+        template = "hemlock/statics/recompile_in_room.js"
+    else:
+        template = "hemlock/statics/recompile_at_interval.js"
     question.html_settings["js"] += [
-        {"src": "https://cdn.socket.io/4.2.0/socket.io.min.js"},
-        render_template(
-            "hemlock/statics/recompile_at_interval.js",
-            hash=question.hash,
-            interval=interval,
-        ),
+        {"src": ASSETS["socket.io.min.js"].url},
+        render_template(template, hash=question.hash, interval=interval),
     ]
     return question
 
 
-@socketio.on("recompile-question-event")
-def recompile_question(question_hash: Dict[str, str]) -> None:
+def _recompile(hash: str, run_compile_functions: bool = True) -> Optional[str]:
     """Rerun a question's compile functions.
 
     Args:
-        question_hash (Dict[str, str]): Hash of the question to be recompiled
-            ({"data": question.hash}).
+        hash (str): Hash of the question to be recompiled.
+        run_compile_functions (bool, optional): Indicates that the compile functions
+            should be run. If False, the question is only rendered. Defaults to True.
+
+    Returns:
+        Optional[str]: Question's HTML, or None if the question does not exist.
     """
     from ..questions.base import Question
 
-    hash = question_hash["data"]
     question = Question.query.filter_by(hash=hash).first()
     if question is None:
         warnings.warn(f"Question with hash {hash} does not exist.", RuntimeWarning)
         return None
 
-    question.run_compile_functions()
-    db.session.commit()
-    emit("recompile-question-response", {"data": question.render()})
+    if run_compile_functions:
+        question.run_compile_functions()
+        db.session.commit()
+    return question.render()
+
+
+@socketio.on("recompile-question-event")
+def recompile_question(question_hash: Dict[str, str]) -> None:
+    """Rerun a question's compile functions.
+
+    Args:
+        question_hash (Dict[str, str]): Hash of the question to be recompiled
+            ({"data": question.hash}).
+    """
+    html = _recompile(question_hash["data"])
+    if html is not None:
+        emit("recompile-question-response", {"data": html})
+
+
+def get_recompile_room(hash: str) -> str:
+    """Get the name of the room to which a question's HTML is broadcast.
+
+    Args:
+        hash (str): Question hash.
+
+    Returns:
+        str: Room name.
+    """
+    return f"recompile-{hash}"
+
+
+@socketio.on("join-recompile-room-event")
+def join_recompile_room(subscription: Dict[str, Any]) -> None:
+    """Subscribe a client to a question's broadcasts.
+
+    The first subscriber starts a background task which recompiles the question at
+    the interval passed to :func:`recompile_at_interval`. The task stops once every
+    subscriber has disconnected. Subscriptions to questions which weren't set up for
+    broadcasting are ignored.
+
+    Args:
+        subscription (Dict[str, Any]): Hash of the question ({"data": question.hash}).
+    """
+    hash = subscription["data"]
+    interval = _get_broadcast_interval(hash)
+    if interval is None:
+        warnings.warn(
+            f"Question with hash {hash} is not broadcast at an interval.",
+            RuntimeWarning,
+        )
+        return None
+
+    with _broadcast_lock:
+        start_task = hash not in _broadcast_tasks
+
+    # the question is only recompiled for the first subscriber; later subscribers
+    # get the HTML from the most recent broadcast
+    html = _recompile(hash, run_compile_functions=start_task)
+    if html is None:
+        return None
+
+    join_room(get_recompile_room(hash))
+    emit("recompile-question-response", {"data": html})
+    with _broadcast_lock:
+        _broadcast_subscribers.setdefault(hash, set()).add(request.sid)
+        start_task = hash not in _broadcast_tasks
+        _broadcast_tasks.add(hash)
+
+    if start_task:
+        socketio.start_background_task(
+            _broadcast_at_interval,
+            current_app._get_current_object(),  # type: ignore
+            hash,
+            interval / 1000,
+        )
+
+
+def _get_broadcast_interval(hash: str) -> Optional[int]:
+    from ..questions.base import Question
+
+    return (
+        db.session.query(Question._broadcast_interval)
+        .filter(Question.hash == hash)
+        .limit(1)
+        .scalar()
+    )
+
+
+@socketio.on("disconnect")
+def leave_recompile_rooms() -> None:
+    """Unsubscribe a disconnected client from question broadcasts.
+
+    This is registered as the Socket.IO ``disconnect`` handler of the default
+    namespace, which holds one handler. An application which registers its own
+    ``disconnect`` handler replaces this one, and must call this function from its
+    handler so broadcasts stop when their subscribers leave.
+    """
+    with _broadcast_lock:
+        for subscribers in _broadcast_subscribers.values():
+            subscribers.discard(request.sid)
+
+
+def _broadcast_at_interval(app: Flask, hash: str, interval: float) -> None:
+    """Recompile a question and broadcast its HTML to its room until no one is
+    subscribed.
+
+    If recompiling the question fails, the error is logged and the broadcast stops.
+    The next client to subscribe starts it again.
+
+    Args:
+        app (Flask): Application.
+        hash (str): Question hash.
+        interval (float): Recompile interval (seconds).
+    """
+    room = get_recompile_room(hash)
+    stopped = False
+    try:
+        while True:
+            socketio.sleep(interval)
+            with _broadcast_lock:
+                if not _broadcast_subscribers.get(hash):
+                    # checked and stopped under the lock so new subscribers restart it
+                    _stop_broadcast(hash)
+                    stopped = True
+                    return
+
+            with app.app_context():
+                try:
+                    html = _recompile(hash)
+                finally:
+                    db.session.remove()
+
+            if html is None:
+                return
+
+            socketio.emit("recompile-question-response", {"data": html}, to=room)
+    except Exception:
+        logging.exception(f"Broadcasting question {hash} failed.")
+    finally:
+        if not stopped:
+            with _broadcast_lock:
+                _stop_broadcast(hash)
+
+
+def _stop_broadcast(hash: str) -> None:
+    # call with _broadcast_lock held
+    _broadcast_tasks.discard(hash)
+    _broadcast_subscribers.pop(hash, None)
@@ -0,0 +1,150 @@
+-- SQLite schema created by hemlock 1.0.0, before the columns and tables added since
+CREATE TABLE user (
+	id INTEGER NOT NULL,
+	hash VARCHAR(90),
+	start_time DATETIME,
+	end_time DATETIME,
+	params BLOB,
+	meta_data JSON,
+	errored BOOLEAN,
+	_cached_data JSON,
+	_completed BOOLEAN,
+	_failed BOOLEAN,
+	PRIMARY KEY (id)
+);
+
+CREATE TABLE tree (
+	id INTEGER NOT NULL,
+	_user_id INTEGER,
+	_seed_func_name VARCHAR,
+	_url_rule VARCHAR,
+	request_in_progress BOOLEAN,
+	prev_request_method VARCHAR(4),
+	cached_page_html TEXT,
+	"index" INTEGER,
+	PRIMARY KEY (id),
+	FOREIGN KEY(_user_id) REFERENCES user (id)
+);
+
+CREATE TABLE page (
+	id INTEGER NOT NULL,
+	_tree_id INTEGER,
+	_tree_head_id INTEGER,
+	_branch_id INTEGER,
+	_prev_page_id INTEGER,
+	_next_page_id INTEGER,
+	hash VARCHAR(10),
+	navbar JSON,
+	back VARCHAR,
+	forward VARCHAR,
+	template VARCHAR,
+	html_settings JSON,
+	compile BLOB,
+	submit BLOB,
+	navigate BLOB,
+	test_direction BLOB,
+	params BLOB,
+	direction_from VARCHAR(8),
+	direction_to VARCHAR(8),
+	"index" INTEGER,
+	terminal BOOLEAN,
+	rerun_compile_functions BOOLEAN,
+	PRIMARY KEY (id),
+	FOREIGN KEY(_tree_id) REFERENCES tree (id),
+	FOREIGN KEY(_tree_head_id) REFERENCES tree (id),
+	FOREIGN KEY(_branch_id) REFERENCES page (id),
+	FOREIGN KEY(_prev_page_id) REFERENCES page (id),
+	FOREIGN KEY(_next_page_id) REFERENCES page (id)
+);
+
+CREATE TABLE data (
+	id INTEGER NOT NULL,
+	data_type VARCHAR,
+	_user_id INTEGER,
+	_page_id INTEGER,
+	variable VARCHAR,
+	data BLOB,
+	n_rows INTEGER,
+	fill_rows BOOLEAN,
+	"index" INTEGER,
+	record_index BOOLEAN,
+	PRIMARY KEY (id),
+	FOREIGN KEY(_user_id) REFERENCES user (id),
+	FOREIGN KEY(_page_id) REFERENCES page (id)
+);
+
+CREATE TABLE timer (
+	id INTEGER NOT NULL,
+	_page_timer_id INTEGER,
+	is_running BOOLEAN,
+	start_time DATETIME,
+	PRIMARY KEY (id),
+	FOREIGN KEY(id) REFERENCES data (id),
+	FOREIGN KEY(_page_timer_id) REFERENCES page (id)
+);
+
+CREATE TABLE question (
+	id INTEGER NOT NULL,
+	question_type VARCHAR,
+	_page_question_id INTEGER,
+	hash VARCHAR(10),
+	label TEXT,
+	floating_label VARCHAR,
+	template VARCHAR,
+	prepend JSON,
+	append JSON,
+	feedback TEXT,
+	_is_valid BOOLEAN,
+	form_text TEXT,
+	html_settings JSON,
+	compile BLOB,
+	validate BLOB,
+	submit BLOB,
+	test_response BLOB,
+	"default" JSON,
+	raw_response BLOB,
+	params BLOB,
+	choices JSON,
+	choice_template VARCHAR,
+	multiple BOOLEAN,
+	record_choice_indices BOOLEAN,
+	PRIMARY KEY (id),
+	FOREIGN KEY(id) REFERENCES data (id),
+	FOREIGN KEY(_page_question_id) REFERENCES page (id)
+);
+
+CREATE TABLE "check" (
+	id INTEGER NOT NULL,
+	PRIMARY KEY (id),
+	FOREIGN KEY(id) REFERENCES question (id)
+);
+
+CREATE TABLE input (
+	id INTEGER NOT NULL,
+	PRIMARY KEY (id),
+	FOREIGN KEY(id) REFERENCES question (id)
+);
+
+CREATE TABLE label (
+	id INTEGER NOT NULL,
+	PRIMARY KEY (id),
+	FOREIGN KEY(id) REFERENCES question (id)
+);
+
+CREATE TABLE range (
+	id INTEGER NOT NULL,
+	PRIMARY KEY (id),
+	FOREIGN KEY(id) REFERENCES question (id)
+);
+
+CREATE TABLE "select" (
+	id INTEGER NOT NULL,
+	PRIMARY KEY (id),
+	FOREIGN KEY(id) REFERENCES question (id)
+);
+
+CREATE TABLE textarea (
+	id INTEGER NOT NULL,
+	PRIMARY KEY (id),
+	FOREIGN KEY(id) REFERENCES question (id)
+);
@@ -3,20 +3,25 @@ import os
 
 import pandas as pd
 import pytest
+from sqlalchemy import text
 
 from hemlock import User, Page, create_test_app
-from hemlock._admin_routes import password_is_correct, get_user_status
+from hemlock._admin_routes import generate_csv, password_is_correct, get_user_status
+from hemlock._metrics import METRIC_NAME
+from hemlock._status_aggregates import StatusCount, get_status_summary
 from hemlock.app import Config, db
 from hemlock.questions import Label
 from hemlock.questions.base import HASH_LENGTH
 
-from .utils import clear_users
+from .utils import app, clear_users
 
 PASSWORD = "password"
 PASSWORD_INPUT_HASH = "password_input_hash"[:HASH_LENGTH]
 LOGIN_RULE = "/admin-login"
 LOGOUT_RULE = "/admin-logout"
 DOWNLOAD_RULE = "/admin-download"
+DOWNLOAD_PARQUET_RULE = "/admin-download-parquet"
+METRICS_RULE = "/admin-metrics"
 STATUS_RULE = "/admin-status"
 
 
@@ -94,6 +99,51 @@ def test_download(client):
     assert df.completed.all()
 
 
+def test_download_streams_users(client):
+    User.make_test_user(meta_data={"variable0": "data0"})
+    User.make_test_user(meta_data={"variable1": "data1"})
+    response = client.get(DOWNLOAD_RULE)
+    assert response.is_streamed
+
+    # the header chunk is followed by one chunk per user
+    chunks = [str(chunk, "utf-8") for chunk in response.response]
+    assert len(chunks) == 4
+    df = pd.read_csv(io.StringIO("".join(chunks)))
+    assert list(df.columns) == User.get_all_data_columns()
+    assert pd.isna(df.variable0[0]) and pd.isna(df.variable1[0])
+    assert df.variable0[1] == "data0" and pd.isna(df.variable1[1])
+    assert pd.isna(df.variable0[2]) and df.variable1[2] == "data1"
+
+
+def test_download_logs_missing_columns(client, caplog):
+    User.make_test_user(meta_data={"variable0": "data0"})
+    chunks = list(generate_csv(["id"]))
+    assert len(chunks) == 3
+    assert "variable0" in caplog.text
+
+
+def test_download_parquet(client):
+    pq = pytest.importorskip("pyarrow.parquet")
+    User.make_test_user(meta_data={"variable0": "data0", "variable1": "data1"})
+    User.make_test_user(meta_data={"variable1": 1})
+    response = client.get(DOWNLOAD_PARQUET_RULE)
+    table = pq.read_table(io.BytesIO(response.data))
+    assert table.num_rows == 3
+    assert table.schema.field("completed").type == "bool"
+    assert table.column("variable0").to_pylist() == [None, "data0", None]
+    # variables with incompatible types are stored as strings
+    assert table.column("variable1").to_pylist() == [None, "data1", "1"]
+
+
+def test_metrics(client):
+    response = client.get(METRICS_RULE)
+    assert response.mimetype == "text/plain"
+    assert f"# TYPE {METRIC_NAME} histogram" in response.data.decode()
+    assert "hemlock_markdown_cache_hits_total" in response.data.decode()
+    assert "hemlock_question_html_cache_hits_total" in response.data.decode()
+    assert "hemlock_db_pool_checkout_wait_seconds" in response.data.decode()
+
+
 class TestStatus:
     @pytest.mark.parametrize("in_gitpod", (True, False))
     def test_request(self, client, in_gitpod):
@@ -119,3 +169,45 @@ class TestStatus:
             assert "Count" in label.label
         else:
             assert label.label is None
+
+    def test_status_counts(self, app):
+        # the CLI command removes the session, so bind it to this app's database
+        db.session.remove()
+        clear_users()
+        assert get_status_summary()["all"] == (0, None)
+
+        user = User.make_test_user()
+        user.completed = True
+        db.session.commit()
+        summary = get_status_summary()
+        assert summary["all"][0] == summary["completed"][0] == 1
+        assert summary["in_progress"][0] == 0
+
+        # counts are summed over shards
+        for shard in range(app.config["STATUS_COUNT_SHARDS"]):
+            user = User.make_test_user()
+            user.completed = True
+            db.session.commit()
+        n_users = app.config["STATUS_COUNT_SHARDS"] + 1
+        assert get_status_summary()["completed"][0] == n_users
+
+        # users counted before the counts were maintained are added by a CLI command
+        User.query.update({"_status_key": None})
+        StatusCount.query.delete()
+        db.session.commit()
+        get_user_status(Label())
+        assert get_status_summary()["all"] == (0, None)
+
+        # the command adds the counts to databases created before they existed
+        with db.engine.begin() as connection:
+            connection.execute(text("DROP TABLE status_count"))
+            connection.execute(text("DROP INDEX ix_user__status_key"))
+            connection.execute(text("ALTER TABLE user DROP COLUMN _status_key"))
+        db.session.expire_all()
+        result = app.test_cli_runner().invoke(args=["hemlock", "count-users"])
+        assert "Added column user._status_key" in result.output
+        assert f"Counted {n_users} users" in result.output
+        assert get_status_summary()["completed"][0] == n_users
+
+        clear_users()
+        assert get_status_summary()["all"] == (0, None)
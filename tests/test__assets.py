@@ -0,0 +1,98 @@
+import gzip
+import os
+
+import pytest
+
+from hemlock import _assets
+from hemlock.app import init_app
+from hemlock._assets import (
+    ASSETS,
+    CACHE_CONTROL,
+    bundle_assets,
+    check_assets_bundled,
+    get_asset_url,
+    localize_assets,
+)
+
+from .utils import app
+
+CSS = b"body { color: black; }"
+
+
+@pytest.fixture
+def asset_dir(monkeypatch, tmp_path):
+    for filename in ASSETS:
+        _assets._write(str(tmp_path), filename, CSS)
+    _assets._write(str(tmp_path), "font-0.woff2", b"font")
+    monkeypatch.setattr(_assets, "ASSET_DIR", str(tmp_path))
+    monkeypatch.setattr(_assets, "_content_hashes", {})
+    return tmp_path
+
+
+def test_localize_assets(app, asset_dir, monkeypatch):
+    html = f'<link href="{ASSETS["bootstrap.min.css"].url}">'
+    with app.test_request_context():
+        assert localize_assets(html) == html
+
+        monkeypatch.setitem(app.config, "STATIC_ASSETS", "local")
+        url = get_asset_url("bootstrap.min.css")
+        assert localize_assets(html) == f'<link href="{url}">'
+
+    assert url.startswith("/hemlock/assets/bootstrap.min.")
+    assert url.endswith(".css")
+
+
+@pytest.mark.parametrize("accept_encoding", ("gzip, deflate", None))
+def test_serve_asset(app, asset_dir, accept_encoding):
+    with app.test_request_context():
+        url = get_asset_url("bootstrap.min.css")
+
+    headers = {"Accept-Encoding": accept_encoding} if accept_encoding else {}
+    with app.test_client() as client:
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200
+        assert response.mimetype == "text/css"
+        assert response.headers["Cache-Control"] == CACHE_CONTROL
+        assert "Accept-Encoding" in response.headers["Vary"]
+        if accept_encoding:
+            assert response.headers["Content-Encoding"] == "gzip"
+            assert gzip.decompress(response.data) == CSS
+        else:
+            assert "Content-Encoding" not in response.headers
+            assert response.data == CSS
+        response.close()
+
+        assert client.get("/hemlock/assets/font-0.woff2").status_code == 200
+        # stale content hashes and precompressed files aren't served directly
+        assert client.get("/hemlock/assets/bootstrap.min.0.css").status_code == 404
+        assert client.get("/hemlock/assets/font-0.woff2.gz").status_code == 404
+
+
+def test_check_assets_bundled(asset_dir):
+    check_assets_bundled()
+    (asset_dir / "jquery.min.js").unlink()
+    with pytest.raises(FileNotFoundError):
+        check_assets_bundled()
+
+
+@pytest.mark.skipif(
+    not os.getenv("TEST_BUNDLED_ASSETS"),
+    reason="set TEST_BUNDLED_ASSETS after bundling the assets with `make vendor-assets`",
+)
+def test_bundled_assets(app, monkeypatch):
+    monkeypatch.setitem(app.config, "STATIC_ASSETS", "local")
+    init_app()
+    with app.test_request_context():
+        urls = [get_asset_url(filename) for filename in ASSETS]
+
+    with app.test_client() as client:
+        for url in urls:
+            response = client.get(url)
+            assert response.status_code == 200
+            response.close()
+
+
+def test_bundle_assets_integrity(monkeypatch, tmp_path):
+    monkeypatch.setattr(_assets, "_download", lambda url, headers=None: CSS)
+    with pytest.raises(ValueError):
+        bundle_assets(str(tmp_path))
@@ -1,7 +1,9 @@
+import numpy as np
+import pandas as pd
 import pytest
 
 from hemlock import Page
-from hemlock._data_frame import DataFrame
+from hemlock._data_frame import ColumnDataFrame, DataFrame
 
 VARIABLE = "variable"
 DATA = "data"
@@ -33,3 +35,91 @@ def test_pad(fill_rows):
         assert df == {VARIABLE: min_rows * [DATA]}
     else:
         assert df == {VARIABLE: [DATA] + (min_rows - 1) * [None]}
+
+
+class TestColumnDataFrame:
+    def test_init(self):
+        df = ColumnDataFrame([(VARIABLE, DATA)])
+        assert df[VARIABLE].tolist() == [DATA]
+
+    def test_add_branch(self):
+        branch = [Page(data=[(VARIABLE, DATA)]) for _ in range(2)]
+        branch[0].branch = [Page(data=[(VARIABLE, DATA)])]
+        df = ColumnDataFrame()
+        df.add_branch(branch)
+        assert df[VARIABLE].tolist() == 3 * [DATA]
+
+    @pytest.mark.parametrize("fill_rows", (True, False))
+    def test_pad(self, fill_rows):
+        min_rows = 3
+        df = ColumnDataFrame({VARIABLE: DATA}, fill_rows=fill_rows)
+        df.pad(min_rows)
+        assert df.n_rows == min_rows
+        if fill_rows:
+            assert df[VARIABLE].tolist() == min_rows * [DATA]
+        else:
+            assert df[VARIABLE].tolist() == [DATA] + (min_rows - 1) * [None]
+
+    def test_lazy_pad(self):
+        # variables are only padded when they are accessed
+        df = ColumnDataFrame({"variable0": "a"})
+        df.add_data({"variable1": ["b", "b"]})
+        df.pad()
+        assert len(df._variables["variable0"]) == 1
+        df.add_data({"variable2": "c"})
+        df.add_data({"variable0": "a", "variable2": "c"})
+        assert df["variable0"].tolist() == ["a", None, "a"]
+        assert df["variable2"].tolist() == ["c", None, "c"]
+
+    def test_matches_data_frame(self):
+        # merging data frames should give the same result as the dict-based data frame
+        user_dfs = [
+            DataFrame({"id": i, "variable": [i, i + 1]}, fill_rows=True)
+            for i in range(3)
+        ]
+        user_dfs[1].add_data({"other_variable": "value"})
+        user_dfs[1].pad()
+        df, column_df = DataFrame(), ColumnDataFrame()
+        for user_df in user_dfs:
+            df.add_data(user_df)
+            df.pad()
+            column_df.add_data(user_df)
+            column_df.pad()
+
+        assert list(column_df) == list(df)
+        assert column_df.n_rows == 6
+        pd.testing.assert_frame_equal(column_df.to_pandas(), pd.DataFrame(df))
+
+    @pytest.mark.parametrize(
+        "data,dtype",
+        [
+            ([0, 1], np.int64),
+            ([0, None], np.float64),
+            ([0, 1.5], np.float64),
+            ([True, False], bool),
+            ([True, None], object),
+            ([True, 0], object),
+            (["a", None], object),
+            ([0.5, "a"], object),
+        ],
+    )
+    def test_dtype(self, data, dtype):
+        df = ColumnDataFrame()
+        for item in data:
+            df.add_data({VARIABLE: item})
+        assert df[VARIABLE].dtype == dtype
+        assert df.to_pandas()[VARIABLE].dtype == pd.Series(data).dtype
+
+    def test_to_pandas_without_copy(self):
+        df = ColumnDataFrame({VARIABLE: [0.5, 1.5]})
+        pd_df = df.to_pandas()
+        assert np.shares_memory(pd_df[VARIABLE].values, df[VARIABLE].to_numpy())
+
+    def test_to_arrow(self):
+        pa = pytest.importorskip("pyarrow")
+        df = ColumnDataFrame({"float": 0.5, "mixed": 0.5})
+        df.add_data({"mixed": "a"})
+        table = df.to_arrow()
+        assert table.schema.field("float").type == pa.float64()
+        assert table.column("float").to_pylist() == [0.5, None]
+        assert table.column("mixed").to_pylist() == ["0.5", "a"]
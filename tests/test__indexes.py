@@ -0,0 +1,64 @@
+import os
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from hemlock import User
+from hemlock._indexes import (
+    add_missing_columns,
+    create_missing_indexes,
+    get_missing_columns,
+    get_missing_indexes,
+)
+from hemlock.app import db
+
+from .utils import app
+
+BASELINE_SCHEMA = os.path.join(os.path.dirname(__file__), "baseline_schema.sql")
+
+
+def test_create_missing_indexes(app):
+    # simulate a database created before the index was declared
+    with db.engine.begin() as connection:
+        connection.execute(text("DROP INDEX ix_question_hash"))
+    assert [index.name for index in get_missing_indexes(db.engine)] == [
+        "ix_question_hash"
+    ]
+
+    assert create_missing_indexes() == ["ix_question_hash"]
+    assert get_missing_indexes(db.engine) == []
+    assert create_missing_indexes() == []
+
+
+def test_create_missing_indexes_command(app):
+    with db.engine.begin() as connection:
+        connection.execute(text("DROP INDEX ix_question_hash"))
+
+    result = app.test_cli_runner().invoke(args=["hemlock", "create-missing-indexes"])
+    assert result.output == "Created index ix_question_hash\n"
+    assert get_missing_indexes(db.engine) == []
+
+
+def test_upgrade_baseline_database(app):
+    engine = create_engine("sqlite://")
+    with open(BASELINE_SCHEMA) as f:
+        engine.raw_connection().executescript(f.read())
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO user (id) VALUES (1)"))
+
+    assert "page._navigation_tree_id" in [
+        f"{column.table.name}.{column.name}" for column in get_missing_columns(engine)
+    ]
+    db.metadata.create_all(engine)
+    assert sorted(add_missing_columns(engine)) == [
+        "page._navigation_tree_id",
+        "question._broadcast_interval",
+        "question._html_version",
+        "tree._navigation_index",
+        "user._status_key",
+    ]
+    assert "ix_page__navigation_tree_id" in create_missing_indexes(engine)
+    assert get_missing_columns(engine) == get_missing_indexes(engine) == []
+
+    with Session(engine) as session:
+        assert [user.id for user in session.query(User)] == [1]
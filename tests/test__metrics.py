@@ -0,0 +1,69 @@
+import pytest
+
+from hemlock import User, Page
+from hemlock._metrics import METRIC_NAME, Histogram, request_metrics
+from hemlock.questions import Input
+
+from .utils import app
+
+
+def seed():
+    return [Page(Input(compile=compile_input, validate=validate_input)), Page()]
+
+
+def compile_input(question):
+    pass
+
+
+def validate_input(question):
+    pass
+
+
+@pytest.fixture
+def metrics_app(app):
+    app.config["REQUEST_METRICS"] = True
+    request_metrics.clear()
+    yield app
+    app.config["REQUEST_METRICS"] = False
+    request_metrics.clear()
+
+
+def test_histogram():
+    histogram = Histogram(buckets=(0.1, 1))
+    for seconds in (0.05, 0.1, 0.5, 2):
+        histogram.observe(seconds)
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.get_cumulative_counts() == [2, 3, 4]
+    assert histogram.count == 4
+    assert histogram.sum == pytest.approx(2.65)
+
+
+def test_disabled(app):
+    request_metrics.clear()
+    User.make_test_user(seed).test(verbosity=0)
+    assert request_metrics.histograms == {}
+
+
+def test_request_metrics(metrics_app):
+    User.make_test_user(seed).test(verbosity=0)
+    labels = {
+        (stage, url_rule, position)
+        for stage, url_rule, position in request_metrics.histograms
+    }
+    for stage in ("compile", "render_template", "validate", "submit", "commit"):
+        assert (stage, "/test", "0") in labels
+    assert ("render_template", "/test", "1") in labels
+
+    # the user submits the first page once
+    assert request_metrics.histograms["validate", "/test", "0"].count == 1
+
+
+def test_to_prometheus(metrics_app):
+    request_metrics.observe("compile", "/survey", "0", 0.002)
+    text = request_metrics.to_prometheus()
+    assert f"# TYPE {METRIC_NAME} histogram" in text
+    labels = 'stage="compile",url_rule="/survey",page="0"'
+    assert f'{METRIC_NAME}_bucket{{{labels},le="0.001"}} 0' in text
+    assert f'{METRIC_NAME}_bucket{{{labels},le="0.0025"}} 1' in text
+    assert f'{METRIC_NAME}_bucket{{{labels},le="+Inf"}} 1' in text
+    assert f"{METRIC_NAME}_count{{{labels}}} 1" in text
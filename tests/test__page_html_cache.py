@@ -0,0 +1,105 @@
+import os
+import tempfile
+import time
+
+import pytest
+
+from hemlock import User, Page, _page_html_cache
+from hemlock._page_html_cache import (
+    FilesystemPageHTMLCache,
+    MemoryPageHTMLCache,
+    PageHTMLCache,
+    RedisPageHTMLCache,
+    make_page_html_cache,
+)
+
+from .utils import app
+
+
+def seed():
+    return [Page(), Page()]
+
+
+class FakeRedis:
+    # Redis-compatible stand-in
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value.encode()
+
+
+@pytest.mark.parametrize("backend", ("memory", "filesystem", "redis"))
+def test_cache(backend, tmp_path):
+    if backend == "memory":
+        cache = MemoryPageHTMLCache()
+    elif backend == "filesystem":
+        cache = FilesystemPageHTMLCache(str(tmp_path))
+    else:
+        cache = RedisPageHTMLCache(FakeRedis())
+
+    assert cache.get(1, "hash0") is None
+    cache.set(1, "hash0", "<p>Page 0</p>\n")
+    assert cache.get(1, "hash0") == "<p>Page 0</p>\n"
+
+    # each tree has one entry, so HTML for a page the user left isn't replayed
+    cache.set(1, "hash1", "<p>Page 1</p>")
+    assert cache.get(1, "hash0") is None
+    assert cache.get(1, "hash1") == "<p>Page 1</p>"
+    assert cache.get(2, "hash1") is None
+
+
+def test_filesystem_cache_expires(tmp_path):
+    cache = FilesystemPageHTMLCache(str(tmp_path), ttl=60)
+    cache.set(1, "hash0", "<p>Page 0</p>")
+    cache.set(2, "hash0", "<p>Page 0</p>")
+    path = tmp_path / "1.html"
+    os.utime(path, (time.time() - 120, time.time() - 120))
+    assert cache.get(1, "hash0") is None
+    assert cache.get(2, "hash0") == "<p>Page 0</p>"
+
+    # expired files are removed when a cache is created
+    FilesystemPageHTMLCache(str(tmp_path), ttl=60)
+    assert not path.exists()
+
+
+def test_filesystem_cache_directory(monkeypatch, tmp_path):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    directory = FilesystemPageHTMLCache(database_uri="sqlite:///a.db").directory
+    assert directory.startswith(str(tmp_path))
+    assert FilesystemPageHTMLCache(database_uri="sqlite:///a.db").directory == directory
+    assert FilesystemPageHTMLCache(database_uri="sqlite:///b.db").directory != directory
+
+
+def test_abstract_cache():
+    with pytest.raises(TypeError):
+        PageHTMLCache()
+
+
+def test_make_page_html_cache():
+    config = {"PAGE_HTML_CACHE": "database"}
+    assert make_page_html_cache(config) is None
+
+    config["PAGE_HTML_CACHE"] = cache = MemoryPageHTMLCache()
+    assert make_page_html_cache(config) is cache
+
+    config["PAGE_HTML_CACHE"] = "unknown"
+    with pytest.raises(ValueError):
+        make_page_html_cache(config)
+
+
+@pytest.mark.parametrize("database_fallback", (True, False))
+def test_tree_cached_page_html(app, monkeypatch, database_fallback):
+    monkeypatch.setitem(
+        app.config, "PAGE_HTML_CACHE_DATABASE_FALLBACK", database_fallback
+    )
+    user = User.make_test_user(seed)
+    tree = user.test_get()
+
+    html = _page_html_cache.page_html_cache.get(tree.id, tree.page.hash)
+    assert tree.page.hash in html
+    assert tree.cached_page_html == html
+    assert (tree._cached_page_html is not None) is database_fallback
@@ -0,0 +1,99 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError
+
+from hemlock import create_app
+from hemlock._pool import (
+    CHECKOUT_METRIC_NAME,
+    GREENLET_CONCURRENCY,
+    MeteredQueuePool,
+    get_engine_options,
+    get_worker_concurrency,
+    pool_metrics,
+)
+from hemlock.app import Config
+
+POSTGRES_URI = "postgresql://db"
+
+
+def test_sqlite_engine_options():
+    assert create_app(Config()).config["SQLALCHEMY_ENGINE_OPTIONS"] == {}
+
+
+@pytest.mark.parametrize("pool_size", (None, 3))
+def test_engine_options(pool_size):
+    app = create_app(
+        Config(),
+        {
+            "SQLALCHEMY_DATABASE_URI": POSTGRES_URI,
+            "WORKER_CONCURRENCY": 5,
+            "DATABASE_POOL_SIZE": pool_size,
+        },
+    )
+    options = app.config["SQLALCHEMY_ENGINE_OPTIONS"]
+    assert options["poolclass"] is MeteredQueuePool
+    assert options["pool_size"] == (pool_size or 5)
+    assert options["pool_pre_ping"]
+
+
+def test_engine_options_override():
+    # values from mappings passed after the Config object apply
+    app = create_app(
+        Config(),
+        {
+            "SQLALCHEMY_DATABASE_URI": POSTGRES_URI,
+            "DATABASE_POOL_SIZE": 50,
+            "DATABASE_POOL_PRE_PING": False,
+        },
+    )
+    options = app.config["SQLALCHEMY_ENGINE_OPTIONS"]
+    assert options["pool_size"] == 50
+    assert not options["pool_pre_ping"]
+
+
+def test_greenlet_concurrency(monkeypatch):
+    config = {"WORKER_CONCURRENCY": None}
+    monkeypatch.delenv("WORKER_CONCURRENCY", raising=False)
+    assert get_worker_concurrency(config, "eventlet") == GREENLET_CONCURRENCY
+    monkeypatch.setattr("hemlock._pool.uses_greenlets", lambda async_mode: True)
+    assert get_worker_concurrency(config) == GREENLET_CONCURRENCY
+
+
+def test_async_mode_engine_options(monkeypatch):
+    monkeypatch.delenv("WORKER_CONCURRENCY", raising=False)
+    config = {
+        "SQLALCHEMY_DATABASE_URI": POSTGRES_URI,
+        "WORKER_CONCURRENCY": None,
+        "DATABASE_POOL_SIZE": None,
+        "DATABASE_MAX_OVERFLOW": 2,
+        "DATABASE_POOL_TIMEOUT": 30,
+        "DATABASE_POOL_RECYCLE": 1800,
+        "DATABASE_POOL_PRE_PING": True,
+    }
+    options = get_engine_options(config, async_mode="gevent")
+    assert options["pool_size"] == GREENLET_CONCURRENCY
+
+
+def test_pool_metrics():
+    pool_metrics.clear()
+    engine = create_engine(
+        "sqlite://",
+        poolclass=MeteredQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.01,
+    )
+    with engine.connect():
+        # the only connection is checked out, so the pool is saturated
+        with pytest.raises(TimeoutError):
+            engine.connect()
+
+    assert pool_metrics.checkout_wait.count == 2
+    assert pool_metrics.saturated_checkouts == 1
+    assert pool_metrics.timeouts == 1
+
+    text = pool_metrics.to_prometheus(engine.pool)
+    assert f"{CHECKOUT_METRIC_NAME}_count 2" in text
+    assert "hemlock_db_pool_checkout_timeouts_total 1" in text
+    assert "hemlock_db_pool_size 1" in text
+    pool_metrics.clear()
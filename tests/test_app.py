@@ -1,4 +1,6 @@
 import os
+import subprocess
+import sys
 
 import pytest
 
@@ -20,3 +22,19 @@ class TestConfig:
             assert uri == "postgresql://db"
         else:
             assert uri == "sqlite://"
+
+
+def test_import_skips_notebook_dependencies():
+    # servers shouldn't pay to import packages only used in notebooks and analysis
+    modules = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, hemlock; print(' '.join(sys.modules))",
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout.split()
+    for module in ("IPython", "matplotlib", "networkx", "pandas"):
+        assert module not in modules
@@ -1,3 +1,8 @@
+import pickle
+
+import pytest
+
+from hemlock._custom_types import MutableFunctionType
 from hemlock.functional import Functional
 
 
@@ -9,6 +14,10 @@ def foo(*args, **kwargs):
     return args, kwargs
 
 
+def unregistered_foo():
+    pass
+
+
 def test_register():
     assert "foo" in functional
 
@@ -33,3 +42,33 @@ class TestGetItem:
     def test_from_list_of_tuples(self):
         for func in functional[[("foo", 0, 1, 2), ("foo", 0, 1, 2)]]:
             assert func() == ((0, 1, 2), {})
+
+
+class TestFunctionType:
+    column_type = MutableFunctionType()
+
+    def round_trip(self, value):
+        return self.column_type.process_result_value(
+            self.column_type.process_bind_param(value, None), None
+        )
+
+    def test_registered_function(self):
+        assert self.round_trip(foo) is foo
+
+    def test_registered_partials(self):
+        value = self.column_type.process_bind_param(
+            [functional.foo(0, 1, hello="world")], None
+        )
+        assert b"test_base:foo" in value
+        (func,) = self.column_type.process_result_value(value, None)
+        assert func() == ((0, 1), {"hello": "world"})
+
+    @pytest.mark.parametrize(
+        "value", (unregistered_foo, functional.foo((0, 1)), functional.foo({0, 1}))
+    )
+    def test_pickled(self, value):
+        # unregistered functions and arguments that JSON can't store exactly
+        # fall back to pickle
+        assert self.column_type.process_bind_param(value, None).startswith(
+            pickle.PROTO
+        )
@@ -0,0 +1,46 @@
+import pytest
+
+from hemlock import Page, User
+from hemlock.functional import lazy_branch
+from hemlock.questions import Label
+
+from ..utils import app
+
+N_PAGES = 3
+
+
+def make_page(index):
+    return Page(Label(f"Page {index}"), back=True)
+
+
+def seed():
+    return lazy_branch(make_page, N_PAGES)
+
+
+def test_lazy_branch(app):
+    user = User.make_test_user(seed)
+    tree = user.test_get()
+    assert len(tree.branch) == 1
+    assert not tree.page.is_last_page
+
+    tree = user.test_request(direction="forward")
+    assert len(tree.branch) == 2
+    assert tree.page.questions[0].label == "Page 1"
+
+    # going back and forward again doesn't rebuild the page
+    user.test_request(direction="back")
+    tree = user.test_request(direction="forward")
+    assert len(tree.branch) == 2
+    assert tree.page is tree.branch[1]
+
+    tree = user.test_request(direction="forward")
+    assert len(tree.branch) == N_PAGES
+    assert tree.page.is_last_page
+
+
+def test_lazy_page_with_navigate():
+    def make_page_with_navigate(index):
+        return Page(navigate=lambda page: [Page()])
+
+    with pytest.raises(ValueError):
+        lazy_branch(make_page_with_navigate, N_PAGES)
@@ -214,6 +214,39 @@ def test_render():
     Page().render()
 
 
+class TestHTMLSettings:
+    def test_defaults_are_shared(self):
+        page = Page()
+        assert page._html_settings == {}
+        assert page.html_settings.get_css() == Page().html_settings.get_css()
+        assert "min-vh-100" in page.html_settings.get("div")["class"]
+
+    def test_copy_on_write(self):
+        page = Page(extra_html_settings={"js": "alert('Hello, world!')"})
+        assert list(page._html_settings) == ["js"]
+        assert "alert('Hello, world!')" in page.html_settings.get_js()
+        assert "alert('Hello, world!')" not in Page().html_settings.get_js()
+
+        page.html_settings["div"]["class"].append("my-class")
+        assert set(page._html_settings) == {"js", "div"}
+        assert "my-class" not in Page().html_settings.get("div")["class"]
+
+    def test_set_all_settings(self):
+        page = Page()
+        page.html_settings = {"div": {"class": ["my-class"]}}
+        assert page.html_settings.get("div")["class"] == ["my-class"]
+        assert page.html_settings.get("css") == Page.defaults["html_settings"]["css"]
+
+    def test_missing_list_settings(self):
+        # question defaults have no "js", which behaves like an empty list
+        question = Label()
+        assert "js" in question.html_settings
+        assert question.html_settings.get("js") == []
+        question.html_settings["js"].append("alert('Hello, world!')")
+        assert question.html_settings.get("js") == ["alert('Hello, world!')"]
+        assert Label().html_settings.get("js") == []
+
+
 class TestGet:
     @staticmethod
     def change_label(question, new_label):
@@ -4,6 +4,7 @@ import pytest
 from sqlalchemy_mutable.utils import partial
 
 from hemlock import User, Page
+from hemlock.app import db
 from hemlock.questions import Check, Input, Label, Range, Select, Textarea
 from hemlock.questions.base import Question
 
@@ -85,6 +86,37 @@ def test_render(app, question_cls):
     question_cls().render()
 
 
+def test_cached_html(app):
+    question = Check("Hello, world!", ["yes", "no"])
+    db.session.add(question)
+    db.session.flush()
+    html = question.render()
+    assert question.render() is html
+
+    # changing an attribute invalidates the cached HTML
+    question.label = "Goodbye, world!"
+    assert "Goodbye, world!" in question.render()
+
+    # so does mutating an attribute in place
+    question.choices.append("maybe")
+    assert "maybe" in question.render()
+    question.feedback = "Please choose one."
+    question.set_is_valid(False)
+    assert "invalid-feedback" in question.render()
+
+    # attributes that don't affect the HTML keep the cached HTML, as does setting an
+    # attribute to its current value
+    html = question.render()
+    question.data = "yes"
+    question.feedback = "Please choose one."
+    assert question.render() is html
+
+    # the cache is shared across requests, so it survives reloading the question
+    db.session.commit()
+    db.session.expire(question)
+    assert question.render() is html
+
+
 class TestValidation:
     valid_response = "valid response"
     invalid_response = "invalid response"
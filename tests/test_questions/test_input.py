@@ -123,3 +123,10 @@ class TestMakeRawTestResponse:
                 input.make_raw_test_response(response)
         else:
             input.make_raw_test_response(response)
+
+
+def test_reading_input_tag_does_not_copy_defaults():
+    input = Input()
+    assert input.input_tag.get("min") is None
+    input.make_raw_test_response("response")
+    assert "input" not in input._html_settings
@@ -1,7 +1,7 @@
 import pytest
 
 from hemlock import Tree, Page
-from hemlock.app import create_test_app, static_pages
+from hemlock.app import create_test_app, db, static_pages
 
 from .utils import app
 
@@ -61,41 +61,129 @@ class TestNavigation:
         assert tree.go_back().page.get_position() == "1"
 
     def test_hard_navigation(self):
-        def seed():
-            branch = [Page(), Page()]
+        assert_hard_navigation(Tree(hard_navigation_seed))
 
-            first_branch = [Page(), Page()]
-            branch[0].branch = first_branch
+    def test_indexed_hard_navigation(self, app):
+        tree = Tree(hard_navigation_seed)
+        db.session.add(tree)
+        db.session.commit()
+        assert tree.get_navigation_index() is not None
+        assert_hard_navigation(tree)
 
-            first_branch[0].branch = [Page(next_page=branch[1])]
-            first_branch[1].branch = [Page()]
 
-            branch[1].prev_page = first_branch[1]
+def hard_navigation_seed():
+    branch = [Page(), Page()]
 
-            return branch
+    first_branch = [Page(), Page()]
+    branch[0].branch = first_branch
 
-        tree = Tree(seed)
-        assert tree.page.get_position() == "0"
+    first_branch[0].branch = [Page(next_page=branch[1])]
+    first_branch[1].branch = [Page()]
+
+    branch[1].prev_page = first_branch[1]
+
+    return branch
 
-        assert tree.go_forward().page.get_position() == "0.0"
-        assert tree.go_back().page.get_position() == "0"
-        assert tree.go_forward().page.get_position() == "0.0"
 
-        assert tree.go_forward().page.get_position() == "0.0.0"
-        assert tree.go_back().page.get_position() == "0.0"
-        assert tree.go_forward().page.get_position() == "0.0.0"
+def assert_hard_navigation(tree):
+    assert tree.page.get_position() == "0"
 
-        assert tree.go_forward().page.get_position() == "1"
-        assert tree.go_back().page.get_position() == "0.1"
-        assert tree.go_back().page.get_position() == "0.0.0"
-        assert tree.go_forward().page.get_position() == "1"
+    assert tree.go_forward().page.get_position() == "0.0"
+    assert tree.go_back().page.get_position() == "0"
+    assert tree.go_forward().page.get_position() == "0.0"
 
-        assert tree.go_back().page.get_position() == "0.1"
-        assert tree.go_forward().page.get_position() == "0.1.0"
-        assert tree.go_back().page.get_position() == "0.1"
+    assert tree.go_forward().page.get_position() == "0.0.0"
+    assert tree.go_back().page.get_position() == "0.0"
+    assert tree.go_forward().page.get_position() == "0.0.0"
 
-        assert tree.go_forward().page.get_position() == "0.1.0"
-        assert tree.go_forward().page.get_position() == "1"
+    assert tree.go_forward().page.get_position() == "1"
+    assert tree.go_back().page.get_position() == "0.1"
+    assert tree.go_back().page.get_position() == "0.0.0"
+    assert tree.go_forward().page.get_position() == "1"
+
+    assert tree.go_back().page.get_position() == "0.1"
+    assert tree.go_forward().page.get_position() == "0.1.0"
+    assert tree.go_back().page.get_position() == "0.1"
+
+    assert tree.go_forward().page.get_position() == "0.1.0"
+    assert tree.go_forward().page.get_position() == "1"
+
+
+class TestNavigationIndex:
+    def make_tree(self):
+        tree = Tree(seed)
+        db.session.add(tree)
+        db.session.commit()
+        return tree
+
+    def test_unflushed_tree(self):
+        assert Tree(seed).get_navigation_index() is None
+
+    def test_index(self, app):
+        tree = self.make_tree()
+        index = tree.get_navigation_index()
+        assert index.ids == [page.id for page in tree.branch]
+        assert index.depths == [0, 0]
+        assert tree.branch[0]._navigation_tree is tree
+
+    def test_new_branch(self, app):
+        # only the branch under the page should be re-indexed
+        tree = self.make_tree()
+        tree.get_navigation_index()
+        tree.branch[0].branch = [Page(), Page()]
+        assert tree._navigation_index["stale"] == [tree.branch[0].id]
+
+        # the new pages haven't been flushed, so the index can't be used yet
+        assert tree.get_navigation_index() is None
+        assert tree.go_forward().page is tree.branch[0].branch[0]
+        tree.page = tree.branch[0]
+
+        db.session.commit()
+        index = tree.get_navigation_index()
+        assert index.stale == []
+        assert index.depths == [0, 1, 1, 0]
+        assert tree.go_forward().page is tree.branch[0].branch[0]
+        assert tree.go_forward().page is tree.branch[0].branch[1]
+        assert tree.go_forward().page is tree.branch[1]
+        assert tree.go_back().page is tree.branch[0].branch[1]
+
+    def test_is_last_page(self, app):
+        tree = self.make_tree()
+        assert tree.get_navigation_index() is not None
+        assert not tree.branch[0].is_last_page
+        assert tree.branch[1].is_last_page
+
+        db.session.commit()
+        db.session.expire_all()
+        tree.branch[1].branch = [Page()]
+        db.session.commit()
+        assert not tree.branch[1].is_last_page
+        assert tree.branch[1].branch[0].is_last_page
+
+    def test_cached_index(self, app):
+        # indexes loaded in another session should come from the process's cache
+        tree = self.make_tree()
+        index = tree.get_navigation_index()
+        db.session.commit()
+        db.session.expire_all()
+        assert tree.get_navigation_index() is index
+
+        # stale indexes shouldn't be shared
+        tree.branch[0].branch = [Page()]
+        db.session.commit()
+        assert tree.get_navigation_index() is not index
+        assert tree.get_navigation_index().depths == [0, 1, 0]
+
+    def test_tree_branch_changed(self, app):
+        # changing the tree's branch should rebuild the index
+        tree = self.make_tree()
+        tree.get_navigation_index()
+        tree.branch.append(Page())
+        assert tree._navigation_index is None
+
+        db.session.commit()
+        assert tree.get_navigation_index().ids == [page.id for page in tree.branch]
+        assert tree.branch[-1].is_last_page
 
 
 class TestProcessRequest:
@@ -2,12 +2,18 @@ from itertools import product
 
 import pytest
 from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from sqlalchemy_mutable.utils import partial
 
-from hemlock import User, Page
-from hemlock.app import db
-from hemlock.user import load_user
-from hemlock.questions import Input
+from hemlock import User, Page, _bulk_insert, _request_lock
+from hemlock._assignment_count import AssignmentCount
+from hemlock.app import Config, db
+from hemlock.data import Data
+from hemlock.user import get_request_loader_options, load_user
+from hemlock.questions import Check, Input, Label
+from hemlock.utils.format import markdown_cache
+from hemlock.utils.random import Assigner
 
 from .utils import app, clear_routes
 
@@ -16,6 +22,10 @@ def seed():
     return [Page(), Page()]
 
 
+def make_branch(page):
+    return [Page(Input(variable="branch_input"), back=True)]
+
+
 def test_load_user(app):
     user = User.make_test_user()
     db.session.add(user)
@@ -23,6 +33,120 @@ def test_load_user(app):
     assert load_user(user.id) is user
 
 
+class TestRequestLoaderOptions:
+    @staticmethod
+    def seed():
+        return [
+            Page(
+                Label("label"),
+                Input(variable="input"),
+                Check(choices=["yes", "no"]),
+                data=[("page_data", 0)],
+            ),
+            Page(),
+        ]
+
+    def count_request_queries(self, app, user_id, strategy):
+        app.config["PAGE_LOADING_STRATEGY"] = strategy
+        db.session.expunge_all()
+        n_queries = 0
+
+        def count_query(*args, **kwargs):
+            nonlocal n_queries
+            n_queries += 1
+
+        event.listen(Engine, "before_cursor_execute", count_query)
+        try:
+            user = load_user(user_id)
+            page = user.trees[0].page
+            [question.html_settings for question in page.questions]
+            page.timer.data, list(page.data), page.root
+            assert page.is_last_page is False
+        finally:
+            event.remove(Engine, "before_cursor_execute", count_query)
+            app.config["PAGE_LOADING_STRATEGY"] = Config.PAGE_LOADING_STRATEGY
+        return n_queries
+
+    def test_fewer_queries(self, app):
+        user_id = User.make_test_user(self.seed).id
+        db.session.commit()
+        n_lazy_queries = self.count_request_queries(app, user_id, "lazy")
+        n_queries = self.count_request_queries(app, user_id, "selectin")
+        assert n_queries < n_lazy_queries
+
+    @pytest.mark.parametrize("strategy", ("unknown", "joined"))
+    def test_unknown_strategy(self, app, strategy):
+        # joining the collections would return a cartesian product of their rows
+        with pytest.raises(ValueError):
+            get_request_loader_options(strategy)
+
+
+def test_warm_markdown_cache(app):
+    clear_routes()
+
+    @User.route("/test_warm_markdown_cache_rule")
+    def test_warm_markdown_cache_seed():
+        return [Page(Label("Hello, world!"), Input("What's your name?"))]
+
+    markdown_cache.clear()
+    assert User.warm_markdown_cache() == 2
+    assert not db.session.new
+    misses = markdown_cache.misses
+
+    User.make_test_user().test_get()
+    assert markdown_cache.misses == misses
+    assert markdown_cache.hits > 0
+
+    # side effects of seed functions are rolled back
+    assigner = Assigner({"factor": (0, 1)}, key="test_warm_markdown_cache")
+
+    @User.route("/test_warm_markdown_cache_assigner_rule")
+    def test_warm_markdown_cache_assigner_seed():
+        assigner.assign_user()
+        return Page()
+
+    User.warm_markdown_cache()
+    db.session.commit()
+    counts = AssignmentCount.query.filter_by(assigner_key=assigner.key).all()
+    assert sum(count.count for count in counts) == 0
+    clear_routes()
+
+
+def test_reserve_primary_keys(app, monkeypatch):
+    # sqlite doesn't have sequences, so emulate one for each table, starting after
+    # the largest existing id
+    next_ids = {}
+
+    def reserve_ids(session, table_name, column_name, n):
+        if table_name not in next_ids:
+            max_id = session.execute(
+                db.text(f"SELECT COALESCE(MAX({column_name}), 0) FROM {table_name}")
+            ).scalar()
+            next_ids[table_name] = max_id + 100
+        start = next_ids[table_name]
+        next_ids[table_name] += n
+        return list(range(start, start + n))
+
+    clear_routes()
+
+    monkeypatch.setattr(_bulk_insert, "SEQUENCE_DIALECTS", ("sqlite",))
+    monkeypatch.setattr(_bulk_insert, "_reserve_ids", reserve_ids)
+    max_data_id = db.session.query(db.func.max(Data.id)).scalar() or 0
+
+    def seed():
+        return [Page(Label(), Input()), Page(Check(choices=["yes", "no"]))]
+
+    user = User.make_test_user(seed)
+    db.session.commit()
+    questions = [
+        question for page in user.get_tree().branch for question in page.questions
+    ]
+    assert len(questions) == 3
+    assert all(question.id >= max_data_id + 100 for question in questions)
+    assert db.session.get(Data, questions[1].id) is questions[1]
+    user.test_request()
+
+
 class TestRoute:
     def test_single(self, app):
         clear_routes()
@@ -156,15 +280,12 @@ class TestGetData:
             user.test_request()  # user is now on page 2 of 2
         return user
 
-    def assert_expected_data(self, df, completed=True, refresh_if_in_progress=False):
+    def assert_expected_data(self, df, completed=True):
         assert (df.completed == completed).all()
         # test that all rows have been populated with the same start time
         # this should be true of all metadata variables
         assert (df.start_time == df.start_time[0]).all()
-        if completed or refresh_if_in_progress:
-            assert (df[self.variable_name] == self.response.format(df.id[0])).all()
-        else:
-            assert self.variable_name not in df
+        assert (df[self.variable_name] == self.response.format(df.id[0])).all()
 
     @pytest.mark.parametrize("n_rows", (1, 3))
     def test_single_user(self, app, n_rows):
@@ -183,16 +304,48 @@ class TestGetData:
         [self.make_user(complete_survey=complete_survey) for _ in range(n_users)]
         df = User.get_all_data(refresh_if_in_progress=refresh_if_in_progress)
 
-        if complete_survey or refresh_if_in_progress:
-            assert (df.total_seconds != 0).all()
-        else:
-            # if you don't refresh the data, users in progress should only have the data
-            # from the start of the survey
-            assert (df.total_seconds == 0).all()
+        # users in progress have the data from the pages they submitted even if you
+        # don't refresh the data
+        assert (df.total_seconds != 0).all()
         for _, user_df in df.groupby("id"):
-            self.assert_expected_data(
-                user_df.reset_index(drop=True), complete_survey, refresh_if_in_progress
-            )
+            self.assert_expected_data(user_df.reset_index(drop=True), complete_survey)
+
+    def test_cached_data_matches_refreshed_data(self, app):
+        def seed():
+            return [
+                Page(
+                    Input(variable="input0"),
+                    data=[("page_data", 0, 3)],
+                    navigate=make_branch,
+                ),
+                Page(Input(variable="input1")),
+                Page(),
+            ]
+
+        user = User.make_test_user(seed)
+        user.test_request(["response0"])
+        user.test_request(["branch response"], direction="forward")
+        assert not user.completed
+        cached_df = user.get_data()
+        refreshed_df = user.get_data(use_cached_data=False)
+        for column in ("input0", "page_data", "branch_input"):
+            assert cached_df[column].tolist() == refreshed_df[column].tolist()
+
+    def test_cached_data_after_new_branch(self, app):
+        # resubmitting a page replaces its branch, so the data cached from the old
+        # branch should be removed
+        def seed():
+            return [Page(navigate=make_branch), Page(), Page()]
+
+        user = User.make_test_user(seed)
+        user.test_request()
+        user.test_request(["old response"], direction="back")
+        user.test_request()
+        user.test_request(["new response"], direction="forward")
+        df = user.get_data()
+        refreshed_df = user.get_data(use_cached_data=False)
+        assert df.branch_input.tolist() == ["new response"]
+        assert df.branch_input.tolist() == refreshed_df.branch_input.tolist()
 
     def test_users_with_different_variables(self, app):
         User.make_test_user(meta_data={"variable0": "data0"})
@@ -208,6 +361,93 @@ class TestGetData:
         for value, expected_value in zip(df["variable1"], expected_variable1):
             assert value == expected_value
 
+    def test_arrow_format(self, app):
+        pa = pytest.importorskip("pyarrow")
+        User.make_test_user(meta_data={"variable0": "data0"})
+        User.make_test_user(meta_data={"variable1": "data1"})
+        table = User.get_all_data(data_format="arrow")
+        assert table.num_rows == 2
+        assert table.column_names == list(User.get_all_data().columns)
+        assert table.schema.field("id").type == pa.int64()
+        assert table.schema.field("completed").type == pa.bool_()
+        assert table.schema.field("start_time").type == pa.timestamp("us")
+        assert table.column("variable0").to_pylist() == ["data0", None]
+
+    def test_unknown_format(self, app):
+        with pytest.raises(ValueError):
+            User.get_all_data(data_format="unknown")
+
+
+class TestIterBatches:
+    @staticmethod
+    def seed():
+        return [Page(Input(variable="variable")), Page()]
+
+    def test_batches(self, app):
+        users = [User.make_test_user() for _ in range(5)]
+        batches = list(User.iter_batches(batch_size=2))
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+        assert [user for batch in batches for user in batch] == users
+
+    def test_preloaded_users_are_not_expunged(self, app):
+        user = User.make_test_user(self.seed)
+        list(User.iter_batches(batch_size=1))
+        assert user in db.session
+
+    def test_queries_scale_with_batches(self, app, monkeypatch):
+        def count_queries(n_users):
+            for _ in range(n_users):
+                User.make_test_user(self.seed).test_request()
+            db.session.commit()
+            db.session.expunge_all()
+
+            n_queries = 0
+
+            def increment(*args):
+                nonlocal n_queries
+                n_queries += 1
+
+            event.listen(db.engine, "before_cursor_execute", increment)
+            User.get_all_data(refresh_if_in_progress=True)
+            event.remove(db.engine, "before_cursor_execute", increment)
+            assert not db.session.identity_map
+            return n_queries
+
+        n_users = 4
+        monkeypatch.setitem(app.config, "USER_BATCH_SIZE", n_users)
+        queries_per_batch = count_queries(n_users)
+        assert count_queries(n_users) <= 2 * queries_per_batch
+
+    def test_queries_scale_with_depth(self, app):
+        def count_queries(width):
+            def seed():
+                root = Page()
+                root.branch = [Page() for _ in range(width)]
+                for page in root.branch:
+                    page.branch = [Page(Input(variable="nested")) for _ in range(width)]
+                return [root, Page()]
+
+            User.make_test_user(seed)
+            db.session.commit()
+            db.session.expunge_all()
+
+            n_queries = 0
+
+            def increment(*args):
+                nonlocal n_queries
+                n_queries += 1
+
+            event.listen(Engine, "before_cursor_execute", increment)
+            try:
+                df = User.get_all_data(refresh_if_in_progress=True)
+            finally:
+                event.remove(Engine, "before_cursor_execute", increment)
+            assert "nested" in df
+            return n_queries
+
+        # nested branches are loaded one level at a time, not one page at a time
+        assert count_queries(3) == count_queries(1)
+
 
 class TestProcessRequest:
     def test_committed_changes(self):
@@ -335,6 +575,52 @@ class TestTest:
     def test_multiple_users(self):
         User.test_multiple_users(n_users=3, seed_func=seed)
 
+    def test_load_test(self, app):
+        clear_routes()
+
+        @User.route("/test_load_test_rule")
+        def test_load_test_seed():
+            return [
+                Page(Input(variable="input")),
+                Page(Check(choices=["yes", "no"])),
+                Page(),
+                Page(),
+            ]
+
+        results = User.load_test(4, n_workers=2)
+        assert results.n_requests == 16
+        assert results.n_errors == 0
+        assert results.throughput > 0
+
+        # each user is created, then submits every page but the last
+        summary = results.summarize()
+        assert list(summary.index) == ["start", "0", "1", "2"]
+        assert (summary.requests == 4).all()
+        assert (summary.p50 <= summary.p95).all()
+        assert (summary.p95 <= summary.p99).all()
+
+    @pytest.mark.parametrize("single_transaction", (True, False))
+    def test_single_transaction_requests(self, app, monkeypatch, single_transaction):
+        monkeypatch.setitem(
+            app.config, "SINGLE_TRANSACTION_REQUESTS", single_transaction
+        )
+        user = User.make_test_user(seed)
+        user.test_get()
+        n_commits = 0
+
+        def increment(*args):
+            nonlocal n_commits
+            n_commits += 1
+
+        event.listen(Engine, "commit", increment)
+        user.test_post()
+        event.remove(Engine, "commit", increment)
+
+        assert n_commits == (1 if single_transaction else 2)
+        assert user.get_tree().page is user.get_tree().branch[1]
+        # the lock is released at the end of the request
+        assert not any(lock.locked() for lock in _request_lock._process_locks)
+
     def test_incorrect_number_of_responses(self, app):
         # page 0 contains no questions
         with pytest.raises(ValueError):
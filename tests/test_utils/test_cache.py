@@ -0,0 +1,35 @@
+from hemlock.utils.cache import LRUCache
+
+
+def test_get_or_set():
+    cache = LRUCache()
+    assert cache.get_or_set("key", lambda: "value") == "value"
+    assert cache.get_or_set("key", lambda: "new value") == "value"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_get():
+    cache = LRUCache()
+    assert cache.get("key") is None
+    cache.set("key", "value")
+    assert cache.get("key") == "value"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_eviction():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 0)
+    cache.set("b", 1)
+    # using "a" makes "b" the least recently used item
+    cache.get_or_set("a", lambda: None)
+    cache.set("c", 2)
+    assert len(cache) == 2
+    assert "a" in cache and "c" in cache and "b" not in cache
+
+
+def test_clear():
+    cache = LRUCache()
+    cache.get_or_set("key", lambda: "value")
+    cache.clear()
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (0, 0)
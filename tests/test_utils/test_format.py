@@ -1,6 +1,11 @@
 import pytest
 
-from hemlock.utils.format import plural
+from hemlock.utils.format import (
+    _convert_markdown,
+    convert_markdown,
+    markdown_cache,
+    plural,
+)
 
 
 @pytest.mark.parametrize("number", (1, 2))
@@ -15,3 +20,17 @@ def test_plural(number, singular_form, plural_form):
         expected_result = "octopus" if number == 1 else "octopodes"
 
     assert result == expected_result
+
+
+@pytest.mark.parametrize("strip_last_paragraph", (True, False))
+def test_convert_markdown_cache(strip_last_paragraph):
+    markdown_cache.clear()
+    text = "Hello,\nworld!\n\n**How are you?**"
+    html = convert_markdown(text, strip_last_paragraph)
+    assert html == _convert_markdown(text, strip_last_paragraph)
+    assert convert_markdown(text, strip_last_paragraph) == html
+    assert (markdown_cache.hits, markdown_cache.misses) == (1, 1)
+
+    # stripping the last paragraph gives different HTML, so it's cached separately
+    convert_markdown(text, not strip_last_paragraph)
+    assert markdown_cache.misses == 2
@@ -2,6 +2,7 @@ import pytest
 from sqlalchemy_mutable.utils import partial
 
 from hemlock import User, Page
+from hemlock._assignment_count import AssignmentCount
 from hemlock.app import db
 from hemlock.utils.random import Assigner
 
@@ -50,3 +51,22 @@ class TestAssigner:
         for _ in range(len(expected_values)):
             User.make_test_user(partial(self.seed, assigner))
         assert (assigner.get_cum_assigned()["count"] == 1).all()
+
+    def test_stored_counts(self, app, assigner):
+        # users assigned before the counts are stored are counted when the counts
+        # are created
+        User.make_test_user(partial(self.seed, assigner))
+        new_assigner = Assigner({"factor0": (0, 1)}, key=f"{assigner.key}-new")
+        User.make_test_user(partial(self.seed, new_assigner))
+
+        counts = AssignmentCount.query.filter_by(assigner_key=new_assigner.key).all()
+        assert len(counts) == 2
+        assert sum(count.count for count in counts) == 2
+        assert max(count.count for count in counts) == 1
+
+
+def test_assigner_key():
+    # assigners with identical conditions share their counts unless given a key
+    conditions = {"factor0": (0, 1)}
+    assert Assigner(conditions).key == Assigner(conditions).key
+    assert Assigner(conditions, key="other").key == "other"
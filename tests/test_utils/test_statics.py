@@ -1,8 +1,11 @@
 import pandas as pd
+import pytest
 
+from hemlock._assets import ASSETS
 from hemlock.app import db
 from hemlock.questions import Label
 from hemlock.questions.base import Question
+from hemlock.utils import statics
 from hemlock.utils.statics import (
     make_figure,
     pandas_to_html,
@@ -30,10 +33,49 @@ def test_pandas_to_html():
 def test_recompile_at_interval():
     question = recompile_at_interval(5000, Question())
     js = question.html_settings["js"]
-    assert "cdn.socket.io" in js[0]["src"]  # socketio javascript
+    assert js[0]["src"] == ASSETS["socket.io.min.js"].url  # socketio javascript
     assert "setInterval" in js[1]  # recompile at interval javascript
 
 
+def test_recompile_in_room():
+    question = recompile_at_interval(5000, Question(), broadcast=True)
+    js = question.html_settings["js"]
+    assert "join-recompile-room-event" in js[1]
+    assert "setInterval" not in js[1]  # the server recompiles the question
+    assert question._broadcast_interval == 5000
+
+
+def test_join_recompile_room(app, monkeypatch):
+    tasks = []
+    monkeypatch.setattr(
+        statics.socketio, "start_background_task", lambda *args: tasks.append(args)
+    )
+    # the socket handlers remove the session, so start with one bound to this app
+    db.session.remove()
+    broadcast_label = recompile_at_interval(5000, Label(), broadcast=True)
+    label = Label()
+    db.session.add_all([broadcast_label, label])
+    db.session.commit()
+    broadcast_hash, hash = broadcast_label.hash, label.hash
+    client = statics.socketio.test_client(app)
+
+    # the client can't start broadcasts of other questions or choose the interval
+    for unknown_hash in ("unknown", hash):
+        with pytest.warns(RuntimeWarning):
+            client.emit(
+                "join-recompile-room-event", {"data": unknown_hash, "interval": 0}
+            )
+    assert tasks == []
+
+    client.emit("join-recompile-room-event", {"data": broadcast_hash})
+    assert [task[2:] for task in tasks] == [(broadcast_hash, 5)]
+    assert client.get_received()[0]["name"] == "recompile-question-response"
+
+    client.disconnect()
+    assert not statics._broadcast_subscribers[broadcast_hash]
+    statics._broadcast_tasks.discard(broadcast_hash)
+
+
 class TestRecompileQuestion:
     label = "Label."
 
@@ -53,3 +95,40 @@ class TestRecompileQuestion:
             # However, the label should still be added
             pass
         assert label.label == self.label
+
+
+def test_broadcast_at_interval(app, monkeypatch):
+    hash, emitted = "hash", []
+    monkeypatch.setattr(statics.socketio, "sleep", lambda interval: None)
+    monkeypatch.setattr(
+        statics.socketio, "emit", lambda *args, **kwargs: emitted.append(kwargs["to"])
+    )
+
+    def recompile_and_disconnect(hash):
+        statics._broadcast_subscribers[hash].clear()
+        return "html"
+
+    # the task broadcasts until its subscribers disconnect
+    monkeypatch.setattr(statics, "_recompile", recompile_and_disconnect)
+    statics._broadcast_subscribers[hash] = {"sid"}
+    statics._broadcast_tasks.add(hash)
+    statics._broadcast_at_interval(app, hash, 0)
+    assert emitted == [statics.get_recompile_room(hash)]
+    assert hash not in statics._broadcast_tasks
+
+
+def test_broadcast_error(app, monkeypatch, caplog):
+    hash = "hash"
+    monkeypatch.setattr(statics.socketio, "sleep", lambda interval: None)
+
+    def raise_error(hash):
+        raise RuntimeError("compile function failed")
+
+    # the task stops so the next subscriber can restart it
+    monkeypatch.setattr(statics, "_recompile", raise_error)
+    statics._broadcast_subscribers[hash] = {"sid"}
+    statics._broadcast_tasks.add(hash)
+    statics._broadcast_at_interval(app, hash, 0)
+    assert hash not in statics._broadcast_tasks
+    assert hash not in statics._broadcast_subscribers
+    assert "compile function failed" in caplog.text